@@ -8,7 +8,15 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from app.db import Base
-from app.models import User
+from app.models import (
+    User,
+    UserArchive,
+    Job,
+    UserTombstone,
+    UserIdentity,
+    UserStat,
+    IdempotencyKey,
+)
 
 config = context.config
 
@@ -19,6 +27,8 @@ DB_HOST = os.getenv("POSTGRES_HOST")
 DB_NAME = os.getenv("POSTGRES_DB")
 
 DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASS}@{DB_HOST}/{DB_NAME}"
+# With sharded users, migrate every shard: alembic -x url=<shard url> upgrade head
+DATABASE_URL = context.get_x_argument(as_dictionary=True).get("url", DATABASE_URL)
 config.set_main_option("sqlalchemy.url", DATABASE_URL)
 
 
@@ -0,0 +1,80 @@
+"""Create user_stats, incrementally maintained user counters
+
+Revision ID: 0a3c5e7f9b12
+Revises: f2a6d8b0c4e1
+Create Date: 2026-10-19 17:48:03.512946
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0a3c5e7f9b12"
+down_revision: Union[str, None] = "f2a6d8b0c4e1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "user_stats",
+        sa.Column("dimension", sa.String(length=20), nullable=False),
+        sa.Column("key", sa.String(length=50), nullable=False),
+        sa.Column("slot", sa.Integer(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("dimension", "key", "slot"),
+    )
+    # Backfill from the existing users (roles are stored by enum name); later
+    # writes keep the counters current. Built with SQLAlchemy so it runs on
+    # SQLite shards too.
+    users = sa.union_all(_user_rows("users"), _user_rows("users_archive")).subquery()
+    role = sa.func.lower(sa.cast(users.c.role, sa.String))
+    status = sa.case(
+        (users.c.active, sa.literal_column("'active'")),
+        else_=sa.literal_column("'inactive'"),
+    )
+    day = sa.cast(sa.func.date(users.c.created_at), sa.String)
+    backfill = sa.union_all(
+        *(
+            sa.select(
+                sa.literal_column(f"'{dimension}'"),
+                key,
+                sa.literal_column("0"),
+                sa.func.count(),
+            ).group_by(group)
+            for dimension, key, group in (
+                ("role", role, role),
+                ("status", status, users.c.active),
+                ("signup_day", day, day),
+            )
+        )
+    )
+    user_stats = sa.table(
+        "user_stats",
+        sa.column("dimension"),
+        sa.column("key"),
+        sa.column("slot"),
+        sa.column("count"),
+    )
+    op.execute(
+        user_stats.insert().from_select(["dimension", "key", "slot", "count"], backfill)
+    )
+
+
+def _user_rows(name: str) -> sa.Select:
+    table = sa.table(
+        name,
+        sa.column("role", sa.String),
+        sa.column("active", sa.Boolean),
+        sa.column("created_at", sa.DateTime),
+    )
+    return sa.select(table.c.role, table.c.active, table.c.created_at)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("user_stats")
@@ -0,0 +1,110 @@
+"""User index strategy: drop redundant indexes, add case-insensitive uniques
+
+Revision ID: 7c2f9a1e3b58
+Revises: 4d9e83e68b9b
+Create Date: 2026-10-19 09:12:05.418230
+
+The first revision is empty and the schema used to come from
+``Base.metadata.create_all``, which created for ``users``:
+
+- ``users_pkey`` plus a redundant unique ``ix_users_id`` on ``id``.
+- unique ``ix_users_username`` / ``ix_users_email`` (case-sensitive).
+
+This revision creates the table when it does not exist yet, adds unique
+indexes on ``lower(username)`` / ``lower(email)`` (which also enforce plain
+uniqueness) and then drops the indexes they make redundant. On PostgreSQL the
+indexes are built and dropped ``CONCURRENTLY`` so writes are not blocked.
+Case-variant duplicates (``Bob`` / ``bob``) must be resolved before upgrading.
+"""
+from contextlib import nullcontext
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7c2f9a1e3b58"
+down_revision: Union[str, None] = "4d9e83e68b9b"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+LOWER_INDEXES = {
+    "ix_users_username_lower": "username",
+    "ix_users_email_lower": "email",
+}
+LEGACY_INDEXES = {
+    "ix_users_id": "id",
+    "ix_users_username": "username",
+    "ix_users_email": "email",
+}
+
+
+def _concurrently():
+    """Runs the block outside the migration transaction on PostgreSQL."""
+    if op.get_bind().dialect.name != "postgresql":
+        return nullcontext()
+    return op.get_context().autocommit_block()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not sa.inspect(op.get_bind()).has_table("users"):
+        op.create_table(
+            "users",
+            sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("username", sa.String(length=50), nullable=False),
+            sa.Column("email", sa.String(length=100), nullable=False),
+            sa.Column("first_name", sa.String(length=50), nullable=False),
+            sa.Column("last_name", sa.String(length=50), nullable=False),
+            sa.Column(
+                "role",
+                sa.Enum("ADMIN", "USER", "GUEST", name="userrole_enum"),
+                nullable=False,
+            ),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+            sa.Column("active", sa.Boolean(), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+        )
+
+    with _concurrently():
+        for name, column in LOWER_INDEXES.items():
+            op.create_index(
+                name,
+                "users",
+                [sa.text(f"lower({column})")],
+                unique=True,
+                if_not_exists=True,
+                postgresql_concurrently=True,
+            )
+        for name in LEGACY_INDEXES:
+            op.drop_index(
+                name,
+                table_name="users",
+                if_exists=True,
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with _concurrently():
+        for name, column in LEGACY_INDEXES.items():
+            op.create_index(
+                name,
+                "users",
+                [column],
+                unique=True,
+                if_not_exists=True,
+                postgresql_concurrently=True,
+            )
+        for name in LOWER_INDEXES:
+            op.drop_index(
+                name,
+                table_name="users",
+                if_exists=True,
+                postgresql_concurrently=True,
+            )
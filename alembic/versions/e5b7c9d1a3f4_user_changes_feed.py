@@ -0,0 +1,63 @@
+"""User changes feed: updated_at keyset index and deletion tombstones
+
+Revision ID: e5b7c9d1a3f4
+Revises: d8e2a4c61f07
+Create Date: 2026-10-19 16:21:40.118532
+
+"""
+from contextlib import nullcontext
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e5b7c9d1a3f4"
+down_revision: Union[str, None] = "d8e2a4c61f07"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _concurrently():
+    """Runs the block outside the migration transaction on PostgreSQL."""
+    if op.get_bind().dialect.name != "postgresql":
+        return nullcontext()
+    return op.get_context().autocommit_block()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "user_tombstones",
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+    op.create_index(
+        "ix_user_tombstones_deleted_at_user_id",
+        "user_tombstones",
+        ["deleted_at", "user_id"],
+        unique=False,
+    )
+    with _concurrently():
+        op.create_index(
+            "ix_users_updated_at_id",
+            "users",
+            ["updated_at", "id"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with _concurrently():
+        op.drop_index(
+            "ix_users_updated_at_id",
+            table_name="users",
+            postgresql_concurrently=True,
+        )
+    op.drop_index("ix_user_tombstones_deleted_at_user_id", table_name="user_tombstones")
+    op.drop_table("user_tombstones")
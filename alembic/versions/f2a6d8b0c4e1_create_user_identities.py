@@ -0,0 +1,35 @@
+"""Create user_identities, the global username/email registry for sharding
+
+Revision ID: f2a6d8b0c4e1
+Revises: e5b7c9d1a3f4
+Create Date: 2026-10-19 17:05:12.804219
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f2a6d8b0c4e1"
+down_revision: Union[str, None] = "e5b7c9d1a3f4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "user_identities",
+        sa.Column("kind", sa.String(length=10), nullable=False),
+        sa.Column("value", sa.String(length=100), nullable=False),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.PrimaryKeyConstraint("kind", "value"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("user_identities")
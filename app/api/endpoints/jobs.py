@@ -0,0 +1,102 @@
+import logging
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.exc import NoResultFound
+from sqlalchemy.orm import Session
+from uuid import UUID
+
+from app.db import get_db
+from app.profiling import ProfiledRoute
+from app.schemas.job import (
+    JobOut,
+    UserDeactivateJobIn,
+    UserExportJobIn,
+    UserImportJobIn,
+)
+from app.services import jobs as service_jobs
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"], route_class=ProfiledRoute)
+logger = logging.getLogger(__name__)
+
+
+@router.post(
+    "/users/import", response_model=JobOut, status_code=status.HTTP_202_ACCEPTED
+)
+def import_users(body: UserImportJobIn, db: Session = Depends(get_db)) -> JobOut:
+    """
+    Queue a bulk import of users.
+
+    Args:
+        body (UserImportJobIn): Users to create.
+        db (Session): Database session.
+
+    Returns:
+        JobOut: The queued job. Poll `GET /jobs/{job_id}` for progress.
+    """
+    logger.info(f"Queueing import of {len(body.users)} users")
+    return service_jobs.enqueue_job(
+        db, service_jobs.IMPORT_USERS, body.model_dump(mode="json"), len(body.users)
+    )
+
+
+@router.post(
+    "/users/deactivate", response_model=JobOut, status_code=status.HTTP_202_ACCEPTED
+)
+def deactivate_users(
+    body: UserDeactivateJobIn, db: Session = Depends(get_db)
+) -> JobOut:
+    """
+    Queue a bulk deactivation of users.
+
+    Args:
+        body (UserDeactivateJobIn): UUIDs from the users to deactivate.
+        db (Session): Database session.
+
+    Returns:
+        JobOut: The queued job. Poll `GET /jobs/{job_id}` for progress.
+    """
+    logger.info(f"Queueing deactivation of {len(body.ids)} users")
+    return service_jobs.enqueue_job(
+        db, service_jobs.DEACTIVATE_USERS, body.model_dump(mode="json"), len(body.ids)
+    )
+
+
+@router.post(
+    "/users/export", response_model=JobOut, status_code=status.HTTP_202_ACCEPTED
+)
+def export_users(body: UserExportJobIn, db: Session = Depends(get_db)) -> JobOut:
+    """
+    Queue an export of all users to a JSON lines file.
+
+    Args:
+        body (UserExportJobIn): Export options.
+        db (Session): Database session.
+
+    Returns:
+        JobOut: The queued job. The file path is reported in its result.
+    """
+    logger.info("Queueing export of all users")
+    return service_jobs.enqueue_job(
+        db, service_jobs.EXPORT_USERS, body.model_dump(mode="json")
+    )
+
+
+@router.get("/{job_id}", response_model=JobOut)
+def retrieve_job(job_id: UUID, db: Session = Depends(get_db)) -> JobOut:
+    """
+    Retrieves a job with its progress and throughput.
+
+    Args:
+        job_id: Query param UUID from the job to retrieve.
+        db (Session): Database session.
+
+    Raises:
+        HTTPException: If the job does not exists.
+
+    Returns:
+        JobOut: Job formatted with the output schema.
+    """
+    try:
+        return service_jobs.get_job(db, job_id)
+    except NoResultFound:
+        logger.error(f"Job not found: {job_id}")
+        raise HTTPException(status_code=404, detail="Job not found")
@@ -0,0 +1,17 @@
+from typing import Dict
+from fastapi import APIRouter
+
+from app import metrics
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+@router.get("/")
+def read_metrics() -> Dict[str, dict]:
+    """
+    Returns the in-process performance counters of this instance.
+
+    Returns:
+        Dict[str, dict]: Counters grouped by component.
+    """
+    return metrics.snapshot()
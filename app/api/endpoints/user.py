@@ -1,27 +1,276 @@
+import json
 import logging
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, status
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.exc import NoResultFound
 from sqlalchemy.orm import Session
 from uuid import UUID
-from typing import List
+from typing import Callable, List, Optional
 from fastapi_pagination import Page, Params
 
 from app.db import get_db
-from app.schemas.user import UserOut, UserCreate, UserUpdate, UserPartialUpdate
+from app.encoding import (
+    MSGPACK,
+    MSGPACK_RESPONSES,
+    NDJSON,
+    encode,
+    negotiate,
+    render,
+)
+from app.profiling import ProfiledRoute
+from app.schemas.user import (
+    UserChangesOut,
+    UserOut,
+    UserCreate,
+    UserUpdate,
+    UserPartialUpdate,
+    UserStatsOut,
+    UserAvailabilityOut,
+)
+from app.services import archive as service_archive
+from app.services import batching as service_batching
+from app.services import changes as service_changes
+from app.services import events as service_events
+from app.services import idempotency as service_idempotency
+from app.services import membership as service_membership
+from app.services import stats as service_stats
 from app.services import user as service_user
 from app.services.exceptions import DuplicateUserError
 
-router = APIRouter(prefix="/users", tags=["Users"])
+router = APIRouter(prefix="/users", tags=["Users"], route_class=ProfiledRoute)
 logger = logging.getLogger(__name__)
 
 
-@router.get("/{user_id}", response_model=UserOut)
-def retrieve_user(user_id: UUID, db: Session = Depends(get_db)) -> UserOut:
+def _idempotent(
+    request: Request,
+    idempotency_key: Optional[str],
+    body: bytes,
+    status_code: int,
+    write: Callable[[], UserOut],
+):
+    """
+    Runs ``write`` once per ``Idempotency-Key``: retries get the first response,
+    and retries arriving while it runs wait for it. Without a key (or with the
+    store disabled) ``write`` simply runs.
+    """
+    store = service_idempotency.store
+    if idempotency_key is None or store is None:
+        return write()
+
+    def respond():
+        try:
+            return (
+                status_code,
+                UserOut.model_validate(write()).model_dump_json().encode(),
+            )
+        except HTTPException as e:
+            return e.status_code, json.dumps({"detail": e.detail}).encode()
+
+    fingerprint = service_idempotency.fingerprint(
+        request.method, request.url.path, body
+    )
+    try:
+        code, content, replayed = store.run(idempotency_key, fingerprint, respond)
+    except service_idempotency.IdempotencyKeyReusedError as e:
+        logger.error(f"Idempotency key reused with another request: {idempotency_key}")
+        raise HTTPException(status_code=422, detail=str(e))
+    except service_idempotency.IdempotencyKeyInProgressError as e:
+        logger.error(f"Idempotency key still in progress: {idempotency_key}")
+        raise HTTPException(status_code=409, detail=str(e))
+    if replayed:
+        logger.info(f"Replaying response for idempotency key {idempotency_key}")
+    return Response(
+        content=content,
+        status_code=code,
+        media_type="application/json",
+        headers={"Idempotent-Replayed": "true"} if replayed else None,
+    )
+
+
+@router.get("/changes", response_model=UserChangesOut, responses=MSGPACK_RESPONSES)
+def list_user_changes(
+    request: Request,
+    since: Optional[str] = None,
+    limit: int = Query(500, ge=1, le=5000),
+    db: Session = Depends(get_db),
+) -> UserChangesOut:
+    """
+    Retrieves users created, updated or deleted since a cursor (delta sync).
+    Answers in MessagePack when the client accepts `application/msgpack`.
+
+    Args:
+        request (Request): Incoming request, used for content negotiation.
+        since: Cursor returned as `next_cursor` by the previous call. Omit it to
+            start a full sync.
+        limit: Maximum number of changes to return.
+        db (Session): Database session provided by FastAPI (with Depends).
+
+    Raises:
+        HTTPException: If the cursor is invalid, or older than the tombstone
+            retention (410: start a full sync again).
+
+    Returns:
+        UserChangesOut: Changed and deleted users, and the cursor to continue from.
+    """
+    logger.info(f"Listing user changes since {since}")
+    try:
+        changes = service_changes.get_user_changes(db, since, limit)
+    except service_changes.ExpiredCursorError as e:
+        logger.error(f"Expired sync cursor: {since}")
+        raise HTTPException(status_code=410, detail=str(e))
+    except service_changes.InvalidCursorError as e:
+        logger.error(f"Invalid sync cursor: {since}")
+        raise HTTPException(status_code=400, detail=str(e))
+    return render(request, changes)
+
+
+@router.get("/export", response_class=StreamingResponse)
+def export_users(
+    request: Request,
+    chunk_size: int = Query(1000, ge=1, le=10000),
+    db: Session = Depends(get_db),
+) -> StreamingResponse:
+    """
+    Streams every user in id order, reading `chunk_size` users at a time.
+
+    The body is newline-delimited JSON (`application/x-ndjson`), or a sequence
+    of MessagePack maps when the client accepts `application/msgpack`. With
+    `Accept-Encoding: zstd` or `gzip` it is compressed as it streams.
+
+    Args:
+        request (Request): Incoming request, used for content negotiation.
+        chunk_size: Users read per query.
+        db (Session): Database session provided by FastAPI (with Depends).
+
+    Returns:
+        StreamingResponse: All users formatted with the output schema.
+    """
+    media_type = negotiate(request)
+    logger.info(f"Exporting all users as {media_type}")
+
+    def chunks():
+        try:
+            for users in service_user.iter_users_out(db, chunk_size):
+                if media_type == MSGPACK:
+                    yield b"".join(encode(user, MSGPACK) for user in users)
+                else:
+                    yield b"".join(
+                        user.model_dump_json().encode() + b"\n" for user in users
+                    )
+        finally:
+            # The session outlives the request handler while streaming.
+            db.close()
+
+    return StreamingResponse(
+        chunks(),
+        media_type=MSGPACK if media_type == MSGPACK else NDJSON,
+        headers={"Vary": "Accept"},
+    )
+
+
+@router.get("/stream", response_class=StreamingResponse)
+async def stream_user_events(request: Request) -> StreamingResponse:
+    """
+    Streams user create, update and delete events as server-sent events.
+
+    Each event carries the user formatted with the output schema (only the id
+    for deletes). A `dropped` event reports events lost because the client fell
+    behind, so it can resynchronize with `GET /users/changes`.
+
+    Args:
+        request (Request): Incoming request, used to detect disconnection.
+
+    Returns:
+        StreamingResponse: `text/event-stream` response.
+    """
+    subscriber = service_events.bus.subscribe()
+    logger.info("User event stream opened")
+
+    async def frames():
+        reported_drops = 0
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                batch = await subscriber.get(
+                    service_events.USER_EVENTS_HEARTBEAT_SECONDS
+                )
+                if subscriber.dropped > reported_drops:
+                    lost = subscriber.dropped - reported_drops
+                    reported_drops = subscriber.dropped
+                    yield f'event: dropped\ndata: {{"count":{lost}}}\n\n'
+                if not batch:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield "".join(batch)
+        finally:
+            service_events.bus.unsubscribe(subscriber)
+            logger.info("User event stream closed")
+
+    return StreamingResponse(
+        frames(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/availability", response_model=UserAvailabilityOut)
+def check_user_availability(
+    username: Optional[str] = None,
+    email: Optional[str] = None,
+    db: Session = Depends(get_db),
+) -> UserAvailabilityOut:
+    """
+    Checks whether a username and/or email are still free to register.
+    Most free names are answered from memory, without a database query.
+
+    Args:
+        username: Username to check.
+        email: Email to check.
+        db (Session): Database session provided by FastAPI (with Depends).
+
+    Raises:
+        HTTPException: If neither username nor email is given.
+
+    Returns:
+        UserAvailabilityOut: Availability of each given value.
+    """
+    if username is None and email is None:
+        logger.error("Availability check without username or email")
+        raise HTTPException(status_code=400, detail="Give a username or an email")
+    return service_membership.check_availability(db, username, email)
+
+
+@router.get("/stats", response_model=UserStatsOut)
+def retrieve_user_stats(
+    days: int = Query(30, ge=1, le=366), db: Session = Depends(get_db)
+) -> UserStatsOut:
+    """
+    Retrieves user counts by role and status, and signups per day.
+    Counters are maintained on every write, so no users are scanned.
+
+    Args:
+        days: Number of days of signups to return, today included.
+        db (Session): Database session provided by FastAPI (with Depends).
+
+    Returns:
+        UserStatsOut: User statistics.
+    """
+    logger.info(f"Retrieving user stats for the last {days} days")
+    return service_stats.get_user_stats(db, days)
+
+
+@router.get("/{user_id}", response_model=UserOut, responses=MSGPACK_RESPONSES)
+async def retrieve_user(
+    user_id: UUID, request: Request, db: Session = Depends(get_db)
+) -> UserOut:
     """
     Retrieves a specific user.
+    Concurrent requests for the same user share one database query.
+    Answers in MessagePack when the client accepts `application/msgpack`.
 
     Args:
         user_id: Query param UUID from the user to retrieve.
+        request (Request): Incoming request, used for content negotiation.
         db (Session): Database session provided by FastAPI (with Depends).
 
     Raises:
@@ -32,79 +281,135 @@ def retrieve_user(user_id: UUID, db: Session = Depends(get_db)) -> UserOut:
     """
     logger.info(f"Retrieving user with ID: {user_id}")
     try:
-        return service_user.get_user_by_id(db, user_id)
+        user = await service_user.get_user_out_async(db, user_id)
     except NoResultFound:
         logger.error(f"User not found: {user_id}")
         raise HTTPException(status_code=404, detail="User not found")
+    return render(request, user)
 
 
-@router.get("/", response_model=Page[UserOut])
+@router.get("/", response_model=Page[UserOut], responses=MSGPACK_RESPONSES)
 def list_users(
-    db: Session = Depends(get_db), params: Params = Depends()
+    request: Request, db: Session = Depends(get_db), params: Params = Depends()
 ) -> Page[UserOut]:
     """
     Retrieves a list of all users.
+    Pages are cached until the next write to users.
+    Answers in MessagePack when the client accepts `application/msgpack`.
 
     Args:
+        request (Request): Incoming request, used for content negotiation.
         db (Session): Database session provided by FastAPI (with Depends).
 
     Returns:
         Page[UserOut]: List of users paginated formatted with the output schema.
     """
     logger.info("Listing all users")
-    return service_user.get_users(db, params)
+    media_type = negotiate(request)
+    return Response(
+        content=service_user.get_users_page(db, params, media_type),
+        media_type=media_type,
+        headers={"Vary": "Accept"},
+    )
 
 
 @router.post("/", response_model=UserOut, status_code=status.HTTP_201_CREATED)
-def create_user(user: UserCreate, db: Session = Depends(get_db)) -> UserOut:
+def create_user(
+    user: UserCreate,
+    request: Request,
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+) -> UserOut:
     """
     Create a new user.
+    Retries sent with the same `Idempotency-Key` header get the first response.
 
     Args:
         user (UserCreate): New user data.
+        request (Request): Incoming request, fingerprinted for idempotency.
         db (Session): Database session.
+        idempotency_key: Optional `Idempotency-Key` header.
 
     Raises:
-        HTTPException: If there is any error in user creation.
+        HTTPException: If there is any error in user creation, or if the
+            idempotency key was used for another request or is still in progress.
 
     Returns:
         UserOut: User created with all fields.
     """
-    logger.info(f"Creating user with email: {user.email}")
-    try:
-        return service_user.create_user(db, user)
-    except DuplicateUserError as e:
-        logger.error(f"Failed to create user: duplicate email {user.email}")
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    def write() -> UserOut:
+        logger.info(f"Creating user with email: {user.email}")
+        try:
+            if service_batching.batcher is not None:
+                return service_batching.batcher.create_user(user)
+            return service_user.create_user(db, user)
+        except DuplicateUserError as e:
+            logger.error(f"Failed to create user: duplicate email {user.email}")
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        except service_batching.WriteBatcherUnavailableError as e:
+            logger.error(f"Failed to create user: {e}")
+            raise HTTPException(status_code=503, detail=str(e))
+
+    return _idempotent(
+        request,
+        idempotency_key,
+        user.model_dump_json().encode(),
+        status.HTTP_201_CREATED,
+        write,
+    )
 
 
 @router.put("/{user_id}", response_model=UserOut)
 def update_user(
-    user_id: UUID, user_in: UserUpdate, db: Session = Depends(get_db)
+    user_id: UUID,
+    user_in: UserUpdate,
+    request: Request,
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, max_length=255),
 ) -> UserOut:
     """
     Update a user.
+    Retries sent with the same `Idempotency-Key` header get the first response.
 
     Args:
         user_id: Query param UUID from the user to update.
         user_in (UserUpdate): Updated user data.
+        request (Request): Incoming request, fingerprinted for idempotency.
         db (Session): Database session.
+        idempotency_key: Optional `Idempotency-Key` header.
 
     Raises:
-        HTTPException: If there is any error in user update or if the user does not exists.
+        HTTPException: If there is any error in user update or if the user does not exists,
+            or if the idempotency key was used for another request or is still in progress.
 
     Returns:
         UserOut: User created with all fields.
     """
-    logger.info(f"Updating user {user_id}")
-    try:
-        return service_user.update_user(db, user_id, user_in)
-    except NoResultFound:
-        logger.error(f"User not found: {user_id}")
-        raise HTTPException(status_code=404, detail="User not found")
-    except DuplicateUserError as e:
-        logger.error(f"Failed to update user {user_id}: duplicate email")
-        raise HTTPException(status_code=400, detail=str(e))
+
+    def write() -> UserOut:
+        logger.info(f"Updating user {user_id}")
+        try:
+            if service_batching.batcher is not None:
+                return service_batching.batcher.update_user(user_id, user_in)
+            return service_user.update_user(db, user_id, user_in)
+        except NoResultFound:
+            logger.error(f"User not found: {user_id}")
+            raise HTTPException(status_code=404, detail="User not found")
+        except DuplicateUserError as e:
+            logger.error(f"Failed to update user {user_id}: duplicate email")
+            raise HTTPException(status_code=400, detail=str(e))
+        except service_batching.WriteBatcherUnavailableError as e:
+            logger.error(f"Failed to update user {user_id}: {e}")
+            raise HTTPException(status_code=503, detail=str(e))
+
+    return _idempotent(
+        request,
+        idempotency_key,
+        user_in.model_dump_json().encode(),
+        status.HTTP_200_OK,
+        write,
+    )
 
 
 @router.patch("/{user_id}", response_model=UserOut)
@@ -127,6 +432,8 @@ def partial_update_user(
     """
     logger.info(f"Partially updating user {user_id}")
     try:
+        if service_batching.batcher is not None:
+            return service_batching.batcher.update_user(user_id, user_in)
         return service_user.update_user(db, user_id, user_in)
     except NoResultFound:
         logger.error(f"User not found: {user_id}")
@@ -134,6 +441,9 @@ def partial_update_user(
     except DuplicateUserError as e:
         logger.error(f"Failed to partially update user {user_id}: duplicate email")
         raise HTTPException(status_code=400, detail=str(e))
+    except service_batching.WriteBatcherUnavailableError as e:
+        logger.error(f"Failed to partially update user {user_id}: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
 
 
 @router.delete("/{user_id}", status_code=204)
@@ -155,3 +465,29 @@ def delete_user(user_id: UUID, db: Session = Depends(get_db)) -> None:
     except NoResultFound:
         logger.error(f"User not found: {user_id}")
         raise HTTPException(status_code=404, detail="User not found")
+
+
+@router.post("/{user_id}/restore", response_model=UserOut)
+def restore_user(user_id: UUID, db: Session = Depends(get_db)) -> UserOut:
+    """
+    Restore an archived user into the active user table.
+
+    Args:
+        user_id: Query param UUID from the archived user to restore.
+        db (Session): Database session.
+
+    Raises:
+        HTTPException: If the user is not archived or its username or email was taken.
+
+    Returns:
+        UserOut: Restored user with all fields.
+    """
+    logger.info(f"Restoring archived user {user_id}")
+    try:
+        return service_archive.restore_user(db, user_id)
+    except NoResultFound:
+        logger.error(f"Archived user not found: {user_id}")
+        raise HTTPException(status_code=404, detail="Archived user not found")
+    except DuplicateUserError as e:
+        logger.error(f"Failed to restore user {user_id}: duplicate username or email")
+        raise HTTPException(status_code=400, detail=str(e))
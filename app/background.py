@@ -0,0 +1,52 @@
+import logging
+import threading
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    """
+    Runs a function every ``interval`` seconds on a daemon thread.
+
+    Failures are logged and the task keeps its schedule, so one bad run does
+    not stop maintenance work for the rest of the process lifetime.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        interval: float,
+        func: Callable[[], object],
+        run_at_start: bool = False,
+    ):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.run_at_start = run_at_start
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        logger.info(f"Started periodic task {self.name} every {self.interval}s")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        if self.run_at_start:
+            self._run_once()
+        while not self._stop.wait(self.interval):
+            self._run_once()
+
+    def _run_once(self) -> None:
+        try:
+            self.func()
+        except Exception:
+            logger.exception(f"Periodic task {self.name} failed")
@@ -1 +1 @@
-from .database import Base, get_db, engine
+from .database import Base, get_db, engine, shard_engines
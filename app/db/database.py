@@ -5,19 +5,61 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+from app.db.sharding import (
+    DIRECTORY_SHARD,
+    USER_SHARD_URLS,
+    create_sharded_sessionmaker,
+)
+
 DB_USER = os.getenv("POSTGRES_USER")
 DB_PASS = os.getenv("POSTGRES_PASSWORD")
 DB_HOST = os.getenv("POSTGRES_HOST")
 DB_NAME = os.getenv("POSTGRES_DB")
 ENV = os.getenv("ENV", "DEV")
+# "psycopg2", or "psycopg" for psycopg 3 (prepared statements, pipelining).
+POSTGRES_DRIVER = os.getenv("POSTGRES_DRIVER", "psycopg2")
+# psycopg 3 prepares a statement on the server once a connection has run it
+# this many times ("none" disables it, e.g. behind PgBouncer in transaction
+# pooling mode).
+POSTGRES_PREPARE_THRESHOLD = os.getenv("POSTGRES_PREPARE_THRESHOLD", "1")
 
 if ENV == "PROD":
     DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASS}@/{DB_NAME}?host={DB_HOST}"
 else:
     DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASS}@{DB_HOST}/{DB_NAME}"
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def create_db_engine(url: str):
+    """
+    Creates an engine for ``url`` using the configured PostgreSQL driver.
+
+    Plain ``postgresql://`` URLs get the ``POSTGRES_DRIVER`` dialect; URLs
+    naming a driver, or other databases, are used as given.
+    """
+    connect_args = {}
+    if url.startswith("postgresql://"):
+        url = url.replace("postgresql://", f"postgresql+{POSTGRES_DRIVER}://", 1)
+        if POSTGRES_DRIVER == "psycopg":
+            connect_args["prepare_threshold"] = (
+                None
+                if POSTGRES_PREPARE_THRESHOLD.lower() == "none"
+                else int(POSTGRES_PREPARE_THRESHOLD)
+            )
+    return create_engine(url, connect_args=connect_args)
+
+
+if USER_SHARD_URLS:
+    # Users are spread across several databases; `engine` is the directory
+    # shard, which also holds the tables that are not partitioned.
+    shard_engines = {
+        str(index): create_db_engine(url) for index, url in enumerate(USER_SHARD_URLS)
+    }
+    engine = shard_engines[DIRECTORY_SHARD]
+    SessionLocal = create_sharded_sessionmaker(shard_engines)
+else:
+    engine = create_db_engine(DATABASE_URL)
+    shard_engines = {DIRECTORY_SHARD: engine}
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
 class Base(DeclarativeBase):
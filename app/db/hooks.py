@@ -0,0 +1,64 @@
+import logging
+from typing import Callable
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, SessionTransaction
+
+logger = logging.getLogger(__name__)
+
+
+def _boundary(transaction: SessionTransaction) -> SessionTransaction:
+    """Returns the savepoint or root transaction ``transaction`` belongs to."""
+    while not transaction.nested and transaction.parent is not None:
+        transaction = transaction.parent
+    return transaction
+
+
+def on_commit(db: Session, callback: Callable[[], None]) -> None:
+    """
+    Runs ``callback`` once the session's outermost transaction commits.
+
+    Callbacks belong to the innermost transaction open when they are
+    registered. Releasing a savepoint hands its callbacks to the enclosing
+    transaction; rolling one back drops only the callbacks registered inside
+    it. They run in registration order after the root transaction commits,
+    and are dropped if it rolls back.
+
+    Args:
+        db (Session): Session of the transaction.
+        callback (Callable[[], None]): Function to call after commit.
+    """
+    transaction = db.get_nested_transaction() or db.get_transaction() or db.begin()
+    pending = db.info.setdefault("after_commit", {})
+    pending.setdefault(transaction, []).append(callback)
+
+
+@event.listens_for(Session, "after_commit")
+def _mark_committed(session: Session) -> None:
+    # Fired while the committing savepoint or root is still current; it is
+    # closed, and its callbacks dispatched, right after.
+    transaction = session.get_nested_transaction() or session.get_transaction()
+    if transaction in session.info.get("after_commit", {}):
+        session.info.setdefault("committed", set()).add(transaction)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _end_transaction(session: Session, transaction: SessionTransaction) -> None:
+    pending = session.info.get("after_commit", {})
+    callbacks = pending.pop(transaction, None)
+    if callbacks is None:
+        return
+    committed = session.info.get("committed", set())
+    if transaction not in committed:
+        return
+    committed.discard(transaction)
+    if transaction.parent is not None:
+        pending.setdefault(_boundary(transaction.parent), []).extend(callbacks)
+        return
+    for callback in callbacks:
+        # The data is already committed; a failing side effect must not turn
+        # the operation into an error for the caller.
+        try:
+            callback()
+        except Exception:
+            logger.exception("After-commit callback failed")
@@ -0,0 +1,67 @@
+import os
+import threading
+import time
+import uuid
+
+USER_ID_VERSION = os.getenv("USER_ID_VERSION", "4")
+
+_lock = threading.Lock()
+_last_ms = 0
+_last_seq = 0
+
+_VERSION_7 = 0x7 << 76
+_VARIANT_RFC4122 = 0x2 << 62
+_SEQ_MASK = 0xFFF
+_RAND_B_MASK = (1 << 62) - 1
+
+
+def uuid7() -> uuid.UUID:
+    """
+    Generates a time-ordered UUIDv7 (RFC 9562).
+
+    The 48 most significant bits hold the Unix timestamp in milliseconds, so
+    ids generated later sort after earlier ones and inserts land on the right
+    edge of the primary key B-tree. The 12-bit ``rand_a`` field is used as a
+    counter seeded randomly on every new millisecond, which keeps ids generated
+    within the same millisecond (and process) strictly increasing.
+
+    Returns:
+        UUID: A version 7 UUID, compatible with ``UUID(as_uuid=True)`` columns.
+    """
+    global _last_ms, _last_seq
+
+    rand = int.from_bytes(os.urandom(10), "big")
+    now_ms = time.time_ns() // 1_000_000
+    with _lock:
+        if now_ms > _last_ms:
+            _last_ms = now_ms
+            # Leave half of the counter space free for ids in the same tick.
+            _last_seq = (rand >> 64) & 0x7FF
+        else:
+            _last_seq += 1
+            if _last_seq > _SEQ_MASK:
+                # Counter exhausted (or the clock went backwards): borrow the
+                # next millisecond instead of breaking the ordering.
+                _last_ms += 1
+                _last_seq = (rand >> 64) & 0x7FF
+        ms, seq = _last_ms, _last_seq
+
+    return uuid.UUID(
+        int=(ms << 80)
+        | _VERSION_7
+        | (seq << 64)
+        | _VARIANT_RFC4122
+        | (rand & _RAND_B_MASK)
+    )
+
+
+def new_user_id() -> uuid.UUID:
+    """
+    Returns a new primary key for a user.
+
+    The UUID version is selected with the ``USER_ID_VERSION`` environment
+    variable: ``4`` (default) for random ids, ``7`` for time-ordered ids.
+    """
+    if USER_ID_VERSION == "7":
+        return uuid7()
+    return uuid.uuid4()
@@ -0,0 +1,163 @@
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Set, TypeVar
+from uuid import UUID
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.horizontal_shard import ShardedSession
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql import operators, visitors
+from sqlalchemy.sql.elements import BinaryExpression, BindParameter
+
+T = TypeVar("T")
+
+USER_SHARD_URLS = [
+    url.strip() for url in os.getenv("USER_SHARD_URLS", "").split(",") if url.strip()
+]
+
+# Shard that also holds the tables that are not partitioned by user (jobs and
+# the global username/email guard).
+DIRECTORY_SHARD = "0"
+
+# Tables partitioned by user id, and the column holding it.
+USER_KEY_COLUMNS = {"users": "id", "users_archive": "id", "user_tombstones": "user_id"}
+
+_scatter_pool: Optional[ThreadPoolExecutor] = None
+_scatter_pool_lock = threading.Lock()
+
+
+def shard_for(user_id: UUID, shard_count: int) -> str:
+    """
+    Returns the shard owning a user.
+
+    A hash of the id is used rather than the id itself, so time-ordered
+    (UUIDv7) ids are spread evenly too.
+    """
+    digest = hashlib.blake2b(user_id.bytes, digest_size=8).digest()
+    return str(int.from_bytes(digest, "big") % shard_count)
+
+
+def is_sharded(db: Session) -> bool:
+    return isinstance(db, ShardedSession)
+
+
+def _table_name(mapper) -> Optional[str]:
+    return mapper.local_table.name if mapper is not None else None
+
+
+def _routed_user_ids(statement) -> Optional[Set[UUID]]:
+    """
+    Collects the user ids a statement is restricted to through ``id = :value``
+    or ``id IN (:values)`` criteria, or None when it has no such criteria.
+    """
+    ids, found = set(), False
+    for node in visitors.iterate(statement):
+        if not isinstance(node, BinaryExpression):
+            continue
+        column, value = node.left, node.right
+        table = getattr(column, "table", None)
+        key_column = USER_KEY_COLUMNS.get(getattr(table, "name", None))
+        if key_column is None or getattr(column, "name", None) != key_column:
+            continue
+        if not isinstance(value, BindParameter):
+            continue
+        if node.operator is operators.eq:
+            ids.add(value.effective_value)
+        elif node.operator is operators.in_op:
+            ids.update(value.effective_value)
+        else:
+            continue
+        found = True
+    return ids if found else None
+
+
+def create_sharded_sessionmaker(engines: Dict[str, Engine]) -> sessionmaker:
+    """
+    Builds a session factory routing user data across ``engines``.
+
+    - Instances are stored in the shard of their user id (flushes, ``get``).
+    - Statements with ``id =`` / ``id IN`` criteria go to the owning shards.
+    - Other statements on user tables run on every shard and results are
+      concatenated; callers needing a global order merge them.
+    - Non-user tables live in the directory shard.
+
+    Args:
+        engines (Dict[str, Engine]): Engines by shard id ("0", "1", ...).
+
+    Returns:
+        sessionmaker: Factory of ``ShardedSession`` objects.
+    """
+    shard_ids = sorted(engines)
+    count = len(shard_ids)
+
+    def shard_chooser(mapper, instance, clause=None):
+        key_column = USER_KEY_COLUMNS.get(_table_name(mapper))
+        if key_column is not None and instance is not None:
+            return shard_for(getattr(instance, key_column), count)
+        return DIRECTORY_SHARD
+
+    def identity_chooser(mapper, primary_key, **kw):
+        if _table_name(mapper) in USER_KEY_COLUMNS:
+            return [shard_for(primary_key[0], count)]
+        return [DIRECTORY_SHARD]
+
+    def execute_chooser(orm_context):
+        if _table_name(orm_context.bind_mapper) not in USER_KEY_COLUMNS:
+            return [DIRECTORY_SHARD]
+        ids = _routed_user_ids(orm_context.statement)
+        if ids is None:
+            if orm_context.is_insert:
+                raise ValueError(
+                    "Inserts into sharded tables must set bind_arguments shard_id"
+                )
+            return shard_ids
+        return sorted({shard_for(user_id, count) for user_id in ids}) or [
+            DIRECTORY_SHARD
+        ]
+
+    return sessionmaker(
+        class_=ShardedSession,
+        autoflush=False,
+        shard_chooser=shard_chooser,
+        identity_chooser=identity_chooser,
+        execute_chooser=execute_chooser,
+        shards=engines,
+        info={"shard_engines": engines},
+    )
+
+
+def shard_count(db: Session) -> int:
+    return len(db.info["shard_engines"])
+
+
+def scatter(db: Session, fn: Callable[[Session], T]) -> List[T]:
+    """
+    Runs ``fn`` on every shard in parallel, each with its own short-lived
+    session, and returns the results in shard order.
+    """
+    global _scatter_pool
+    engines = db.info["shard_engines"]
+    if _scatter_pool is None:
+        with _scatter_pool_lock:
+            if _scatter_pool is None:
+                _scatter_pool = ThreadPoolExecutor(
+                    max_workers=max(len(engines), 2),
+                    thread_name_prefix="shard-scatter",
+                )
+
+    def run(engine: Engine) -> T:
+        with Session(bind=engine) as shard_db:
+            return fn(shard_db)
+
+    return list(_scatter_pool.map(run, [engines[s] for s in sorted(engines)]))
+
+
+def group_by_shard(db: Session, user_ids: Iterable[UUID]) -> Dict[str, List[UUID]]:
+    """Groups user ids by owning shard."""
+    count = shard_count(db)
+    groups: Dict[str, List[UUID]] = {}
+    for user_id in user_ids:
+        groups.setdefault(shard_for(user_id, count), []).append(user_id)
+    return groups
@@ -1,6 +1,16 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-from app.db.database import Base, engine
-from app.models import User
+from app.db.database import Base, engine, shard_engines
+from app.models import (
+    User,
+    UserArchive,
+    Job,
+    UserTombstone,
+    UserIdentity,
+    UserStat,
+    IdempotencyKey,
+)
 from dotenv import load_dotenv
 from app.logging import setup_logging
 from fastapi_pagination import add_pagination
@@ -8,15 +18,115 @@ from fastapi_pagination import add_pagination
 load_dotenv()
 setup_logging()
 
+from app.api.endpoints.jobs import router as jobs_router
+from app.api.endpoints.metrics import router as metrics_router
 from app.api.endpoints.user import router as user_router
+from app.background import PeriodicTask
+from app.encoding import CompressionMiddleware
+from app.db.database import SessionLocal
+from app.services import (
+    archive,
+    batching,
+    changes,
+    events,
+    idempotency,
+    jobs,
+    membership,
+    stats,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Starts and stops the background maintenance tasks and job workers."""
+    tasks = []
+    if archive.USER_ARCHIVE_AFTER_DAYS > 0:
+        tasks.append(
+            PeriodicTask(
+                "user-archive",
+                archive.USER_ARCHIVE_INTERVAL_SECONDS,
+                archive.run_archive_job,
+            )
+        )
+    if changes.USER_TOMBSTONE_RETENTION_DAYS > 0:
+        tasks.append(
+            PeriodicTask(
+                "user-tombstone-purge",
+                changes.USER_TOMBSTONE_PURGE_INTERVAL_SECONDS,
+                changes.run_purge_job,
+            )
+        )
+    if stats.USER_STATS_RECONCILE_INTERVAL_SECONDS > 0:
+        tasks.append(
+            PeriodicTask(
+                "user-stats-reconcile",
+                stats.USER_STATS_RECONCILE_INTERVAL_SECONDS,
+                stats.run_reconcile_job,
+            )
+        )
+    if membership.USER_MEMBERSHIP_INDEX:
+        membership.index = membership.MembershipIndex(
+            membership.USER_MEMBERSHIP_CAPACITY, membership.USER_MEMBERSHIP_ERROR_RATE
+        )
+        tasks.append(
+            PeriodicTask(
+                "user-membership-rebuild",
+                membership.USER_MEMBERSHIP_REBUILD_INTERVAL_SECONDS,
+                membership.run_rebuild_job,
+                run_at_start=True,
+            )
+        )
+    if idempotency.USER_IDEMPOTENCY_STORE == "memory":
+        idempotency.store = idempotency.MemoryIdempotencyStore(
+            idempotency.USER_IDEMPOTENCY_MAX_KEYS,
+            idempotency.USER_IDEMPOTENCY_TTL_SECONDS,
+            idempotency.USER_IDEMPOTENCY_WAIT_SECONDS,
+        )
+    elif idempotency.USER_IDEMPOTENCY_STORE == "database":
+        idempotency.store = idempotency.DatabaseIdempotencyStore(
+            SessionLocal,
+            idempotency.USER_IDEMPOTENCY_TTL_SECONDS,
+            idempotency.USER_IDEMPOTENCY_WAIT_SECONDS,
+            idempotency.USER_IDEMPOTENCY_CLAIM_TIMEOUT_SECONDS,
+        )
+        tasks.append(
+            PeriodicTask(
+                "user-idempotency-purge",
+                idempotency.USER_IDEMPOTENCY_PURGE_INTERVAL_SECONDS,
+                idempotency.run_purge_job,
+            )
+        )
+    if events.USER_EVENTS_NOTIFY and engine.dialect.name == "postgresql":
+        tasks.append(events.PgEventListener(engine))
+    if batching.USER_WRITE_BATCHING:
+        batching.batcher = batching.WriteBatcher(SessionLocal)
+        tasks.append(batching.batcher)
+    if jobs.JOB_WORKERS > 0:
+        jobs.runner = jobs.JobRunner(SessionLocal)
+        tasks.append(jobs.runner)
+    for task in tasks:
+        task.start()
+    yield
+    for task in tasks:
+        task.stop()
+    jobs.runner = None
+    batching.batcher = None
+    membership.index = None
+    idempotency.store = None
+
 
 app = FastAPI(
     title="User Management API",
     description="API to manage users in a secure and validated manner",
     version="1.0.0",
+    lifespan=lifespan,
 )
 add_pagination(app)
+app.add_middleware(CompressionMiddleware)
 
-Base.metadata.create_all(bind=engine)
+for shard_engine in shard_engines.values():
+    Base.metadata.create_all(bind=shard_engine)
 
 app.include_router(user_router)
+app.include_router(jobs_router)
+app.include_router(metrics_router)
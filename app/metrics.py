@@ -0,0 +1,19 @@
+from typing import Callable, Dict
+
+_providers: Dict[str, Callable[[], dict]] = {}
+
+
+def register(name: str, provider: Callable[[], dict]) -> None:
+    """
+    Registers a metrics provider, a callable returning a dict of counters.
+
+    Args:
+        name (str): Section name in the metrics snapshot.
+        provider (Callable[[], dict]): Returns the current counters.
+    """
+    _providers[name] = provider
+
+
+def snapshot() -> Dict[str, dict]:
+    """Returns the current counters of every registered provider."""
+    return {name: provider() for name, provider in _providers.items()}
@@ -1 +1,7 @@
 from .user import User
+from .archive import UserArchive
+from .job import Job
+from .tombstone import UserTombstone
+from .identity import UserIdentity
+from .stats import UserStat
+from .idempotency import IdempotencyKey
@@ -0,0 +1,40 @@
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import String, DateTime, Boolean, Enum
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import mapped_column, Mapped
+from app.db import Base
+from app.models.user import UserRole
+
+
+class UserArchive(Base):
+    """
+    Cold storage for users that have been inactive for a long time.
+
+    Mirrors every column of ``users`` so rows can be moved back and forth
+    without transformation, plus the moment the row was archived. Keeping these
+    rows out of ``users`` keeps the hot table and its indexes small.
+
+    Attributes:
+    - archived_at (datetime): Timestamp when the user was archived (UTC).
+    """
+
+    __tablename__ = "users_archive"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, nullable=False
+    )
+    username: Mapped[str] = mapped_column(String(50), nullable=False)
+    email: Mapped[str] = mapped_column(String(100), nullable=False)
+    first_name: Mapped[str] = mapped_column(String(50), nullable=False)
+    last_name: Mapped[str] = mapped_column(String(50), nullable=False)
+    role: Mapped[UserRole] = mapped_column(
+        Enum(UserRole, name="userrole_enum"), nullable=False
+    )
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    active: Mapped[bool] = mapped_column(Boolean, nullable=False)
+    archived_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.now(timezone.utc), nullable=False
+    )
@@ -0,0 +1,28 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, LargeBinary, String
+from sqlalchemy.orm import mapped_column, Mapped
+from app.db import Base
+
+
+class IdempotencyKey(Base):
+    """
+    Outcome of a write sent with an ``Idempotency-Key`` header, shared by
+    every instance so a retry is answered with the first response.
+
+    Attributes:
+    - key (str): Idempotency key sent by the client.
+    - fingerprint (str): Hash of the method, path and body of the request.
+    - status_code (int): Stored response status, NULL while the request runs.
+    - response (bytes): Stored response body.
+    - expires_at (datetime): When the row may be dropped (UTC). While the
+      request runs, a crashed instance's claim is taken over after it.
+    """
+
+    __tablename__ = "idempotency_keys"
+
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    fingerprint: Mapped[str] = mapped_column(String(64), nullable=False)
+    status_code: Mapped[int] = mapped_column(Integer, nullable=True)
+    response: Mapped[bytes] = mapped_column(LargeBinary, nullable=True)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
@@ -0,0 +1,27 @@
+import uuid
+
+from sqlalchemy import String
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import mapped_column, Mapped
+from app.db import Base
+
+
+class UserIdentity(Base):
+    """
+    Global registry of usernames and emails, used when users are sharded.
+
+    Each shard can only enforce uniqueness of its own rows, so every username
+    and email is also claimed here, in the directory shard, in the same
+    session as the user write.
+
+    Attributes:
+    - kind (str): 'username' or 'email'.
+    - value (str): Lowercased username or email.
+    - user_id (UUID): Owner of the value.
+    """
+
+    __tablename__ = "user_identities"
+
+    kind: Mapped[str] = mapped_column(String(10), primary_key=True)
+    value: Mapped[str] = mapped_column(String(100), primary_key=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
@@ -0,0 +1,64 @@
+import enum
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import String, DateTime, Enum, Integer, JSON, Text, Index
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import mapped_column, Mapped
+from app.db import Base
+
+
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class Job(Base):
+    """
+    Background job record. The ``jobs`` table doubles as the work queue.
+
+    Attributes:
+    - id (UUID): Unique identifier for the job.
+    - kind (str): Job type, e.g. 'users.import', 'users.deactivate', 'users.export'.
+    - status (JobStatus): Current state of the job.
+    - payload (dict): Job input.
+    - total (int): Number of items to process, when known.
+    - processed (int): Number of items committed so far.
+    - checkpoint (dict): Resume position, committed together with each chunk.
+    - result (dict): Job output summary (counts, errors, file paths).
+    - error (str): Failure reason for failed jobs.
+    - created_at / started_at / finished_at / updated_at (datetime): Timestamps (UTC).
+      ``updated_at`` is refreshed on every chunk and acts as a heartbeat.
+    """
+
+    __tablename__ = "jobs"
+    __table_args__ = (Index("ix_jobs_status_created_at", "status", "created_at"),)
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, nullable=False
+    )
+    kind: Mapped[str] = mapped_column(String(50), nullable=False)
+    status: Mapped[JobStatus] = mapped_column(
+        Enum(JobStatus, name="jobstatus_enum"),
+        default=JobStatus.QUEUED,
+        nullable=False,
+    )
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False)
+    total: Mapped[int] = mapped_column(Integer, nullable=True)
+    processed: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    checkpoint: Mapped[dict] = mapped_column(JSON, nullable=True)
+    result: Mapped[dict] = mapped_column(JSON, nullable=True)
+    error: Mapped[str] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.now(timezone.utc), nullable=False
+    )
+    started_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
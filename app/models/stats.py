@@ -0,0 +1,26 @@
+from sqlalchemy import Integer, String
+from sqlalchemy.orm import mapped_column, Mapped
+from app.db import Base
+
+
+class UserStat(Base):
+    """
+    Incrementally maintained user counters, e.g. users per role.
+
+    Each counter is split into slots: writers add their delta to a random slot,
+    so concurrent transactions rarely wait on the same row, and readers sum the
+    slots.
+
+    Attributes:
+    - dimension (str): What is counted: 'role', 'status' or 'signup_day'.
+    - key (str): Value of the dimension, e.g. 'admin', 'active', '2026-10-19'.
+    - slot (int): Slot of the counter.
+    - count (int): Partial count held by the slot.
+    """
+
+    __tablename__ = "user_stats"
+
+    dimension: Mapped[str] = mapped_column(String(20), primary_key=True)
+    key: Mapped[str] = mapped_column(String(50), primary_key=True)
+    slot: Mapped[int] = mapped_column(Integer, primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
@@ -0,0 +1,29 @@
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import DateTime, Index
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import mapped_column, Mapped
+from app.db import Base
+
+
+class UserTombstone(Base):
+    """
+    Record of a deleted user, so incremental sync clients can apply deletes.
+
+    Attributes:
+    - user_id (UUID): UUID from the deleted user.
+    - deleted_at (datetime): Timestamp when the user was deleted (UTC).
+    """
+
+    __tablename__ = "user_tombstones"
+    __table_args__ = (
+        Index("ix_user_tombstones_deleted_at_user_id", "deleted_at", "user_id"),
+    )
+
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, nullable=False
+    )
+    deleted_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.now(timezone.utc), nullable=False
+    )
@@ -2,10 +2,11 @@ import enum
 import uuid
 from datetime import datetime, timezone
 
-from sqlalchemy import String, DateTime, Boolean, Enum
+from sqlalchemy import String, DateTime, Boolean, Enum, Index, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import mapped_column, Mapped
 from app.db import Base
+from app.db.ids import new_user_id
 
 
 class UserRole(str, enum.Enum):
@@ -19,9 +20,10 @@ class User(Base):
     User model representing a user record in the database.
 
     Attributes:
-    - id (UUID): Unique identifier for the user, generated automatically.
-    - username (str): Unique username for login and identification.
-    - email (str): Unique email address of the user.
+    - id (UUID): Unique identifier for the user, generated automatically
+      (UUIDv4, or time-ordered UUIDv7 when USER_ID_VERSION=7).
+    - username (str): Unique (case-insensitive) username for login and identification.
+    - email (str): Unique (case-insensitive) email address of the user.
     - first_name (str): User's first name.
     - last_name (str): User's last name.
     - role (str): User role, e.g. 'admin', 'user', 'guest'.
@@ -35,18 +37,12 @@ class User(Base):
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
         primary_key=True,
-        default=uuid.uuid4,
-        unique=True,
+        default=new_user_id,
         nullable=False,
-        index=True,
         doc="Unique UUID identifier for the user",
     )
-    username: Mapped[str] = mapped_column(
-        String(50), unique=True, nullable=False, index=True
-    )
-    email: Mapped[str] = mapped_column(
-        String(100), unique=True, nullable=False, index=True
-    )
+    username: Mapped[str] = mapped_column(String(50), nullable=False)
+    email: Mapped[str] = mapped_column(String(100), nullable=False)
     first_name: Mapped[str] = mapped_column(String(50), nullable=False)
     last_name: Mapped[str] = mapped_column(String(50), nullable=False)
     role: Mapped[UserRole] = mapped_column(
@@ -64,3 +60,15 @@ class User(Base):
         nullable=False,
     )
     active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
+
+
+# Mapped columns of User, for ORM-enabled selects returning plain rows.
+USER_COLUMNS = tuple(getattr(User, column.name) for column in User.__table__.columns)
+
+# Uniqueness is enforced case-insensitively; these indexes also back lookups
+# and duplicate checks made on lower(username) / lower(email).
+Index("ix_users_username_lower", func.lower(User.username), unique=True)
+Index("ix_users_email_lower", func.lower(User.email), unique=True)
+
+# Keyset order for incremental sync (GET /users/changes).
+Index("ix_users_updated_at_id", User.updated_at, User.id)
@@ -0,0 +1,271 @@
+import asyncio
+import cProfile
+import functools
+import hmac
+import json
+import logging
+import os
+import pstats
+import random
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, List, Optional, Tuple, TypeVar
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.db.ids import uuid7
+
+logger = logging.getLogger(__name__)
+
+# Requests sending this value in the X-Profile-Token header are profiled.
+# Unset disables header-triggered profiling.
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN")
+# Fraction of all requests profiled without a token (0 disables sampling).
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+PROFILING_DIR = os.getenv(
+    "PROFILING_DIR", os.path.join(tempfile.gettempdir(), "profiles")
+)
+# Profiles kept in PROFILING_DIR; the oldest are deleted beyond it.
+PROFILING_MAX_PROFILES = int(os.getenv("PROFILING_MAX_PROFILES", "100"))
+
+TOKEN_HEADER = "X-Profile-Token"
+ID_HEADER = "X-Profile-Id"
+
+_current: ContextVar[Optional["RequestProfile"]] = ContextVar(
+    "request_profile", default=None
+)
+_sql_timing_lock = threading.Lock()
+_sql_timing_installed = False
+# Held by the request being profiled: one at a time, so profilers of
+# concurrent requests do not clobber each other.
+_active = threading.Lock()
+
+T = TypeVar("T")
+
+
+class RequestProfile:
+    """
+    Profile of a single request: cProfile data of the endpoint and the time
+    spent in every SQL statement it ran.
+
+    The profile travels in a context variable, so work the request hands to
+    the threadpool (sync endpoints, functions wrapped with ``profiled_call``)
+    is attributed to it. The event loop thread is never profiled: it runs
+    the tasks of every other request too.
+    """
+
+    def __init__(self, method: str, path: str):
+        # Time-ordered, so the oldest profiles sort first.
+        self.id = uuid7().hex
+        self.method = method
+        self.path = path
+        self.started = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.queries: List[Tuple[str, float]] = []
+        self._profiles: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def profiling(self):
+        """Profiles the calling thread for the duration of the block."""
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+ allows a single active profiler per process; the
+            # request's other threads are profiled already.
+            yield
+            return
+        try:
+            yield
+        finally:
+            profile.disable()
+            with self._lock:
+                self._profiles.append(profile)
+
+    def record_query(self, statement: str, seconds: float) -> None:
+        with self._lock:
+            self.queries.append((statement, seconds))
+
+    def finish(self) -> None:
+        self.duration = time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        """Returns the ``Server-Timing`` header value for the request."""
+        sql = sum(seconds for _, seconds in self.queries)
+        return (
+            f"app;dur={self.duration * 1000:.2f}, "
+            f'sql;dur={sql * 1000:.2f};desc="{len(self.queries)} queries"'
+        )
+
+    def save(self, directory: str) -> str:
+        """
+        Writes the profile to ``directory``.
+
+        ``<id>.prof`` holds the pstats data (open it with snakeviz, or turn
+        it into a flamegraph with flameprof or gprof2dot) and ``<id>.json``
+        the request summary and SQL timings.
+
+        Args:
+            directory (str): Output directory, created if missing.
+
+        Returns:
+            str: Path of the ``.prof`` file.
+        """
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, self.id)
+        if self._profiles:
+            stats = pstats.Stats(self._profiles[0])
+            for profile in self._profiles[1:]:
+                stats.add(profile)
+            stats.dump_stats(f"{base}.prof")
+        summary = {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "duration_ms": round(self.duration * 1000, 3),
+            "queries": [
+                {"statement": statement, "duration_ms": round(seconds * 1000, 3)}
+                for statement, seconds in self.queries
+            ],
+        }
+        with open(f"{base}.json", "w") as fh:
+            json.dump(summary, fh, indent=2)
+        return f"{base}.prof"
+
+
+def _rotate(directory: str, keep: int) -> None:
+    """Deletes the files of all but the ``keep`` most recent profiles."""
+    profile_ids = sorted(
+        (
+            name[: -len(".json")]
+            for name in os.listdir(directory)
+            if name.endswith(".json")
+        ),
+        reverse=True,
+    )
+    for profile_id in profile_ids[keep:]:
+        for extension in (".json", ".prof"):
+            try:
+                os.remove(os.path.join(directory, profile_id + extension))
+            except FileNotFoundError:
+                pass
+
+
+def _save(profile: RequestProfile) -> str:
+    path = profile.save(PROFILING_DIR)
+    _rotate(PROFILING_DIR, PROFILING_MAX_PROFILES)
+    return path
+
+
+def should_profile(request: Request) -> bool:
+    """Profiles requests with a valid token, or a random sample of them."""
+    token = request.headers.get(TOKEN_HEADER)
+    if token is not None and PROFILING_TOKEN:
+        return hmac.compare_digest(token, PROFILING_TOKEN)
+    return PROFILING_SAMPLE_RATE > 0 and random.random() < PROFILING_SAMPLE_RATE
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, many):
+    if _current.get() is not None:
+        conn.info.setdefault("profile_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, many):
+    profile = _current.get()
+    if profile is not None and conn.info.get("profile_query_start"):
+        started = conn.info["profile_query_start"].pop()
+        profile.record_query(statement, time.perf_counter() - started)
+
+
+def _install_sql_timing() -> None:
+    """Listens to every engine, once the first request is profiled."""
+    global _sql_timing_installed
+    with _sql_timing_lock:
+        if not _sql_timing_installed:
+            event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+            _sql_timing_installed = True
+
+
+def profiled_call(fn: Callable[..., T]) -> Callable[..., T]:
+    """
+    Wraps a blocking function so the thread running it is profiled when its
+    request is. Coroutine endpoints pass the work they hand to worker
+    threads through it; that work is all their profile shows.
+    """
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        profile = _current.get()
+        if profile is None:
+            return fn(*args, **kwargs)
+        with profile.profiling():
+            return fn(*args, **kwargs)
+
+    return wrapper
+
+
+def _profiled(endpoint: Callable) -> Callable:
+    """Wraps a sync endpoint so it is profiled when its request is."""
+    if asyncio.iscoroutinefunction(endpoint):
+        return endpoint
+    return profiled_call(endpoint)
+
+
+class ProfiledRoute(APIRoute):
+    """
+    Route class enabling opt-in profiling of individual requests.
+
+    Profiled requests get a ``Server-Timing`` header with the total and SQL
+    time, and an ``X-Profile-Id`` header naming the files saved in
+    ``PROFILING_DIR``. Other requests only pay for a context variable lookup.
+    A request arriving while another one is profiled is served unprofiled.
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        super().__init__(path, _profiled(endpoint), **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def profiled_handler(request: Request) -> Response:
+            if not should_profile(request):
+                return await handler(request)
+            if not _active.acquire(blocking=False):
+                logger.info(
+                    f"Not profiling {request.method} {request.url.path}: "
+                    "another request is being profiled"
+                )
+                return await handler(request)
+
+            try:
+                _install_sql_timing()
+                profile = RequestProfile(request.method, request.url.path)
+                token = _current.set(profile)
+                try:
+                    response = await handler(request)
+                finally:
+                    _current.reset(token)
+                    profile.finish()
+            finally:
+                _active.release()
+
+            response.headers["Server-Timing"] = profile.server_timing()
+            response.headers[ID_HEADER] = profile.id
+            try:
+                path = await asyncio.to_thread(_save, profile)
+                logger.info(
+                    f"Saved profile of {request.method} {profile.path} to {path}"
+                )
+            except OSError:
+                logger.exception(f"Could not save profile {profile.id}")
+            return response
+
+        return profiled_handler
@@ -0,0 +1,70 @@
+from typing import Any, Dict, List, Literal, Optional
+from datetime import datetime, timezone
+from pydantic import BaseModel, Field, computed_field
+from uuid import UUID
+
+from app.models.job import JobStatus
+
+
+class UserImportJobIn(BaseModel):
+    """
+    Body of a bulk user import job.
+    Items are validated by the job itself, so invalid items only fail individually.
+    """
+
+    users: List[Dict[str, Any]] = Field(min_length=1)
+
+
+class UserDeactivateJobIn(BaseModel):
+    """
+    Body of a bulk user deactivation job.
+    """
+
+    ids: List[UUID] = Field(min_length=1)
+
+
+class UserExportJobIn(BaseModel):
+    """
+    Body of a user export job. Users are written as JSON lines.
+    """
+
+    format: Literal["jsonl"] = "jsonl"
+
+
+class JobOut(BaseModel):
+    """
+    Represents the status of a background job, including progress and throughput.
+    """
+
+    id: UUID
+    kind: str
+    status: JobStatus
+    total: Optional[int]
+    processed: int
+    result: Optional[Dict[str, Any]]
+    error: Optional[str]
+    created_at: datetime
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+
+    model_config = {"from_attributes": True}
+
+    @computed_field
+    @property
+    def progress(self) -> Optional[float]:
+        """Fraction of items processed, when the total is known."""
+        if not self.total:
+            return None
+        return round(self.processed / self.total, 4)
+
+    @computed_field
+    @property
+    def items_per_second(self) -> Optional[float]:
+        """Average throughput since the job started."""
+        if self.started_at is None:
+            return None
+        end = self.finished_at or datetime.now(timezone.utc).replace(tzinfo=None)
+        elapsed = (end - self.started_at.replace(tzinfo=None)).total_seconds()
+        if elapsed <= 0:
+            return None
+        return round(self.processed / elapsed, 2)
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 from pydantic import BaseModel, EmailStr, constr
 from uuid import UUID
@@ -70,3 +70,54 @@ class UserOut(UserBase):
     active: bool
 
     model_config = {"from_attributes": True}
+
+
+class UserTombstoneOut(BaseModel):
+    """
+    Represents a deleted user in the incremental sync feed.
+    """
+
+    id: UUID
+    deleted_at: datetime
+
+
+class UserChangesOut(BaseModel):
+    """
+    Represents a page of the incremental sync feed.
+    Pass ``next_cursor`` as ``since`` to fetch the following changes.
+    """
+
+    items: List[UserOut]
+    deleted: List[UserTombstoneOut]
+    next_cursor: Optional[str]
+    has_more: bool
+
+
+class UserSignupsOut(BaseModel):
+    """
+    Represents the number of users created on a day.
+    """
+
+    day: str
+    count: int
+
+
+class UserStatsOut(BaseModel):
+    """
+    Represents the user statistics dashboard.
+    """
+
+    total: int
+    by_role: Dict[str, int]
+    by_status: Dict[str, int]
+    signups_per_day: List[UserSignupsOut]
+
+
+class UserAvailabilityOut(BaseModel):
+    """
+    Represents whether a username and/or email can be registered.
+    Fields are null when they were not asked for.
+    """
+
+    username: Optional[bool] = None
+    email: Optional[bool] = None
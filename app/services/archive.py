@@ -0,0 +1,176 @@
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import Row, delete, insert, literal, select
+from sqlalchemy.exc import IntegrityError, NoResultFound
+from sqlalchemy.orm import Session
+
+from app.models import User, UserArchive
+from app.services import membership
+from app.services.exceptions import DuplicateUserError
+from app.services.page_cache import user_pages
+
+logger = logging.getLogger(__name__)
+
+# Inactive users not updated for this many days are archived (0 or unset
+# disables the archive task).
+USER_ARCHIVE_AFTER_DAYS = float(os.getenv("USER_ARCHIVE_AFTER_DAYS") or "0")
+USER_ARCHIVE_INTERVAL_SECONDS = float(
+    os.getenv("USER_ARCHIVE_INTERVAL_SECONDS", "3600")
+)
+USER_ARCHIVE_BATCH_SIZE = int(os.getenv("USER_ARCHIVE_BATCH_SIZE", "500"))
+
+USER_COLUMNS = [column.name for column in User.__table__.columns]
+
+
+def archive_inactive_users(
+    db: Session, older_than: timedelta, batch_size: int = USER_ARCHIVE_BATCH_SIZE
+) -> int:
+    """
+    Moves inactive users not updated within ``older_than`` to ``users_archive``.
+
+    Rows are moved in batches, each in its own short transaction, so the job
+    never holds locks on a large part of the table. On PostgreSQL the batch is
+    claimed with ``FOR UPDATE SKIP LOCKED`` so it neither blocks nor waits on
+    concurrent writers, and several instances can run the job at once.
+
+    Args:
+        db (Session): Database session.
+        older_than (timedelta): Minimum time since the last update.
+        batch_size (int): Maximum number of users moved per transaction.
+
+    Returns:
+        int: Number of users archived.
+    """
+    cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - older_than
+    archived = 0
+    while True:
+        ids = (
+            db.execute(
+                select(User.id)
+                .where(User.active.is_(False), User.updated_at < cutoff)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            .scalars()
+            .all()
+        )
+        if not ids:
+            break
+
+        now = datetime.now(timezone.utc)
+        db.execute(
+            insert(UserArchive).from_select(
+                USER_COLUMNS + ["archived_at"],
+                select(
+                    *[User.__table__.c[name] for name in USER_COLUMNS],
+                    literal(now, UserArchive.archived_at.type),
+                ).where(User.id.in_(ids)),
+            )
+        )
+        db.execute(delete(User).where(User.id.in_(ids)))
+        user_pages.invalidate_on_commit(db)
+        db.commit()
+        archived += len(ids)
+        if len(ids) < batch_size:
+            break
+
+    if archived:
+        logger.info(f"Archived {archived} inactive users")
+    return archived
+
+
+def get_archived_user(db: Session, user_id: UUID) -> Optional[UserArchive]:
+    """
+    Retrieves a user from the archive.
+
+    Args:
+        db (Session): Database session.
+        user_id (UUID): UUID from the archived user.
+
+    Returns:
+        Optional[UserArchive]: Archived user, or None if it is not archived.
+    """
+    return db.get(UserArchive, user_id)
+
+
+def get_archived_user_row(db: Session, user_id: UUID) -> Optional[Row]:
+    """
+    Retrieves an archived user as a read-only row with the ``User`` columns.
+
+    Args:
+        db (Session): Database session.
+        user_id (UUID): UUID from the archived user.
+
+    Returns:
+        Optional[Row]: Archived user, or None if it is not archived.
+    """
+    return db.execute(
+        select(*[getattr(UserArchive, name) for name in USER_COLUMNS]).where(
+            UserArchive.id == user_id
+        )
+    ).first()
+
+
+def move_to_hot(db: Session, archived: UserArchive) -> User:
+    """
+    Moves an archived user back into ``users`` without committing.
+
+    Args:
+        db (Session): Database session.
+        archived (UserArchive): Archived user to move.
+
+    Returns:
+        User: The user as stored in the hot table.
+    """
+    user = User(**{name: getattr(archived, name) for name in USER_COLUMNS})
+    db.delete(archived)
+    db.add(user)
+    db.flush()
+    user_pages.invalidate_on_commit(db)
+    membership.record_on_commit(db, user.username, user.email)
+    return user
+
+
+def restore_user(db: Session, user_id: UUID) -> User:
+    """
+    Restores an archived user into the hot table.
+
+    Args:
+        db (Session): Database session.
+        user_id (UUID): UUID from the archived user.
+
+    Raises:
+        NoResultFound: If the user is not archived.
+        DuplicateUserError: If the username or email address was taken meanwhile.
+
+    Returns:
+        User: Restored User object.
+    """
+    archived = get_archived_user(db, user_id)
+    if archived is None:
+        raise NoResultFound("Archived user not found")
+    try:
+        user = move_to_hot(db, archived)
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise DuplicateUserError("Username or email already exists")
+    db.refresh(user)
+    return user
+
+
+def run_archive_job() -> int:
+    """Entry point for the periodic archive task, using its own session."""
+    from app.db.database import SessionLocal
+
+    if USER_ARCHIVE_AFTER_DAYS <= 0:
+        return 0
+    db = SessionLocal()
+    try:
+        return archive_inactive_users(db, timedelta(days=USER_ARCHIVE_AFTER_DAYS))
+    finally:
+        db.close()
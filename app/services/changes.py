@@ -0,0 +1,206 @@
+import base64
+import binascii
+import heapq
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import and_, delete, or_, select
+from sqlalchemy.orm import Session
+
+from app.models import User, UserTombstone
+from app.models.user import USER_COLUMNS
+from app.schemas.user import UserChangesOut, UserOut, UserTombstoneOut
+
+logger = logging.getLogger(__name__)
+
+# Changes newer than this are held back until the next poll, so a transaction
+# that stamped its rows earlier but commits later is never skipped.
+USER_SYNC_SAFETY_LAG_SECONDS = float(os.getenv("USER_SYNC_SAFETY_LAG_SECONDS", "2"))
+# How long tombstones of deleted users are kept (0 keeps them forever).
+# Cursors issued longer ago are rejected: deletes after them may be purged.
+USER_TOMBSTONE_RETENTION_DAYS = float(os.getenv("USER_TOMBSTONE_RETENTION_DAYS", "30"))
+USER_TOMBSTONE_PURGE_INTERVAL_SECONDS = float(
+    os.getenv("USER_TOMBSTONE_PURGE_INTERVAL_SECONDS", "3600")
+)
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a sync cursor cannot be decoded."""
+
+    pass
+
+
+class ExpiredCursorError(InvalidCursorError):
+    """Raised when a sync cursor was issued before the tombstone retention."""
+
+    pass
+
+
+def encode_cursor(changed_at: datetime, user_id: UUID, issued_at: datetime) -> str:
+    """
+    Encodes a feed position, and when it was handed out, as an opaque,
+    URL-safe cursor.
+    """
+    raw = f"{changed_at.isoformat()}|{user_id}|{issued_at.isoformat()}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID, datetime]:
+    """
+    Decodes a cursor produced by ``encode_cursor``. Cursors handed out
+    before the issue time was recorded count as issued at their position.
+
+    Raises:
+        InvalidCursorError: If the cursor is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        parts = raw.split("|")
+        if len(parts) == 2:
+            parts.append(parts[0])
+        changed_at, user_id, issued_at = parts
+        return (
+            datetime.fromisoformat(changed_at),
+            UUID(user_id),
+            datetime.fromisoformat(issued_at),
+        )
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise InvalidCursorError("Invalid sync cursor") from e
+
+
+def _retention_cutoff() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(
+        days=USER_TOMBSTONE_RETENTION_DAYS
+    )
+
+
+def _after(changed_at_column, id_column, position: Optional[Tuple[datetime, UUID]]):
+    if position is None:
+        return True
+    changed_at, user_id = position
+    return or_(
+        changed_at_column > changed_at,
+        and_(changed_at_column == changed_at, id_column > user_id),
+    )
+
+
+def get_user_changes(db: Session, since: Optional[str], limit: int) -> UserChangesOut:
+    """
+    Retrieves users created, updated or deleted after a cursor.
+
+    Users and tombstones are read in ``(timestamp, id)`` keyset order through
+    their indexes and merged, so the cost depends on the number of changes,
+    not on the size of the table.
+
+    Args:
+        db (Session): Database session.
+        since (Optional[str]): Cursor from a previous page; None starts from
+            the beginning (full initial sync).
+        limit (int): Maximum number of changes in the page.
+
+    Raises:
+        InvalidCursorError: If the cursor is malformed.
+        ExpiredCursorError: If the cursor was issued before the tombstone
+            retention; the client must start a full sync again.
+
+    Returns:
+        UserChangesOut: Changed users, deleted users and the next cursor.
+    """
+    position = None
+    if since:
+        changed_at, user_id, issued_at = decode_cursor(since)
+        # Only the issue time tells whether deletes may have been purged
+        # since: the position is as old as the rows it stopped at.
+        if USER_TOMBSTONE_RETENTION_DAYS > 0 and issued_at < _retention_cutoff():
+            raise ExpiredCursorError(
+                "Sync cursor is older than the tombstone retention; start a full sync"
+            )
+        position = (changed_at, user_id)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    horizon = now - timedelta(seconds=USER_SYNC_SAFETY_LAG_SECONDS)
+
+    users = db.execute(
+        select(*USER_COLUMNS)
+        .where(_after(User.updated_at, User.id, position), User.updated_at <= horizon)
+        .order_by(User.updated_at, User.id)
+        .limit(limit + 1)
+    ).all()
+    tombstones = db.execute(
+        select(UserTombstone)
+        .where(
+            _after(UserTombstone.deleted_at, UserTombstone.user_id, position),
+            UserTombstone.deleted_at <= horizon,
+        )
+        .order_by(UserTombstone.deleted_at, UserTombstone.user_id)
+        .limit(limit + 1)
+    ).scalars()
+
+    # With sharding each query returns one ordered run per shard.
+    users = sorted(users, key=lambda row: (row.updated_at, row.id))
+    tombstones = sorted(tombstones, key=lambda t: (t.deleted_at, t.user_id))
+    changes = heapq.merge(
+        ((row.updated_at, row.id, row) for row in users),
+        ((t.deleted_at, t.user_id, t) for t in tombstones),
+        key=lambda change: change[:2],
+    )
+    page = []
+    for change in changes:
+        page.append(change)
+        if len(page) > limit:
+            break
+    has_more = len(page) > limit
+    page = page[:limit]
+
+    items, deleted = [], []
+    for _, _, change in page:
+        if isinstance(change, UserTombstone):
+            deleted.append(
+                UserTombstoneOut(id=change.user_id, deleted_at=change.deleted_at)
+            )
+        else:
+            items.append(UserOut.model_validate(change))
+
+    # An empty page hands the same position back with a fresh issue time, so
+    # a mirror polling a quiet feed keeps a valid cursor.
+    if page:
+        next_cursor = encode_cursor(*page[-1][:2], now)
+    elif position is not None:
+        next_cursor = encode_cursor(*position, now)
+    else:
+        next_cursor = None
+    return UserChangesOut(
+        items=items, deleted=deleted, next_cursor=next_cursor, has_more=has_more
+    )
+
+
+def purge_tombstones(db: Session) -> int:
+    """
+    Deletes tombstones older than ``USER_TOMBSTONE_RETENTION_DAYS``.
+
+    Args:
+        db (Session): Database session.
+
+    Returns:
+        int: Number of tombstones deleted.
+    """
+    deleted = db.execute(
+        delete(UserTombstone).where(UserTombstone.deleted_at < _retention_cutoff())
+    ).rowcount
+    db.commit()
+    if deleted:
+        logger.info(f"Purged {deleted} user tombstones")
+    return deleted
+
+
+def run_purge_job() -> int:
+    """Entry point for the periodic tombstone purge, using its own session."""
+    from app.db.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return purge_tombstones(db)
+    finally:
+        db.close()
@@ -0,0 +1,246 @@
+import asyncio
+import json
+import logging
+import os
+import select
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import List
+
+from sqlalchemy import func
+from sqlalchemy import select as sql_select
+from sqlalchemy.orm import Session
+
+from app import metrics
+from app.db.hooks import on_commit
+
+logger = logging.getLogger(__name__)
+
+USER_EVENTS_BUFFER_SIZE = int(os.getenv("USER_EVENTS_BUFFER_SIZE", "256"))
+USER_EVENTS_HEARTBEAT_SECONDS = float(os.getenv("USER_EVENTS_HEARTBEAT_SECONDS", "15"))
+USER_EVENTS_NOTIFY = os.getenv("USER_EVENTS_NOTIFY", "false").lower() == "true"
+USER_EVENTS_CHANNEL = os.getenv("USER_EVENTS_CHANNEL", "user_events")
+
+USER_CREATED = "user.created"
+USER_UPDATED = "user.updated"
+USER_DELETED = "user.deleted"
+
+
+class Subscriber:
+    """
+    A consumer of the event bus with a bounded buffer.
+
+    When the consumer falls behind, the oldest events are dropped and counted
+    so it can tell its client to resynchronize instead of blocking publishers.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, buffer_size: int):
+        self.loop = loop
+        self.buffer = deque(maxlen=buffer_size)
+        self.dropped = 0
+        self._ready = asyncio.Event()
+
+    def push(self, frame: str) -> None:
+        """Called from any thread."""
+        if len(self.buffer) == self.buffer.maxlen:
+            self.dropped += 1
+        self.buffer.append(frame)
+        self.loop.call_soon_threadsafe(self._ready.set)
+
+    async def get(self, timeout: float) -> List[str]:
+        """
+        Waits up to ``timeout`` seconds for events and returns all buffered ones.
+
+        Returns:
+            List[str]: Pending frames; empty if the timeout elapsed.
+        """
+        deadline = self.loop.time() + timeout
+        while not self.buffer:
+            remaining = deadline - self.loop.time()
+            if remaining <= 0:
+                return []
+            try:
+                await asyncio.wait_for(self._ready.wait(), remaining)
+            except asyncio.TimeoutError:
+                return []
+            self._ready.clear()
+        frames = []
+        while self.buffer:
+            frames.append(self.buffer.popleft())
+        return frames
+
+
+class EventBus:
+    """
+    In-process fan-out of user change events to SSE subscribers.
+
+    Each event is encoded once as a server-sent event frame and the same
+    string is handed to every subscriber, so publishing costs one append per
+    subscriber regardless of the payload size.
+    """
+
+    def __init__(self, buffer_size: int = USER_EVENTS_BUFFER_SIZE):
+        self.buffer_size = buffer_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._sequence = 0
+        self.published = 0
+        metrics.register("user_events", self.stats)
+
+    def subscribe(self) -> Subscriber:
+        subscriber = Subscriber(asyncio.get_running_loop(), self.buffer_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, message: str) -> None:
+        """
+        Delivers an encoded event (as produced by ``encode_event``) to every
+        subscriber of this instance.
+        """
+        with self._lock:
+            self._sequence += 1
+            self.published += 1
+            frame = f"id: {self._sequence}\n{message}"
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber.push(frame)
+
+    def stats(self) -> dict:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        return {
+            "subscribers": len(subscribers),
+            "published": self.published,
+            "dropped": sum(subscriber.dropped for subscriber in subscribers),
+        }
+
+
+bus = EventBus()
+
+
+def encode_event(event_type: str, data: dict) -> str:
+    """Encodes an event as the ``event``/``data`` lines of an SSE frame."""
+    body = json.dumps(
+        {
+            "type": event_type,
+            "data": data,
+            "at": datetime.now(timezone.utc).isoformat(),
+        },
+        separators=(",", ":"),
+    )
+    return f"event: {event_type}\ndata: {body}\n\n"
+
+
+def emit(db: Session, event_type: str, data: dict) -> None:
+    """
+    Queues an event to be delivered when the session's transaction commits.
+
+    Events of rolled back transactions are discarded. With
+    ``USER_EVENTS_NOTIFY`` on PostgreSQL, the event is sent with
+    ``pg_notify`` inside the transaction instead, so every instance (this one
+    included) receives it through its LISTEN connection after commit.
+
+    Args:
+        db (Session): Session of the transaction producing the change.
+        event_type (str): One of USER_CREATED, USER_UPDATED, USER_DELETED.
+        data (dict): JSON serializable payload.
+    """
+    emit_many(db, event_type, [data])
+
+
+def emit_many(db: Session, event_type: str, items: List[dict]) -> None:
+    """
+    Queues one event per item, like ``emit``, for bulk writes.
+
+    With ``USER_EVENTS_NOTIFY`` the ``pg_notify`` calls are sent with a single
+    ``executemany``, which psycopg 3 pipelines into one round trip.
+
+    Args:
+        db (Session): Session of the transaction producing the changes.
+        event_type (str): One of USER_CREATED, USER_UPDATED, USER_DELETED.
+        items (List[dict]): JSON serializable payloads.
+    """
+    messages = [encode_event(event_type, data) for data in items]
+    if not messages:
+        return
+    if USER_EVENTS_NOTIFY and db.get_bind().dialect.name == "postgresql":
+        if len(messages) == 1:
+            db.execute(sql_select(func.pg_notify(USER_EVENTS_CHANNEL, messages[0])))
+            return
+        cursor = db.connection().connection.cursor()
+        try:
+            cursor.executemany(
+                "SELECT pg_notify(%s, %s)",
+                [(USER_EVENTS_CHANNEL, message) for message in messages],
+            )
+        finally:
+            cursor.close()
+        return
+
+    def publish() -> None:
+        for message in messages:
+            bus.publish(message)
+
+    on_commit(db, publish)
+
+
+class PgEventListener:
+    """
+    Receives events published by any instance through PostgreSQL
+    LISTEN/NOTIFY and hands them to the local bus.
+    """
+
+    def __init__(self, engine, channel: str = USER_EVENTS_CHANNEL):
+        self.engine = engine
+        self.channel = channel
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="user-events-listener", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self._listen()
+            except Exception:
+                logger.exception("User events listener failed, reconnecting")
+                self._stop.wait(1)
+
+    def _listen(self) -> None:
+        connection = self.engine.raw_connection()
+        try:
+            dbapi_connection = connection.driver_connection
+            dbapi_connection.autocommit = True
+            with dbapi_connection.cursor() as cursor:
+                cursor.execute(f'LISTEN "{self.channel}"')
+            logger.info(f"Listening for user events on {self.channel}")
+            while not self._stop.is_set():
+                if not hasattr(dbapi_connection, "poll"):
+                    # psycopg 3: notifications arrive through a generator.
+                    for notify in dbapi_connection.notifies(timeout=1.0):
+                        bus.publish(notify.payload)
+                    continue
+                if select.select([dbapi_connection], [], [], 1.0) == ([], [], []):
+                    continue
+                dbapi_connection.poll()
+                while dbapi_connection.notifies:
+                    bus.publish(dbapi_connection.notifies.pop(0).payload)
+        finally:
+            connection.invalidate()
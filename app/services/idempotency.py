@@ -0,0 +1,374 @@
+import abc
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional, Tuple
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app import metrics
+from app.db.sharding import DIRECTORY_SHARD
+from app.models import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+# Where outcomes of writes sent with an Idempotency-Key are kept: "memory"
+# (this instance only), "database" (shared by every instance) or "off".
+USER_IDEMPOTENCY_STORE = os.getenv("USER_IDEMPOTENCY_STORE", "memory").lower()
+# How long a key is remembered after its first request finished.
+USER_IDEMPOTENCY_TTL_SECONDS = float(os.getenv("USER_IDEMPOTENCY_TTL_SECONDS", "86400"))
+# Keys kept by the in-memory store; the least recently used are dropped first.
+USER_IDEMPOTENCY_MAX_KEYS = int(os.getenv("USER_IDEMPOTENCY_MAX_KEYS", "10000"))
+# How long a retry waits for the first request with its key to finish.
+USER_IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("USER_IDEMPOTENCY_WAIT_SECONDS", "30"))
+# How long the database store honours the claim of an unfinished request
+# before another instance may take it over (its instance may have died).
+USER_IDEMPOTENCY_CLAIM_TIMEOUT_SECONDS = float(
+    os.getenv("USER_IDEMPOTENCY_CLAIM_TIMEOUT_SECONDS", "300")
+)
+USER_IDEMPOTENCY_PURGE_INTERVAL_SECONDS = 3600
+# How often the database store checks whether another instance finished:
+# first after the minimum, then backing off up to the maximum.
+_POLL_MIN_SECONDS = 0.05
+_POLL_MAX_SECONDS = 1.0
+
+# Idempotency keys live in the directory shard when users are sharded.
+_DIRECTORY = {"shard_id": DIRECTORY_SHARD}
+
+
+class IdempotencyKeyReusedError(ValueError):
+    """Raised when a key is sent again with a different request."""
+
+    pass
+
+
+class IdempotencyKeyInProgressError(Exception):
+    """Raised when the first request with a key is still running after the wait."""
+
+    pass
+
+
+class _Entry:
+    """A key's request fingerprint and, once finished, its response."""
+
+    def __init__(self, fingerprint: str, expires_at: float):
+        self.fingerprint = fingerprint
+        self.status_code: Optional[int] = None
+        self.body: Optional[bytes] = None
+        self.expires_at = expires_at
+        self.done = threading.Event()
+
+
+def fingerprint(method: str, path: str, body: bytes) -> str:
+    """Hashes what makes two requests with the same key the same request."""
+    return hashlib.sha256(f"{method} {path}\n".encode() + body).hexdigest()
+
+
+class IdempotencyStore(abc.ABC):
+    """
+    Runs a write once per idempotency key and replays its response.
+
+    The first request with a key claims it and runs the write; retries with
+    the same key get the stored status and body without touching the users
+    table, and retries arriving while it runs wait for it. Responses with a
+    5xx status, and unexpected errors, are not stored: the claim is released
+    so the next retry runs the write again.
+
+    Subclasses decide where claims and responses are kept.
+    """
+
+    def __init__(self, name: str, ttl: float, wait: float):
+        self.ttl = ttl
+        self.wait = wait
+        self.executions = 0
+        self.replays = 0
+        self.waits = 0
+        self.conflicts = 0
+        metrics.register(name, self.stats)
+
+    @abc.abstractmethod
+    def claim(self, key: str, fingerprint: str) -> Tuple[bool, Optional[_Entry]]:
+        """
+        Claims ``key`` and returns True and the claimed entry, or False and
+        the entry of whoever holds it.
+        """
+
+    @abc.abstractmethod
+    def wait_for(self, key: str, entry: _Entry, timeout: float) -> None:
+        """Blocks until the request holding ``key`` may have finished."""
+
+    @abc.abstractmethod
+    def save(self, key: str, entry: _Entry, status_code: int, body: bytes) -> None:
+        """Stores the response of the request that claimed ``key`` as ``entry``."""
+
+    @abc.abstractmethod
+    def release(self, key: str, entry: _Entry) -> None:
+        """Gives up the claim on ``key`` so the next retry runs the write."""
+
+    def run(
+        self, key: str, fingerprint: str, write: Callable[[], Tuple[int, bytes]]
+    ) -> Tuple[int, bytes, bool]:
+        """
+        Runs ``write`` unless a request with ``key`` already did.
+
+        Args:
+            key (str): Idempotency key sent by the client.
+            fingerprint (str): Fingerprint of the request.
+            write (Callable[[], Tuple[int, bytes]]): Performs the write and
+                returns the response status and body.
+
+        Raises:
+            IdempotencyKeyReusedError: If the key was used for another request.
+            IdempotencyKeyInProgressError: If the first request with the key
+                did not finish in time.
+
+        Returns:
+            Tuple[int, bytes, bool]: Response status and body, and whether they
+            were replayed.
+        """
+        deadline = time.monotonic() + self.wait
+        waited = False
+        while True:
+            claimed, entry = self.claim(key, fingerprint)
+            if claimed:
+                break
+            if entry is None:
+                # The holder released the key between our checks; claim again.
+                continue
+            if entry.fingerprint != fingerprint:
+                self.conflicts += 1
+                raise IdempotencyKeyReusedError(
+                    "Idempotency-Key was already used with a different request"
+                )
+            if entry.status_code is not None:
+                self.replays += 1
+                return entry.status_code, entry.body, True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise IdempotencyKeyInProgressError(
+                    "A request with this Idempotency-Key is still in progress"
+                )
+            if not waited:
+                waited = True
+                self.waits += 1
+            self.wait_for(key, entry, remaining)
+
+        self.executions += 1
+        try:
+            status_code, body = write()
+        except BaseException:
+            self.release(key, entry)
+            raise
+        if status_code >= 500:
+            self.release(key, entry)
+        else:
+            self.save(key, entry, status_code, body)
+        return status_code, body, False
+
+    def stats(self) -> dict:
+        return {
+            "executions": self.executions,
+            "replays": self.replays,
+            "waits": self.waits,
+            "conflicts": self.conflicts,
+        }
+
+
+class MemoryIdempotencyStore(IdempotencyStore):
+    """
+    Keys kept in this process, in a bounded LRU. Retries must reach the same
+    instance to be deduplicated.
+
+    Only finished keys are evicted: a key whose request is still running
+    stays, even beyond ``max_keys``, so its retries keep waiting for it.
+    """
+
+    def __init__(self, max_keys: int, ttl: float, wait: float):
+        super().__init__("user_idempotency", ttl, wait)
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+
+    def claim(self, key: str, fingerprint: str) -> Tuple[bool, Optional[_Entry]]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (
+                entry.status_code is None or entry.expires_at > now
+            ):
+                self._entries.move_to_end(key)
+                return False, entry
+            entry = _Entry(fingerprint, now + self.ttl)
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._evict()
+            return True, entry
+
+    def _evict(self) -> None:
+        """Drops the least recently used finished keys beyond ``max_keys``."""
+        excess = len(self._entries) - self.max_keys
+        if excess <= 0:
+            return
+        evicted = []
+        for key, entry in self._entries.items():
+            if len(evicted) == excess:
+                break
+            if entry.status_code is not None:
+                evicted.append(key)
+        for key in evicted:
+            del self._entries[key]
+
+    def wait_for(self, key: str, entry: _Entry, timeout: float) -> None:
+        entry.done.wait(timeout)
+
+    def save(self, key: str, entry: _Entry, status_code: int, body: bytes) -> None:
+        with self._lock:
+            entry.body = body
+            entry.expires_at = time.monotonic() + self.ttl
+            entry.status_code = status_code
+        entry.done.set()
+
+    def release(self, key: str, entry: _Entry) -> None:
+        with self._lock:
+            if self._entries.get(key) is entry:
+                del self._entries[key]
+        entry.done.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = len(self._entries)
+        return {**super().stats(), "size": size}
+
+
+class DatabaseIdempotencyStore(IdempotencyStore):
+    """
+    Keys kept in the ``idempotency_keys`` table, so retries are deduplicated
+    whichever instance they reach. Claims and responses are committed in
+    their own short transactions, apart from the write itself.
+
+    A claim whose instance died is taken over after ``claim_timeout``.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        ttl: float,
+        wait: float,
+        claim_timeout: float,
+    ):
+        super().__init__("user_idempotency", ttl, wait)
+        self.session_factory = session_factory
+        self.claim_timeout = claim_timeout
+
+    def claim(self, key: str, fingerprint: str) -> Tuple[bool, Optional[_Entry]]:
+        table = IdempotencyKey.__table__
+        now = datetime.now(timezone.utc)
+        with self.session_factory() as db:
+            db.execute(
+                delete(table).where(table.c.key == key, table.c.expires_at <= now),
+                bind_arguments=_DIRECTORY,
+            )
+            dialect = db.connection(bind_arguments=_DIRECTORY).dialect.name
+            insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+            claimed = db.execute(
+                insert(table)
+                .values(
+                    key=key,
+                    fingerprint=fingerprint,
+                    expires_at=now + timedelta(seconds=self.claim_timeout),
+                )
+                .on_conflict_do_nothing(index_elements=["key"]),
+                bind_arguments=_DIRECTORY,
+            ).rowcount
+            row = None
+            if not claimed:
+                row = db.execute(
+                    select(
+                        table.c.fingerprint, table.c.status_code, table.c.response
+                    ).where(table.c.key == key),
+                    bind_arguments=_DIRECTORY,
+                ).first()
+            db.commit()
+        if claimed:
+            return True, _Entry(fingerprint, 0)
+        if row is None:
+            return False, None
+        entry = _Entry(row.fingerprint, 0)
+        entry.status_code = row.status_code
+        entry.body = row.response
+        return False, entry
+
+    def wait_for(self, key: str, entry: _Entry, timeout: float) -> None:
+        """
+        Polls with a read-only query, backing off, until the claim on ``key``
+        is finished, released or abandoned; only then is it claimed again.
+        """
+        table = IdempotencyKey.__table__
+        deadline = time.monotonic() + timeout
+        delay = _POLL_MIN_SECONDS
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, _POLL_MAX_SECONDS)
+            with self.session_factory() as db:
+                running = db.execute(
+                    select(table.c.key).where(
+                        table.c.key == key,
+                        table.c.status_code.is_(None),
+                        table.c.expires_at > datetime.now(timezone.utc),
+                    ),
+                    bind_arguments=_DIRECTORY,
+                ).first()
+            if running is None:
+                return
+
+    def save(self, key: str, entry: _Entry, status_code: int, body: bytes) -> None:
+        table = IdempotencyKey.__table__
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.ttl)
+        with self.session_factory() as db:
+            db.execute(
+                update(table)
+                .where(table.c.key == key, table.c.status_code.is_(None))
+                .values(status_code=status_code, response=body, expires_at=expires_at),
+                bind_arguments=_DIRECTORY,
+            )
+            db.commit()
+
+    def release(self, key: str, entry: _Entry) -> None:
+        table = IdempotencyKey.__table__
+        with self.session_factory() as db:
+            db.execute(
+                delete(table).where(table.c.key == key, table.c.status_code.is_(None)),
+                bind_arguments=_DIRECTORY,
+            )
+            db.commit()
+
+    def purge(self) -> int:
+        """Deletes expired keys and returns how many there were."""
+        table = IdempotencyKey.__table__
+        with self.session_factory() as db:
+            deleted = db.execute(
+                delete(table).where(table.c.expires_at <= datetime.now(timezone.utc)),
+                bind_arguments=_DIRECTORY,
+            ).rowcount
+            db.commit()
+        if deleted:
+            logger.info(f"Purged {deleted} expired idempotency keys")
+        return deleted
+
+
+store: Optional[IdempotencyStore] = None
+
+
+def run_purge_job() -> None:
+    """Entry point for the periodic purge of expired keys."""
+    if isinstance(store, DatabaseIdempotencyStore):
+        store.purge()
@@ -0,0 +1,91 @@
+from typing import List, Optional
+from uuid import UUID
+
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+
+from app.db.sharding import DIRECTORY_SHARD
+from app.models import UserIdentity
+
+USERNAME = "username"
+EMAIL = "email"
+
+
+def _identities(user_id: UUID, username: str, email: str) -> List[dict]:
+    return [
+        {"kind": USERNAME, "value": username.lower(), "user_id": user_id},
+        {"kind": EMAIL, "value": email.lower(), "user_id": user_id},
+    ]
+
+
+def claim(db: Session, rows: List[dict]) -> None:
+    """
+    Claims the usernames and emails of new users in the directory shard.
+
+    Runs in the caller's session, so a duplicate raises ``IntegrityError``
+    before anything is committed.
+
+    Args:
+        db (Session): Sharded database session.
+        rows (List[dict]): Users with ``id``, ``username`` and ``email``.
+    """
+    values = []
+    for row in rows:
+        values += _identities(row["id"], row["username"], row["email"])
+    db.execute(
+        insert(UserIdentity.__table__),
+        values,
+        bind_arguments={"shard_id": DIRECTORY_SHARD},
+    )
+
+
+def release(db: Session, username: Optional[str], email: Optional[str]) -> None:
+    """
+    Releases a username and/or email so they can be claimed again.
+
+    Args:
+        db (Session): Sharded database session.
+        username (Optional[str]): Username to release.
+        email (Optional[str]): Email to release.
+    """
+    for kind, value in ((USERNAME, username), (EMAIL, email)):
+        if value is not None:
+            db.execute(
+                delete(UserIdentity).where(
+                    UserIdentity.kind == kind, UserIdentity.value == value.lower()
+                ),
+                bind_arguments={"shard_id": DIRECTORY_SHARD},
+            )
+
+
+def transfer(
+    db: Session, user_id: UUID, old_username: str, old_email: str, user
+) -> None:
+    """
+    Moves the claims of a user whose username or email changed.
+
+    Args:
+        db (Session): Sharded database session.
+        user_id (UUID): UUID from the updated user.
+        old_username (str): Username before the update.
+        old_email (str): Email before the update.
+        user: Updated user.
+    """
+    released_username = (
+        old_username if old_username.lower() != user.username.lower() else None
+    )
+    released_email = old_email if old_email.lower() != user.email.lower() else None
+    release(db, released_username, released_email)
+
+    values = [
+        identity
+        for identity in _identities(user_id, user.username, user.email)
+        if (identity["kind"] == USERNAME and released_username)
+        or (identity["kind"] == EMAIL and released_email)
+    ]
+    if values:
+        db.execute(
+            insert(UserIdentity.__table__),
+            values,
+            bind_arguments={"shard_id": DIRECTORY_SHARD},
+        )
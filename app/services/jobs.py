@@ -0,0 +1,358 @@
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from pydantic import ValidationError
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import NoResultFound
+from sqlalchemy.orm import Session
+
+from app.models import Job, User
+from app.models.job import JobStatus
+from app.schemas.user import UserCreate, UserOut
+from app.services import user as service_user
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_PROCESS_WORKERS = int(os.getenv("JOB_PROCESS_WORKERS", "2"))
+JOB_CHUNK_SIZE = int(os.getenv("JOB_CHUNK_SIZE", "1000"))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "2"))
+JOB_STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", "300"))
+JOB_EXPORT_DIR = os.getenv("JOB_EXPORT_DIR", tempfile.gettempdir())
+
+MAX_REPORTED_ERRORS = 100
+
+IMPORT_USERS = "users.import"
+DEACTIVATE_USERS = "users.deactivate"
+EXPORT_USERS = "users.export"
+
+# Set by the application lifespan when background workers are enabled.
+runner: Optional["JobRunner"] = None
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def enqueue_job(
+    db: Session, kind: str, payload: dict, total: Optional[int] = None
+) -> Job:
+    """
+    Stores a new job in the queue and wakes up the local workers.
+
+    Args:
+        db (Session): Database session.
+        kind (str): Job type, one of the registered handlers.
+        payload (dict): JSON serializable job input.
+        total (Optional[int]): Number of items to process, when known.
+
+    Returns:
+        Job: The queued job.
+    """
+    job = Job(kind=kind, payload=payload, total=total, checkpoint={})
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    if runner is not None:
+        runner.wake()
+    return job
+
+
+def get_job(db: Session, job_id: UUID) -> Job:
+    """
+    Retrieves a job.
+
+    Args:
+        db (Session): Database session.
+        job_id (UUID): UUID from the job.
+
+    Raises:
+        NoResultFound: If the job is not found.
+
+    Returns:
+        Job: Job object.
+    """
+    job = db.get(Job, job_id)
+    if not job:
+        raise NoResultFound("Job not found")
+    return job
+
+
+def claim_next_job(db: Session) -> Optional[Job]:
+    """
+    Marks the oldest queued job as running and returns it.
+
+    ``FOR UPDATE SKIP LOCKED`` lets several workers (and instances) poll the
+    same table without waiting on each other; the conditional update makes the
+    claim safe on databases that ignore row locks as well.
+    """
+    job_id = db.execute(
+        select(Job.id)
+        .where(Job.status == JobStatus.QUEUED)
+        .order_by(Job.created_at)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    ).scalar_one_or_none()
+    if job_id is None:
+        db.rollback()
+        return None
+    claimed = db.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.status == JobStatus.QUEUED)
+        .values(
+            status=JobStatus.RUNNING,
+            started_at=func.coalesce(Job.started_at, _utcnow()),
+        )
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    if not claimed:
+        return None
+    return db.get(Job, job_id)
+
+
+def requeue_stale_jobs(db: Session, stale_after: float = JOB_STALE_SECONDS) -> int:
+    """
+    Puts back in the queue running jobs whose heartbeat stopped, e.g. because
+    the instance running them was shut down. They resume from their checkpoint.
+    """
+    cutoff = _utcnow() - timedelta(seconds=stale_after)
+    result = db.execute(
+        update(Job)
+        .where(Job.status == JobStatus.RUNNING, Job.updated_at < cutoff)
+        .values(status=JobStatus.QUEUED)
+    )
+    db.commit()
+    return result.rowcount
+
+
+def _save_progress(
+    db: Session, job: Job, processed: int, checkpoint: dict, result: dict
+) -> None:
+    """Commits the current chunk together with the position to resume from."""
+    job.processed = processed
+    job.checkpoint = checkpoint
+    job.result = dict(result)
+    db.commit()
+
+
+def validate_users(chunk: List[dict], start: int) -> Tuple[List[dict], List[dict]]:
+    """
+    Validates raw import items. Runs in a worker process for large imports.
+
+    Returns:
+        Tuple[List[dict], List[dict]]: Valid rows (with their ``position``) and
+        errors as ``{"index": ..., "error": ...}``.
+    """
+    valid, errors = [], []
+    for index, raw in enumerate(chunk, start):
+        try:
+            row = UserCreate.model_validate(raw).model_dump()
+        except ValidationError as e:
+            error = e.errors()[0]
+            location = ".".join(str(part) for part in error["loc"])
+            errors.append({"index": index, "error": f"{location}: {error['msg']}"})
+            continue
+        row["position"] = index
+        valid.append(row)
+    return valid, errors
+
+
+def _run_import(db: Session, job: Job, pool: Optional[ProcessPoolExecutor]) -> None:
+    users = job.payload["users"]
+    offset = (job.checkpoint or {}).get("offset", 0)
+    result = dict(job.result or {"created": 0, "failed": 0, "errors": []})
+    starts = list(range(offset, len(users), JOB_CHUNK_SIZE))
+    chunks = [users[start : start + JOB_CHUNK_SIZE] for start in starts]
+
+    # Validation of the following chunks runs in other processes while the
+    # current one is being written.
+    if pool is not None:
+        validated = pool.map(validate_users, chunks, starts)
+    else:
+        validated = map(validate_users, chunks, starts)
+
+    for start, chunk, (valid, errors) in zip(starts, chunks, validated):
+        positions = [row.pop("position") for row in valid]
+        duplicates = service_user.bulk_create_users(db, valid)
+        errors += [
+            {"index": positions[d], "error": "Username or email already exists"}
+            for d in duplicates
+        ]
+        result["created"] += len(valid) - len(duplicates)
+        result["failed"] += len(errors)
+        room = max(MAX_REPORTED_ERRORS - len(result["errors"]), 0)
+        errors.sort(key=lambda error: error["index"])
+        result["errors"] = result["errors"] + errors[:room]
+        _save_progress(
+            db, job, start + len(chunk), {"offset": start + len(chunk)}, result
+        )
+
+
+def _run_deactivate(db: Session, job: Job, pool: Optional[ProcessPoolExecutor]) -> None:
+    ids = job.payload["ids"]
+    offset = (job.checkpoint or {}).get("offset", 0)
+    result = dict(job.result or {"deactivated": 0})
+    for start in range(offset, len(ids), JOB_CHUNK_SIZE):
+        chunk = [UUID(value) for value in ids[start : start + JOB_CHUNK_SIZE]]
+        result["deactivated"] += service_user.bulk_deactivate_users(db, chunk)
+        _save_progress(
+            db, job, start + len(chunk), {"offset": start + len(chunk)}, result
+        )
+
+
+def _run_export(db: Session, job: Job, pool: Optional[ProcessPoolExecutor]) -> None:
+    if job.total is None:
+        # One count per shard when users are sharded.
+        job.total = sum(db.scalars(select(func.count()).select_from(User)))
+        db.commit()
+
+    path = os.path.join(JOB_EXPORT_DIR, f"users-{job.id}.jsonl")
+    after = (job.checkpoint or {}).get("after_id")
+    written = (job.checkpoint or {}).get("bytes", 0)
+    processed = job.processed
+    result = {"path": path}
+
+    with open(path, "ab") as fh:
+        # Drop anything written after the last committed checkpoint.
+        fh.truncate(written)
+        while True:
+            rows = service_user.get_users_after(
+                db, UUID(after) if after is not None else None, JOB_CHUNK_SIZE
+            )
+            if not rows:
+                break
+            data = b"".join(
+                UserOut.model_validate(row).model_dump_json().encode() + b"\n"
+                for row in rows
+            )
+            fh.write(data)
+            fh.flush()
+            os.fsync(fh.fileno())
+            written += len(data)
+            processed += len(rows)
+            after = str(rows[-1].id)
+            _save_progress(
+                db, job, processed, {"after_id": after, "bytes": written}, result
+            )
+
+
+HANDLERS: Dict[str, Callable[[Session, Job, Optional[ProcessPoolExecutor]], None]] = {
+    IMPORT_USERS: _run_import,
+    DEACTIVATE_USERS: _run_deactivate,
+    EXPORT_USERS: _run_export,
+}
+
+
+def process_job(
+    db: Session, job: Job, pool: Optional[ProcessPoolExecutor] = None
+) -> Job:
+    """
+    Runs a claimed job to completion, committing progress chunk by chunk.
+
+    Args:
+        db (Session): Database session.
+        job (Job): Job in running state.
+        pool (Optional[ProcessPoolExecutor]): Pool for CPU-bound steps. When
+            None, those steps run in the calling thread.
+
+    Returns:
+        Job: The finished job.
+    """
+    job_id = job.id
+    logger.info(f"Running job {job_id} ({job.kind})")
+    try:
+        HANDLERS[job.kind](db, job, pool)
+        job.status = JobStatus.SUCCEEDED
+    except Exception as e:
+        logger.exception(f"Job {job_id} failed")
+        db.rollback()
+        job = db.get(Job, job_id)
+        job.status = JobStatus.FAILED
+        job.error = str(e)
+    job.finished_at = _utcnow()
+    db.commit()
+    return job
+
+
+class JobRunner:
+    """
+    Bounded pool of worker threads consuming the ``jobs`` table.
+
+    Database-bound work runs on the threads; CPU-bound steps (parsing and
+    validating imports) are offloaded to a process pool. Workers sleep until
+    they are woken up by a local enqueue or the poll interval elapses, which
+    also picks up jobs queued by other instances.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        workers: int = JOB_WORKERS,
+        process_workers: int = JOB_PROCESS_WORKERS,
+    ):
+        self.session_factory = session_factory
+        self.workers = workers
+        self.process_workers = process_workers
+        self._pool = None
+        self._threads = []
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+
+    def start(self) -> None:
+        db = self.session_factory()
+        try:
+            requeued = requeue_stale_jobs(db)
+            if requeued:
+                logger.info(f"Requeued {requeued} interrupted jobs")
+        finally:
+            db.close()
+
+        if self.process_workers > 0:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.process_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        self._stop.clear()
+        for index in range(self.workers):
+            thread = threading.Thread(
+                target=self._work, name=f"job-worker-{index}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def wake(self) -> None:
+        self._wakeup.set()
+
+    def _work(self) -> None:
+        while not self._stop.is_set():
+            job = None
+            db = self.session_factory()
+            try:
+                job = claim_next_job(db)
+                if job is not None:
+                    process_job(db, job, self._pool)
+            except Exception:
+                logger.exception("Job worker iteration failed")
+            finally:
+                db.close()
+            if job is None:
+                self._wakeup.wait(JOB_POLL_SECONDS)
+                self._wakeup.clear()
@@ -0,0 +1,274 @@
+import hashlib
+import logging
+import math
+import os
+import threading
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app import metrics
+from app.db import sharding
+from app.db.hooks import on_commit
+from app.db.sharding import DIRECTORY_SHARD
+from app.models import User, UserIdentity
+from app.schemas.user import UserAvailabilityOut
+from app.services.exceptions import DuplicateUserError
+
+logger = logging.getLogger(__name__)
+
+# Keep an in-memory index of taken usernames and emails to pre-check writes.
+USER_MEMBERSHIP_INDEX = os.getenv("USER_MEMBERSHIP_INDEX", "false").lower() == "true"
+# Expected number of users; beyond it the false positive rate degrades.
+USER_MEMBERSHIP_CAPACITY = int(os.getenv("USER_MEMBERSHIP_CAPACITY", "1000000"))
+USER_MEMBERSHIP_ERROR_RATE = float(os.getenv("USER_MEMBERSHIP_ERROR_RATE", "0.01"))
+# How often the index is rebuilt, dropping released names and picking up users
+# created by other instances.
+USER_MEMBERSHIP_REBUILD_INTERVAL_SECONDS = float(
+    os.getenv("USER_MEMBERSHIP_REBUILD_INTERVAL_SECONDS", "3600")
+)
+USER_MEMBERSHIP_LOAD_BATCH_SIZE = 10_000
+
+USERNAME = "username"
+EMAIL = "email"
+
+
+class BloomFilter:
+    """
+    Compact probabilistic set: ``in`` never gives false negatives and gives
+    false positives at roughly ``error_rate`` once ``capacity`` items are added.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value: str) -> Iterable[int]:
+        # Double hashing: k positions from two 64-bit halves of one digest.
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, value: str) -> None:
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value: str) -> bool:
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(value)
+        )
+
+
+class MembershipIndex:
+    """
+    Bloom filters of the (lowercased) usernames and emails in ``users``.
+
+    A negative answer is definite, so the availability check and the
+    pre-write check skip the database. A positive answer may be false, or a
+    name released by a delete, so it is confirmed with an indexed lookup.
+    The unique indexes remain the final arbiter either way.
+
+    Until the first load completes the index is not ready and every check
+    goes to the database.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.ready = False
+        self._filters = self._new_filters()
+        self._pending: Optional[List[Tuple[str, str]]] = None
+        self._lock = threading.Lock()
+        self.skipped = 0
+        self.confirmed = 0
+        self.false_positives = 0
+        metrics.register("user_membership", self.stats)
+
+    def _new_filters(self) -> dict:
+        return {
+            kind: BloomFilter(self.capacity, self.error_rate)
+            for kind in (USERNAME, EMAIL)
+        }
+
+    def add(self, kind: str, value: str) -> None:
+        """Records a taken username or email."""
+        with self._lock:
+            self._filters[kind].add(value.lower())
+            if self._pending is not None:
+                self._pending.append((kind, value.lower()))
+
+    def might_exist(self, kind: str, value: str) -> bool:
+        if not self.ready:
+            return True
+        return value.lower() in self._filters[kind]
+
+    def rebuild(self, session_factory: Callable[[], Session]) -> None:
+        """
+        Loads fresh filters from the database and swaps them in.
+
+        Names added while loading are replayed into the new filters, so a
+        user created during the scan is not lost.
+        """
+        with self._lock:
+            self._pending = []
+        filters = self._new_filters()
+        try:
+            db = session_factory()
+            try:
+                for kind, value in _taken_names(db):
+                    filters[kind].add(value)
+            finally:
+                db.close()
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+
+        with self._lock:
+            for kind, value in self._pending:
+                filters[kind].add(value)
+            self._pending = None
+            self._filters = filters
+            self.ready = True
+        logger.info(f"Loaded membership index with {filters[USERNAME].count} usernames")
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "usernames": self._filters[USERNAME].count,
+            "emails": self._filters[EMAIL].count,
+            "skipped_lookups": self.skipped,
+            "confirmed_lookups": self.confirmed,
+            "false_positives": self.false_positives,
+        }
+
+
+def _taken_names(db: Session) -> Iterable[Tuple[str, str]]:
+    """Streams every taken (kind, lowercased value) from the database."""
+    if sharding.is_sharded(db):
+        # The directory shard already holds every name, lowercased.
+        result = db.execute(
+            select(UserIdentity.kind, UserIdentity.value).execution_options(
+                yield_per=USER_MEMBERSHIP_LOAD_BATCH_SIZE
+            ),
+            bind_arguments={"shard_id": DIRECTORY_SHARD},
+        )
+        yield from result
+        return
+
+    result = db.execute(
+        select(func.lower(User.username), func.lower(User.email)).execution_options(
+            yield_per=USER_MEMBERSHIP_LOAD_BATCH_SIZE
+        )
+    )
+    for username, email in result:
+        yield USERNAME, username
+        yield EMAIL, email
+
+
+index: Optional[MembershipIndex] = None
+
+
+def _exists(db: Session, kind: str, value: str) -> bool:
+    """Indexed lookup of a username or email, case-insensitively."""
+    if sharding.is_sharded(db):
+        return db.get(UserIdentity, (kind, value.lower())) is not None
+    column = User.username if kind == USERNAME else User.email
+    return (
+        db.execute(
+            select(User.id).where(func.lower(column) == value.lower()).limit(1)
+        ).first()
+        is not None
+    )
+
+
+def is_taken(db: Session, kind: str, value: str) -> bool:
+    """
+    Tells whether a username or email is registered, skipping the database
+    when the membership index rules it out.
+
+    Args:
+        db (Session): Database session.
+        kind (str): 'username' or 'email'.
+        value (str): Username or email to look up.
+
+    Returns:
+        bool: Whether the value is taken.
+    """
+    if index is not None and not index.might_exist(kind, value):
+        index.skipped += 1
+        return False
+    taken = _exists(db, kind, value)
+    if index is not None and index.ready:
+        index.confirmed += 1
+        if not taken:
+            index.false_positives += 1
+    return taken
+
+
+def check_availability(
+    db: Session, username: Optional[str], email: Optional[str]
+) -> UserAvailabilityOut:
+    """
+    Tells whether a username and/or email are free to register.
+
+    Args:
+        db (Session): Database session.
+        username (Optional[str]): Username to check.
+        email (Optional[str]): Email to check.
+
+    Returns:
+        UserAvailabilityOut: Availability of each given value.
+    """
+    return UserAvailabilityOut(
+        username=None if username is None else not is_taken(db, USERNAME, username),
+        email=None if email is None else not is_taken(db, EMAIL, email),
+    )
+
+
+def check_available(db: Session, username: Optional[str], email: Optional[str]) -> None:
+    """
+    Rejects a write early when its username or email is already taken.
+    Does nothing while the membership index is disabled, leaving duplicates
+    to the unique indexes.
+
+    Args:
+        db (Session): Database session.
+        username (Optional[str]): New username, or None if unchanged.
+        email (Optional[str]): New email, or None if unchanged.
+
+    Raises:
+        DuplicateUserError: If the username or email address is already registered.
+    """
+    if index is None:
+        return
+    if (username is not None and is_taken(db, USERNAME, username)) or (
+        email is not None and is_taken(db, EMAIL, email)
+    ):
+        raise DuplicateUserError("Username or email already exists")
+
+
+def record_on_commit(db: Session, username: str, email: str) -> None:
+    """Adds a user's names to the index once the write commits."""
+
+    def record() -> None:
+        if index is not None:
+            index.add(USERNAME, username)
+            index.add(EMAIL, email)
+
+    if index is not None:
+        on_commit(db, record)
+
+
+def run_rebuild_job() -> None:
+    """Entry point for the periodic rebuild task."""
+    from app.db.database import SessionLocal
+
+    if index is not None:
+        index.rebuild(SessionLocal)
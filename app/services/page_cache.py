@@ -0,0 +1,116 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+
+from sqlalchemy.orm import Session
+
+from app import metrics
+from app.db.hooks import on_commit
+
+# Serialized user list pages kept in memory (0 disables the cache).
+USER_PAGE_CACHE_SIZE = int(os.getenv("USER_PAGE_CACHE_SIZE", "256"))
+# Maximum age of a cached page. Local writes invalidate pages immediately;
+# this bounds how long writes made by other instances can go unnoticed.
+USER_PAGE_CACHE_MAX_STALENESS_SECONDS = os.getenv(
+    "USER_PAGE_CACHE_MAX_STALENESS_SECONDS"
+)
+
+
+class PageCache:
+    """
+    Bounded LRU cache of serialized pages, invalidated by a generation counter.
+
+    Every write bumps the generation, which invalidates all entries at once in
+    O(1): an entry is only served while the generation it was read at is still
+    the current one. Readers take the generation *before* querying, so a page
+    read concurrently with a write is stored under the old generation and
+    never served.
+    """
+
+    def __init__(
+        self, name: str, max_entries: int, max_staleness: Optional[float] = None
+    ):
+        self.max_entries = max_entries
+        self.max_staleness = max_staleness
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        metrics.register(name, self.stats)
+
+    def bump(self) -> None:
+        """Invalidates every cached page."""
+        with self._lock:
+            self.generation += 1
+            self.invalidations += 1
+            self._entries.clear()
+
+    def invalidate_on_commit(self, db: Session) -> None:
+        """Invalidates the cache once the session's transaction commits."""
+        on_commit(db, self.bump)
+
+    def get_or_load(self, key: Hashable, load: Callable[[], bytes]) -> bytes:
+        """
+        Returns the cached page for ``key``, or loads and caches it.
+
+        Args:
+            key (Hashable): Normalized query parameters of the page.
+            load (Callable[[], bytes]): Builds the serialized page.
+
+        Returns:
+            bytes: Serialized page.
+        """
+        if self.max_entries <= 0:
+            return load()
+
+        now = time.monotonic()
+        with self._lock:
+            generation = self.generation
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry_generation, stored_at, value = entry
+                fresh = self.max_staleness is None or (
+                    now - stored_at < self.max_staleness
+                )
+                if entry_generation == generation and fresh:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+            self.misses += 1
+
+        value = load()
+        with self._lock:
+            if generation == self.generation:
+                self._entries[key] = (generation, now, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return value
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = len(self._entries)
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "size": size,
+            "generation": self.generation,
+        }
+
+
+user_pages = PageCache(
+    "user_pages",
+    USER_PAGE_CACHE_SIZE,
+    (
+        float(USER_PAGE_CACHE_MAX_STALENESS_SECONDS)
+        if USER_PAGE_CACHE_MAX_STALENESS_SECONDS
+        else None
+    ),
+)
@@ -0,0 +1,183 @@
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional, Tuple
+from uuid import UUID
+
+from app import metrics
+
+# File backing the cache shared by the workers of a container, ideally on a
+# tmpfs such as /dev/shm. Unset disables the cache.
+USER_SHARED_CACHE_PATH = os.getenv("USER_SHARED_CACHE_PATH")
+USER_SHARED_CACHE_SLOTS = int(os.getenv("USER_SHARED_CACHE_SLOTS", "4096"))
+USER_SHARED_CACHE_SLOT_BYTES = int(os.getenv("USER_SHARED_CACHE_SLOT_BYTES", "1024"))
+# Maximum age of an entry. Writes invalidate entries in this container only;
+# this bounds how long writes made by other containers can go unnoticed.
+USER_SHARED_CACHE_TTL_SECONDS = os.getenv("USER_SHARED_CACHE_TTL_SECONDS")
+
+_MAGIC = b"USRCACH1"
+_HEADER = struct.Struct("<8sII")
+# seq, epoch, user id, stored at, payload length
+_SLOT = struct.Struct("<QQ16sdI4x")
+_SEQ = struct.Struct("<Q")
+
+
+class SharedUserCache:
+    """
+    Fixed-size hash table of serialized users in a memory-mapped file, shared
+    by every worker process mapping the same file.
+
+    Each user id hashes to one slot (colliding users evict each other).
+    Readers never lock: every slot is guarded by a sequence counter that is
+    odd while a write is in progress, and a read is discarded if the counter
+    changed under it. Writers serialize on an ``flock`` of the file.
+
+    Every slot also has an epoch, bumped by ``invalidate``. Readers take the
+    epoch before querying the database and ``fill`` only stores the result if
+    it is unchanged, so a value read before a concurrent write is never cached.
+    """
+
+    def __init__(
+        self, path: str, slots: int, slot_bytes: int, ttl: Optional[float] = None
+    ):
+        if slot_bytes <= _SLOT.size:
+            raise ValueError(f"Slots must be larger than {_SLOT.size} bytes")
+        self.path = path
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        size = _HEADER.size + slots * slot_bytes
+        with self._writing():
+            if os.fstat(self._fd).st_size < _HEADER.size or os.pread(
+                self._fd, _HEADER.size, 0
+            ) != _HEADER.pack(_MAGIC, slots, slot_bytes):
+                # New file, or one laid out with other settings: start empty.
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, size)
+                os.pwrite(self._fd, _HEADER.pack(_MAGIC, slots, slot_bytes), 0)
+        self._map = mmap.mmap(self._fd, size)
+
+    def close(self) -> None:
+        self._map.close()
+        os.close(self._fd)
+
+    @contextmanager
+    def _writing(self):
+        """Excludes other writers, in this process and in other workers."""
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _offset(self, user_id: UUID) -> int:
+        digest = hashlib.blake2b(user_id.bytes, digest_size=8).digest()
+        slot = int.from_bytes(digest, "little") % self.slots
+        return _HEADER.size + slot * self.slot_bytes
+
+    def get(self, user_id: UUID) -> Tuple[Optional[bytes], Optional[int]]:
+        """
+        Looks up a user without locking.
+
+        Args:
+            user_id (UUID): UUID from the user.
+
+        Returns:
+            Tuple[Optional[bytes], Optional[int]]: The cached payload (None on
+            a miss) and the slot epoch to pass to ``fill`` (None if a writer
+            kept the slot busy).
+        """
+        offset = self._offset(user_id)
+        for _ in range(3):
+            seq, epoch, key, stored_at, length = _SLOT.unpack_from(self._map, offset)
+            if seq & 1:
+                continue
+            payload = None
+            if key == user_id.bytes and length:
+                start = offset + _SLOT.size
+                payload = self._map[start : start + length]
+            if _SEQ.unpack_from(self._map, offset)[0] != seq:
+                continue
+            if payload is not None and (
+                self.ttl is None or time.time() - stored_at < self.ttl
+            ):
+                self.hits += 1
+                return payload, epoch
+            self.misses += 1
+            return None, epoch
+        self.misses += 1
+        return None, None
+
+    def _write(self, offset: int, epoch: int, key: bytes, payload: bytes = b"") -> None:
+        seq = _SEQ.unpack_from(self._map, offset)[0]
+        _SEQ.pack_into(self._map, offset, seq + 1)
+        start = offset + _SLOT.size
+        self._map[start : start + len(payload)] = payload
+        _SLOT.pack_into(
+            self._map, offset, seq + 1, epoch, key, time.time(), len(payload)
+        )
+        _SEQ.pack_into(self._map, offset, seq + 2)
+
+    def fill(self, user_id: UUID, epoch: Optional[int], payload: bytes) -> bool:
+        """
+        Stores a user read from the database, unless the slot was invalidated
+        since ``epoch`` was returned by ``get``.
+
+        Args:
+            user_id (UUID): UUID from the user.
+            epoch (Optional[int]): Epoch returned by ``get`` before the read.
+            payload (bytes): Serialized user.
+
+        Returns:
+            bool: Whether the payload was stored.
+        """
+        if epoch is None or len(payload) > self.slot_bytes - _SLOT.size:
+            return False
+        offset = self._offset(user_id)
+        with self._writing():
+            _, current, _, _, _ = _SLOT.unpack_from(self._map, offset)
+            if current != epoch:
+                return False
+            self._write(offset, epoch, user_id.bytes, payload)
+        return True
+
+    def invalidate(self, user_id: UUID) -> None:
+        """Drops a user (and anything sharing its slot) after a write."""
+        offset = self._offset(user_id)
+        with self._writing():
+            _, epoch, _, _, _ = _SLOT.unpack_from(self._map, offset)
+            self._write(offset, epoch + 1, bytes(16))
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "slots": self.slots,
+        }
+
+
+shared_users: Optional[SharedUserCache] = None
+if USER_SHARED_CACHE_PATH:
+    shared_users = SharedUserCache(
+        USER_SHARED_CACHE_PATH,
+        USER_SHARED_CACHE_SLOTS,
+        USER_SHARED_CACHE_SLOT_BYTES,
+        (
+            float(USER_SHARED_CACHE_TTL_SECONDS)
+            if USER_SHARED_CACHE_TTL_SECONDS
+            else None
+        ),
+    )
+    metrics.register("user_shared_cache", shared_users.stats)
@@ -0,0 +1,145 @@
+import asyncio
+import threading
+from typing import Callable, Dict, Hashable, TypeVar
+
+from anyio import to_thread
+
+from app import metrics
+
+T = TypeVar("T")
+
+
+class _Call:
+    """An in-flight call and everyone waiting for its outcome."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self._lock = threading.Lock()
+        self._async_waiters = []
+
+    def add_async_waiter(self, loop, future: asyncio.Future) -> bool:
+        """Registers an async waiter; returns False if the call already finished."""
+        with self._lock:
+            if self.done.is_set():
+                return False
+            self._async_waiters.append((loop, future))
+            return True
+
+    def finish(self) -> None:
+        with self._lock:
+            self.done.set()
+            waiters, self._async_waiters = self._async_waiters, []
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(self._resolve, future)
+
+    def _resolve(self, future: asyncio.Future) -> None:
+        if future.done():
+            return
+        if self.error is not None:
+            future.set_exception(self.error)
+        else:
+            future.set_result(self.result)
+
+    def outcome(self):
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into a single execution.
+
+    The first caller for a key (the leader) runs the function; callers that
+    arrive while it is in flight wait for it and receive the same result or
+    exception. Sync callers (threadpool) and async callers (event loop) share
+    the same in-flight calls; async followers wait without holding a thread.
+
+    Results are shared between callers, so they should be immutable values
+    (e.g. Pydantic models), not objects bound to the leader's Session.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.executions = 0
+        self.coalesced = 0
+        metrics.register(name, self.stats)
+
+    def _join(self, key: Hashable):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                return call, False
+            call = self._calls[key] = _Call()
+            self.executions += 1
+            return call, True
+
+    def _run(self, key: Hashable, call: _Call, fn: Callable[[], T]) -> None:
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.finish()
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        """
+        Runs ``fn`` or waits for the in-flight call with the same key.
+
+        Args:
+            key (Hashable): Identity of the call, e.g. a user id.
+            fn (Callable[[], T]): Function to run when no call is in flight.
+
+        Returns:
+            T: Result of the (possibly shared) call.
+        """
+        call, leader = self._join(key)
+        if leader:
+            self._run(key, call, fn)
+        else:
+            call.done.wait()
+        return call.outcome()
+
+    async def do_async(self, key: Hashable, fn: Callable[[], T]) -> T:
+        """
+        Async version of ``do``. The leader runs the blocking ``fn`` in a
+        worker thread; followers await the result on the event loop.
+        """
+        call, leader = self._join(key)
+        if leader:
+            await to_thread.run_sync(self._run, key, call, fn)
+            return call.outcome()
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if not call.add_async_waiter(loop, future):
+            return call.outcome()
+        return await future
+
+    def forget(self, key: Hashable) -> None:
+        """
+        Detaches the in-flight call for ``key`` so later callers start a new
+        one. Used after writes, so no caller joins a read started before them.
+        """
+        with self._lock:
+            self._calls.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            in_flight = len(self._calls)
+        calls = self.executions + self.coalesced
+        return {
+            "calls": calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "coalesced_ratio": round(self.coalesced / calls, 4) if calls else 0.0,
+            "in_flight": in_flight,
+        }
@@ -0,0 +1,205 @@
+import logging
+import os
+import random
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, Tuple
+
+from sqlalchemy import delete, func, select, text, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.db import sharding
+from app.db.sharding import DIRECTORY_SHARD
+from app.models import User, UserArchive, UserStat
+from app.schemas.user import UserSignupsOut, UserStatsOut
+
+logger = logging.getLogger(__name__)
+
+# Slots per counter; more slots mean less contention between writers.
+USER_STATS_SLOTS = int(os.getenv("USER_STATS_SLOTS", "8"))
+# How often counters are recomputed from the users tables (0 disables it).
+USER_STATS_RECONCILE_INTERVAL_SECONDS = float(
+    os.getenv("USER_STATS_RECONCILE_INTERVAL_SECONDS", "3600")
+)
+
+ROLE = "role"
+STATUS = "status"
+SIGNUP_DAY = "signup_day"
+
+# Stats live in the directory shard when users are sharded.
+_DIRECTORY = {"shard_id": DIRECTORY_SHARD}
+
+
+def _counter_keys(role, active: bool, day: date) -> Iterable[Tuple[str, str]]:
+    """Counters a user contributes to."""
+    yield ROLE, getattr(role, "value", role)
+    yield STATUS, "active" if active else "inactive"
+    yield SIGNUP_DAY, day.isoformat()
+
+
+def count_user(deltas: Counter, user, sign: int = 1) -> None:
+    """
+    Adds (or with ``sign=-1`` removes) a user to a set of counter deltas.
+
+    Args:
+        deltas (Counter): Deltas by (dimension, key).
+        user: User, archived user or row with role, active and created_at.
+        sign (int): 1 to count the user, -1 to uncount it.
+    """
+    for counter in _counter_keys(user.role, user.active, user.created_at.date()):
+        deltas[counter] += sign
+
+
+def apply_deltas(db: Session, deltas: Counter) -> None:
+    """
+    Adds ``deltas`` to the counters in the caller's transaction, so they
+    commit or roll back together with the user write.
+
+    Args:
+        db (Session): Database session.
+        deltas (Counter): Deltas by (dimension, key).
+    """
+    slot = random.randrange(USER_STATS_SLOTS)
+    values = [
+        {"dimension": dimension, "key": key, "slot": slot, "count": delta}
+        for (dimension, key), delta in deltas.items()
+        if delta
+    ]
+    if not values:
+        return
+
+    dialect = db.connection(bind_arguments=_DIRECTORY).dialect.name
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    statement = insert(UserStat.__table__)
+    db.execute(
+        statement.on_conflict_do_update(
+            index_elements=["dimension", "key", "slot"],
+            set_={"count": UserStat.__table__.c.count + statement.excluded.count},
+        ),
+        values,
+        bind_arguments=_DIRECTORY,
+    )
+
+
+def get_user_stats(db: Session, days: int) -> UserStatsOut:
+    """
+    Retrieves the user counters.
+
+    Args:
+        db (Session): Database session.
+        days (int): Number of days of signups to return, today included.
+
+    Returns:
+        UserStatsOut: Users by role and status, and signups per day.
+    """
+    since = (datetime.now(timezone.utc).date() - timedelta(days=days - 1)).isoformat()
+    rows = db.execute(
+        select(UserStat.dimension, UserStat.key, func.sum(UserStat.count))
+        .where((UserStat.dimension != SIGNUP_DAY) | (UserStat.key >= since))
+        .group_by(UserStat.dimension, UserStat.key),
+        bind_arguments=_DIRECTORY,
+    ).all()
+
+    counters = {ROLE: {}, STATUS: {}, SIGNUP_DAY: {}}
+    for dimension, key, count in rows:
+        if count:
+            counters[dimension][key] = count
+    return UserStatsOut(
+        total=sum(counters[STATUS].values()),
+        by_role=counters[ROLE],
+        by_status=counters[STATUS],
+        signups_per_day=[
+            UserSignupsOut(day=day, count=count)
+            for day, count in sorted(counters[SIGNUP_DAY].items())
+        ],
+    )
+
+
+def reconcile_user_stats(db: Session) -> int:
+    """
+    Recomputes every counter from ``users`` and ``users_archive`` and
+    rewrites them, fixing any drift.
+
+    On PostgreSQL the counters table is locked first, so writers wait and no
+    delta is lost between the recount and the rewrite.
+
+    Args:
+        db (Session): Database session.
+
+    Returns:
+        int: Number of counters that had drifted.
+    """
+    connection = db.connection(bind_arguments=_DIRECTORY)
+    if connection.dialect.name == "postgresql":
+        db.execute(
+            text("LOCK TABLE user_stats IN EXCLUSIVE MODE"), bind_arguments=_DIRECTORY
+        )
+
+    users = union_all(
+        *[
+            select(model.role, model.active, model.created_at)
+            for model in (User, UserArchive)
+        ]
+    ).subquery()
+    day = func.date(users.c.created_at)
+    query = select(users.c.role, users.c.active, day, func.count()).group_by(
+        users.c.role, users.c.active, day
+    )
+    if sharding.is_sharded(db):
+        groups = [
+            row
+            for rows in sharding.scatter(db, lambda s: s.execute(query).all())
+            for row in rows
+        ]
+    else:
+        groups = db.execute(query).all()
+
+    expected = Counter()
+    for role, active, signup_day, count in groups:
+        # SQLite returns dates as strings.
+        if isinstance(signup_day, str):
+            signup_day = date.fromisoformat(signup_day)
+        for counter in _counter_keys(role, active, signup_day):
+            expected[counter] += count
+
+    current = Counter()
+    for dimension, key, count in db.execute(
+        select(UserStat.dimension, UserStat.key, func.sum(UserStat.count)).group_by(
+            UserStat.dimension, UserStat.key
+        ),
+        bind_arguments=_DIRECTORY,
+    ):
+        current[(dimension, key)] = count
+
+    drifted = sum(
+        1
+        for counter in set(expected) | set(current)
+        if expected[counter] != current[counter]
+    )
+    db.execute(delete(UserStat.__table__), bind_arguments=_DIRECTORY)
+    if expected:
+        db.execute(
+            UserStat.__table__.insert(),
+            [
+                {"dimension": dimension, "key": key, "slot": 0, "count": count}
+                for (dimension, key), count in expected.items()
+                if count
+            ],
+            bind_arguments=_DIRECTORY,
+        )
+    db.commit()
+    if drifted:
+        logger.warning(f"Reconciled {drifted} drifted user counters")
+    return drifted
+
+
+def run_reconcile_job() -> int:
+    """Entry point for the periodic reconciliation task, using its own session."""
+    from app.db.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return reconcile_user_stats(db)
+    finally:
+        db.close()
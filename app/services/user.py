@@ -1,19 +1,40 @@
+import heapq
+import json
+from collections import Counter
+from datetime import datetime
+from itertools import islice
+
+from sqlalchemy import Row, func, insert, select, update
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError, NoResultFound
 from fastapi_pagination.ext.sqlalchemy import paginate
 from fastapi_pagination import Page, Params
-from typing import List
+from typing import Iterator, List, Optional, Tuple, Union
 from uuid import UUID
 
-from app.models.user import User
-from app.schemas.user import UserCreate, UserUpdate
+from app.models import User, UserArchive, UserTombstone
+from app.models.user import USER_COLUMNS, UserRole
+from app.schemas.user import UserCreate, UserOut, UserUpdate
+from app.db import sharding
+from app.db.hooks import on_commit
+from app.db.ids import new_user_id
+from app.encoding import JSON, encode
+from app.profiling import profiled_call
+from app.services import archive, events, identity, membership, shared_cache, stats
 from app.services.exceptions import DuplicateUserError
+from app.services.page_cache import user_pages
+from app.services.singleflight import SingleFlight
+
+user_reads = SingleFlight("user_reads")
 
 
-def get_user_by_id(db: Session, user_id: UUID) -> User:
+def get_user_by_id(db: Session, user_id: UUID) -> Union[User, UserArchive]:
     """
     Retrieves a specific user in the database.
 
+    Users that are not in the hot table are looked up in the archive, so
+    archived users remain readable.
+
     Args:
         db (Session): Database session.
         user_id (UUID): UUID from te user to get from the database.
@@ -22,25 +43,305 @@ def get_user_by_id(db: Session, user_id: UUID) -> User:
         NoResultFound: If user is not found.
 
     Returns:
-        User: User object.
+        Union[User, UserArchive]: User object.
     """
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
+        user = archive.get_archived_user(db, user_id)
+    if not user:
+        raise NoResultFound("User not found")
+    return user
+
+
+def _cached_user_out(user_id: UUID) -> Tuple[Optional[UserOut], Optional[int]]:
+    """
+    Looks a user up in the cache shared by the workers of this container.
+
+    Returns the cached user, if any, and the cache epoch to pass to
+    ``_read_user_out`` on a miss. Cached payloads were produced from
+    ``UserOut`` and are not validated again, like ``_user_out`` rows.
+    """
+    cache = shared_cache.shared_users
+    if cache is None:
+        return None, None
+    payload, epoch = cache.get(user_id)
+    if payload is None:
+        return None, epoch
+    fields = json.loads(payload)
+    fields["id"] = UUID(fields["id"])
+    fields["role"] = UserRole(fields["role"])
+    fields["created_at"] = datetime.fromisoformat(fields["created_at"])
+    fields["updated_at"] = datetime.fromisoformat(fields["updated_at"])
+    return UserOut.model_construct(**fields), epoch
+
+
+def _read_user_out(db: Session, user_id: UUID, epoch: Optional[int]) -> UserOut:
+    """
+    Read-only lookup returning plain Core rows, so no ORM instance is built
+    or kept in the session's identity map. The result is stored in the shared
+    cache unless the user was written since ``epoch``.
+    """
+    row = db.execute(select(*USER_COLUMNS).where(User.id == user_id)).first()
+    if row is None:
+        row = archive.get_archived_user_row(db, user_id)
+    if row is None:
         raise NoResultFound("User not found")
+    user = _user_out(row)
+    if shared_cache.shared_users is not None:
+        shared_cache.shared_users.fill(user_id, epoch, user.model_dump_json().encode())
     return user
 
 
-def get_users(db: Session, params: Params) -> Page[User]:
+def _user_out(row: Row) -> UserOut:
+    """
+    Builds the output schema from a user row without re-validating it: the
+    data was validated when written, and email validation dominates the cost
+    of ``model_validate`` on large pages.
+    """
+    return UserOut.model_construct(**row._mapping)
+
+
+def get_user_out(db: Session, user_id: UUID) -> UserOut:
+    """
+    Retrieves a specific user ready for output, coalescing concurrent reads.
+
+    Concurrent requests for the same user share a single database query: only
+    the first one uses its session, the rest wait for its result.
+
+    Args:
+        db (Session): Database session.
+        user_id (UUID): UUID from te user to get from the database.
+
+    Raises:
+        NoResultFound: If user is not found.
+
+    Returns:
+        UserOut: User formatted with the output schema.
+    """
+    cached, epoch = _cached_user_out(user_id)
+    if cached is not None:
+        return cached
+    return user_reads.do(user_id, lambda: _read_user_out(db, user_id, epoch))
+
+
+async def get_user_out_async(db: Session, user_id: UUID) -> UserOut:
+    """
+    Async version of ``get_user_out``. The query runs in a worker thread and
+    coalesced callers wait on the event loop without holding a thread.
+
+    Args:
+        db (Session): Database session.
+        user_id (UUID): UUID from te user to get from the database.
+
+    Raises:
+        NoResultFound: If user is not found.
+
+    Returns:
+        UserOut: User formatted with the output schema.
+    """
+    cached, epoch = _cached_user_out(user_id)
+    if cached is not None:
+        return cached
+    # Wrapped here rather than in the single-flight helper: the query runs in
+    # a worker thread, the only part of this request a profile can show.
+    return await user_reads.do_async(
+        user_id, profiled_call(lambda: _read_user_out(db, user_id, epoch))
+    )
+
+
+def get_users(db: Session, params: Params) -> Page[UserOut]:
     """
     Retrieves all existing users in the database.
 
+    Users are read as Core rows and turned directly into output schemas,
+    skipping ORM instance construction and the identity map.
+
     Args:
         db (Session): Database session.
 
     Returns:
-        Page[User]: Page of User objects.
+        Page[UserOut]: Page of users formatted with the output schema.
+    """
+    if sharding.is_sharded(db):
+        return _get_users_sharded(db, params)
+    return paginate(
+        db,
+        select(*USER_COLUMNS),
+        params,
+        transformer=lambda rows: [_user_out(row) for row in rows],
+    )
+
+
+def get_users_page(db: Session, params: Params, media_type: str = JSON) -> bytes:
+    """
+    Retrieves a page of users serialized as JSON or MessagePack, served from
+    the page cache when no user was written since it was cached.
+
+    Args:
+        db (Session): Database session.
+        params (Params): Pagination parameters.
+        media_type (str): ``application/json`` or ``application/msgpack``.
+
+    Returns:
+        bytes: ``Page[UserOut]`` in the requested format.
+    """
+    return user_pages.get_or_load(
+        (params.page, params.size, media_type),
+        lambda: encode(get_users(db, params), media_type),
+    )
+
+
+def get_users_after(db: Session, after: Optional[UUID], limit: int) -> List[Row]:
+    """
+    Retrieves the next users in id order, for full scans such as exports.
+
+    Args:
+        db (Session): Database session.
+        after (Optional[UUID]): Last id already read; None starts from the first.
+        limit (int): Maximum number of users to return.
+
+    Returns:
+        List[Row]: User rows with ``USER_COLUMNS``.
+    """
+    query = select(*USER_COLUMNS).order_by(User.id).limit(limit)
+    if after is not None:
+        query = query.where(User.id > after)
+    # When sharded every shard returns its first ``limit`` users; keep the
+    # first ``limit`` of the merged runs.
+    return sorted(db.execute(query).all(), key=lambda row: row.id)[:limit]
+
+
+def iter_users_out(db: Session, chunk_size: int) -> Iterator[List[UserOut]]:
+    """
+    Yields every user in id order, ``chunk_size`` at a time, reading each
+    chunk with a keyset query so memory stays flat whatever the table size.
+
+    Args:
+        db (Session): Database session.
+        chunk_size (int): Users per chunk.
+
+    Yields:
+        List[UserOut]: Next users formatted with the output schema.
     """
-    return paginate(db.query(User), params)
+    after = None
+    while True:
+        rows = get_users_after(db, after, chunk_size)
+        if not rows:
+            return
+        yield [_user_out(row) for row in rows]
+        after = rows[-1].id
+
+
+def _get_users_sharded(db: Session, params: Params) -> Page[UserOut]:
+    """
+    Scatter-gather pagination: every shard returns its first ``offset + size``
+    users in (created_at, id) order, in parallel, and the sorted streams are
+    merged to cut the requested page.
+    """
+    offset = (params.page - 1) * params.size
+
+    def query(shard_db: Session):
+        rows = shard_db.execute(
+            select(*USER_COLUMNS)
+            .order_by(User.created_at, User.id)
+            .limit(offset + params.size)
+        ).all()
+        return rows, shard_db.scalar(select(func.count()).select_from(User))
+
+    results = sharding.scatter(db, query)
+    merged = heapq.merge(
+        *[rows for rows, _ in results], key=lambda row: (row.created_at, row.id)
+    )
+    items = [_user_out(row) for row in islice(merged, offset, offset + params.size)]
+    return Page.create(items, params, total=sum(total for _, total in results))
+
+
+def _user_data(user) -> dict:
+    return UserOut.model_validate(user).model_dump(mode="json")
+
+
+def _forget_user(db: Session, user_id: UUID) -> None:
+    """Drops in-flight and cached reads of a user once the write commits."""
+
+    def forget() -> None:
+        user_reads.forget(user_id)
+        if shared_cache.shared_users is not None:
+            shared_cache.shared_users.invalidate(user_id)
+
+    on_commit(db, forget)
+
+
+def _changed(old: str, new: Optional[str]) -> Optional[str]:
+    """Returns ``new`` if it differs from ``old`` (ignoring case), else None."""
+    if new is None or new.lower() == old.lower():
+        return None
+    return new
+
+
+def _insert_user(db: Session, user_in: UserCreate) -> User:
+    """Inserts a user and stages its side effects, without committing."""
+    membership.check_available(db, user_in.username, user_in.email)
+    user = User(id=new_user_id(), **user_in.model_dump())
+    if sharding.is_sharded(db):
+        identity.claim(db, [user_in.model_dump() | {"id": user.id}])
+    db.add(user)
+    db.flush()
+    deltas = Counter()
+    stats.count_user(deltas, user)
+    stats.apply_deltas(db, deltas)
+    events.emit(db, events.USER_CREATED, _user_data(user))
+    membership.record_on_commit(db, user.username, user.email)
+    user_pages.invalidate_on_commit(db)
+    return user
+
+
+def _apply_update(db: Session, user: User, user_in: UserUpdate) -> User:
+    """Updates a user and stages its side effects, without committing."""
+    old_username, old_email = user.username, user.email
+    changes = user_in.model_dump(exclude_unset=True)
+    membership.check_available(
+        db,
+        _changed(old_username, changes.get("username")),
+        _changed(old_email, changes.get("email")),
+    )
+    deltas = Counter()
+    stats.count_user(deltas, user, -1)
+    for field, value in changes.items():
+        setattr(user, field, value)
+    db.flush()
+    stats.count_user(deltas, user)
+    stats.apply_deltas(db, deltas)
+    if sharding.is_sharded(db):
+        identity.transfer(db, user.id, old_username, old_email, user)
+    events.emit(db, events.USER_UPDATED, _user_data(user))
+    membership.record_on_commit(db, user.username, user.email)
+    _forget_user(db, user.id)
+    user_pages.invalidate_on_commit(db)
+    return user
+
+
+def _update_user(db: Session, user_id: UUID, user_in: UserUpdate) -> User:
+    """Looks up and updates a user (restoring it if archived), without committing."""
+    user = get_user_by_id(db, user_id)
+    if isinstance(user, UserArchive):
+        user = archive.move_to_hot(db, user)
+    return _apply_update(db, user, user_in)
+
+
+def _remove_user(db: Session, user: Union[User, UserArchive]) -> None:
+    """Deletes a user and stages its side effects, without committing."""
+    user_id = user.id
+    deltas = Counter()
+    stats.count_user(deltas, user, -1)
+    stats.apply_deltas(db, deltas)
+    if sharding.is_sharded(db):
+        identity.release(db, user.username, user.email)
+    db.delete(user)
+    db.add(UserTombstone(user_id=user_id))
+    db.flush()
+    events.emit(db, events.USER_DELETED, {"id": str(user_id)})
+    _forget_user(db, user_id)
+    user_pages.invalidate_on_commit(db)
 
 
 def create_user(db: Session, user_in: UserCreate) -> User:
@@ -57,9 +358,8 @@ def create_user(db: Session, user_in: UserCreate) -> User:
     Returns:
         User: Newly created User object.
     """
-    user = User(**user_in.model_dump())
-    db.add(user)
     try:
+        user = _insert_user(db, user_in)
         db.commit()
         db.refresh(user)
         return user
@@ -72,6 +372,8 @@ def update_user(db: Session, user_id: UUID, user_in: UserUpdate) -> User:
     """
     Update a user in the database.
 
+    Archived users are moved back to the hot table before being updated.
+
     Args:
         db (Session): Database session.
         user_id (UUID): UUID from te user to update from the database.
@@ -84,23 +386,22 @@ def update_user(db: Session, user_id: UUID, user_in: UserUpdate) -> User:
     Returns:
         User: Updated User object.
     """
-    user = get_user_by_id(db, user_id)
-    for field, value in user_in.model_dump(exclude_unset=True).items():
-        setattr(user, field, value)
-
     try:
+        user = _update_user(db, user_id, user_in)
         db.commit()
-        db.refresh(user)
-        return user
     except IntegrityError:
         db.rollback()
         raise DuplicateUserError("Username or email already exists")
+    db.refresh(user)
+    return user
 
 
 def delete_user(db: Session, user_id: UUID) -> None:
     """
     Update a user in the database.
 
+    A tombstone is recorded in the same transaction for incremental sync.
+
     Args:
         db (Session): Database session.
         user_id (UUID): UUID from te user to delete from the database.
@@ -109,5 +410,128 @@ def delete_user(db: Session, user_id: UUID) -> None:
         NoResultFound: If user is not found.
     """
     user = get_user_by_id(db, user_id)
-    db.delete(user)
+    _remove_user(db, user)
     db.commit()
+
+
+def bulk_create_users(db: Session, rows: List[dict]) -> List[int]:
+    """
+    Inserts many already validated users without committing.
+
+    Rows the membership index knows to be duplicates are rejected first. The
+    rest are inserted with a single multi-row statement inside a savepoint.
+    If it hits a unique constraint, the batch is retried row by row so only the
+    duplicates are rejected.
+
+    Args:
+        db (Session): Database session.
+        rows (List[dict]): User fields, as produced by ``UserCreate.model_dump()``.
+
+    Returns:
+        List[int]: Positions in ``rows`` rejected as duplicates.
+    """
+    if not rows:
+        return []
+    rows = [dict(row, id=new_user_id()) for row in rows]
+    # Known duplicates are dropped up front, so they do not send the whole
+    # batch down the row by row path.
+    duplicates = [
+        position
+        for position, row in enumerate(rows)
+        if not _is_available(db, row["username"], row["email"])
+    ]
+    known = set(duplicates)
+    pending = [(p, row) for p, row in enumerate(rows) if p not in known]
+    try:
+        with db.begin_nested():
+            created = _insert_rows(db, [row for _, row in pending]) if pending else []
+    except IntegrityError:
+        created = []
+        for position, row in pending:
+            try:
+                with db.begin_nested():
+                    created += _insert_rows(db, [row])
+            except IntegrityError:
+                duplicates.append(position)
+        duplicates.sort()
+
+    deltas = Counter()
+    for row in created:
+        stats.count_user(deltas, row)
+        membership.record_on_commit(db, row.username, row.email)
+    stats.apply_deltas(db, deltas)
+    events.emit_many(db, events.USER_CREATED, [_user_data(row) for row in created])
+    if created:
+        user_pages.invalidate_on_commit(db)
+    return duplicates
+
+
+def _is_available(db: Session, username: str, email: str) -> bool:
+    try:
+        membership.check_available(db, username, email)
+    except DuplicateUserError:
+        return False
+    return True
+
+
+def _insert_rows(db: Session, rows: List[dict]) -> list:
+    """Inserts user rows (routing them to their shards) and returns them."""
+    if not sharding.is_sharded(db):
+        return db.execute(insert(User).returning(*User.__table__.c), rows).all()
+
+    # ORM bulk inserts cannot be routed per shard; use the Core table instead.
+    statement = insert(User.__table__).returning(*User.__table__.c)
+
+    identity.claim(db, rows)
+    rows_by_id = {row["id"]: row for row in rows}
+    created = []
+    for shard_id, user_ids in sharding.group_by_shard(db, rows_by_id).items():
+        created += db.execute(
+            statement,
+            [rows_by_id[user_id] for user_id in user_ids],
+            bind_arguments={"shard_id": shard_id},
+        ).all()
+    return created
+
+
+def bulk_deactivate_users(db: Session, user_ids: List[UUID]) -> int:
+    """
+    Deactivates many users with a single statement, without committing.
+
+    Args:
+        db (Session): Database session.
+        user_ids (List[UUID]): UUIDs from the users to deactivate.
+
+    Returns:
+        int: Number of users found and deactivated.
+    """
+    # Lock the users being deactivated to know which ones were active.
+    was_active = len(
+        db.execute(
+            select(User.id)
+            .where(User.id.in_(user_ids), User.active.is_(True))
+            .with_for_update()
+        ).all()
+    )
+    updated = db.execute(
+        update(User)
+        .where(User.id.in_(user_ids))
+        .values(active=False)
+        .returning(*User.__table__.c)
+        .execution_options(synchronize_session=False)
+    ).all()
+    stats.apply_deltas(
+        db,
+        Counter(
+            {
+                (stats.STATUS, "active"): -was_active,
+                (stats.STATUS, "inactive"): was_active,
+            }
+        ),
+    )
+    events.emit_many(db, events.USER_UPDATED, [_user_data(row) for row in updated])
+    for row in updated:
+        _forget_user(db, row.id)
+    if updated:
+        user_pages.invalidate_on_commit(db)
+    return len(updated)
@@ -0,0 +1,118 @@
+import gzip
+import json
+
+import msgpack
+import zstandard
+
+from tests.factories import UserFactory
+
+MSGPACK = {"Accept": "application/msgpack"}
+
+
+def _create_users(db, count):
+    UserFactory._meta.sqlalchemy_session = db
+    return UserFactory.create_batch(count)
+
+
+class TestMessagePackAPI:
+    def test_list_users_as_msgpack(self, client, multiple_users):
+        # Given
+        expected = client.get("/users/").json()
+
+        # When
+        response = client.get("/users/", headers=MSGPACK)
+
+        # Then
+        assert response.headers["content-type"] == "application/msgpack"
+        assert msgpack.unpackb(response.content) == expected
+
+    def test_retrieve_user_as_msgpack(self, client, user):
+        # When
+        response = client.get(f"/users/{user.id}", headers=MSGPACK)
+
+        # Then
+        assert response.headers["content-type"] == "application/msgpack"
+        assert msgpack.unpackb(response.content)["username"] == "username"
+
+    def test_json_preferred_by_quality(self, client, user):
+        # When
+        response = client.get(
+            f"/users/{user.id}",
+            headers={"Accept": "application/json, application/msgpack;q=0.5"},
+        )
+
+        # Then
+        assert response.headers["content-type"] == "application/json"
+        assert response.json()["username"] == "username"
+
+    def test_changes_as_msgpack(self, client):
+        # When
+        response = client.get("/users/changes", headers=MSGPACK)
+
+        # Then
+        assert msgpack.unpackb(response.content)["items"] == []
+
+
+class TestUserExportAPI:
+    def test_export_streams_ndjson(self, client, db):
+        # Given
+        users = _create_users(db, 5)
+
+        # When
+        response = client.get("/users/export?chunk_size=2")
+
+        # Then
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["id"] for line in lines] == sorted(str(u.id) for u in users)
+
+    def test_export_streams_msgpack(self, client, db):
+        # Given
+        _create_users(db, 3)
+
+        # When
+        response = client.get("/users/export", headers=MSGPACK)
+
+        # Then
+        unpacker = msgpack.Unpacker()
+        unpacker.feed(response.content)
+        assert len(list(unpacker)) == 3
+
+
+class TestCompressionAPI:
+    def test_large_response_compressed_with_zstd(self, client, db):
+        # Given
+        _create_users(db, 20)
+
+        # When
+        with client.stream(
+            "GET", "/users/?size=20", headers={"Accept-Encoding": "zstd, gzip"}
+        ) as response:
+            raw = b"".join(response.iter_raw())
+
+        # Then
+        assert response.headers["content-encoding"] == "zstd"
+        body = zstandard.ZstdDecompressor().decompressobj().decompress(raw)
+        assert len(json.loads(body)["items"]) == 20
+
+    def test_export_compressed_with_gzip_while_streaming(self, client, db):
+        # Given
+        _create_users(db, 20)
+
+        # When
+        with client.stream(
+            "GET", "/users/export?chunk_size=5", headers={"Accept-Encoding": "gzip"}
+        ) as response:
+            raw = b"".join(response.iter_raw())
+
+        # Then
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        assert len(gzip.decompress(raw).splitlines()) == 20
+
+    def test_small_response_not_compressed(self, client, user):
+        # When
+        response = client.get(f"/users/{user.id}", headers={"Accept-Encoding": "zstd"})
+
+        # Then
+        assert "content-encoding" not in response.headers
@@ -0,0 +1,45 @@
+import uuid
+
+
+class TestJobsAPI:
+    def test_queue_import_job(self, client):
+        # Given
+        data = {
+            "users": [
+                {
+                    "username": "bulk1",
+                    "email": "bulk1@example.com",
+                    "first_name": "Bulk",
+                    "last_name": "User",
+                    "role": "user",
+                }
+            ]
+        }
+
+        # When
+        response = client.post("/jobs/users/import", json=data)
+
+        # Then
+        assert response.status_code == 202
+        job = response.json()
+        assert job["status"] == "queued"
+        assert job["total"] == 1
+
+        # The job can be polled
+        get_response = client.get(f"/jobs/{job['id']}")
+        assert get_response.status_code == 200
+        assert get_response.json()["processed"] == 0
+
+    def test_queue_deactivate_job_requires_ids(self, client):
+        # Given and when
+        response = client.post("/jobs/users/deactivate", json={"ids": []})
+
+        # Then
+        assert response.status_code == 422
+
+    def test_retrieve_non_existing_job(self, client):
+        # Given and when
+        response = client.get(f"/jobs/{uuid.uuid4()}")
+
+        # Then
+        assert response.status_code == 404
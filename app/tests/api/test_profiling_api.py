@@ -0,0 +1,113 @@
+import json
+import pstats
+
+import pytest
+
+from app import profiling
+
+
+@pytest.fixture
+def profiling_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILING_TOKEN", "secret")
+    monkeypatch.setattr(profiling, "PROFILING_DIR", str(tmp_path))
+    return tmp_path
+
+
+class TestProfilingAPI:
+    def test_unprofiled_request(self, client, profiling_dir):
+        # Given and when
+        response = client.get("/users/")
+
+        # Then
+        assert response.status_code == 200
+        assert "Server-Timing" not in response.headers
+        assert list(profiling_dir.iterdir()) == []
+
+    def test_invalid_token_is_ignored(self, client, profiling_dir):
+        # Given and when
+        response = client.get("/users/", headers={"X-Profile-Token": "wrong"})
+
+        # Then
+        assert "Server-Timing" not in response.headers
+        assert list(profiling_dir.iterdir()) == []
+
+    def test_profiled_request(self, client, user, profiling_dir):
+        # Given and when
+        response = client.get(
+            f"/users/{user.id}", headers={"X-Profile-Token": "secret"}
+        )
+
+        # Then
+        assert response.status_code == 200
+        assert "sql;dur=" in response.headers["Server-Timing"]
+        profile_id = response.headers["X-Profile-Id"]
+        assert (profiling_dir / f"{profile_id}.prof").exists()
+        summary = json.loads((profiling_dir / f"{profile_id}.json").read_text())
+        assert summary["path"] == f"/users/{user.id}"
+        assert any("FROM users" in q["statement"] for q in summary["queries"])
+        # The async endpoint's profile holds its worker thread, not the loop.
+        stats = pstats.Stats(str(profiling_dir / f"{profile_id}.prof"))
+        names = {name for _, _, name in stats.stats}
+        assert "_read_user_out" in names
+        assert "retrieve_user" not in names
+
+    def test_profiles_sync_endpoints(self, client, profiling_dir):
+        # Given
+        data = {
+            "username": "profiled",
+            "email": "profiled@example.com",
+            "first_name": "Profiled",
+            "last_name": "User",
+            "role": "user",
+        }
+
+        # When
+        response = client.post(
+            "/users/", json=data, headers={"X-Profile-Token": "secret"}
+        )
+
+        # Then
+        assert response.status_code == 201
+        profile_id = response.headers["X-Profile-Id"]
+        stats = pstats.Stats(str(profiling_dir / f"{profile_id}.prof"))
+        assert any(name == "create_user" for _, _, name in stats.stats)
+
+    def test_sampled_request(self, client, profiling_dir, monkeypatch):
+        # Given
+        monkeypatch.setattr(profiling, "PROFILING_SAMPLE_RATE", 1.0)
+
+        # When
+        response = client.get("/users/")
+
+        # Then
+        assert "X-Profile-Id" in response.headers
+
+    def test_overlapping_request_is_not_profiled(self, client, profiling_dir):
+        # Given
+        profiling._active.acquire()
+
+        # When
+        try:
+            response = client.get("/users/", headers={"X-Profile-Token": "secret"})
+        finally:
+            profiling._active.release()
+
+        # Then
+        assert response.status_code == 200
+        assert "X-Profile-Id" not in response.headers
+
+    def test_old_profiles_are_deleted(self, client, profiling_dir, monkeypatch):
+        # Given
+        monkeypatch.setattr(profiling, "PROFILING_MAX_PROFILES", 2)
+
+        # When
+        ids = [
+            client.get("/users/", headers={"X-Profile-Token": "secret"}).headers[
+                "X-Profile-Id"
+            ]
+            for _ in range(3)
+        ]
+
+        # Then
+        kept = {path.stem for path in profiling_dir.glob("*.json")}
+        assert kept == set(ids[1:])
@@ -1,4 +1,7 @@
 import uuid
+from datetime import datetime
+
+from app.services import changes as service_changes
 
 
 class TestUserCreateAPI:
@@ -105,6 +108,71 @@ class TestUserCreateAPI:
         assert response.status_code == 400
 
 
+class TestUserIdempotencyAPI:
+    data = {
+        "username": "retried",
+        "email": "retried@example.com",
+        "first_name": "John",
+        "last_name": "Doe",
+        "role": "user",
+    }
+
+    def test_retry_replays_created_user(self, client):
+        # Given
+        headers = {"Idempotency-Key": "create-1"}
+        first = client.post("/users/", json=self.data, headers=headers)
+
+        # When
+        retry = client.post("/users/", json=self.data, headers=headers)
+
+        # Then
+        assert retry.status_code == 201
+        assert retry.json() == first.json()
+        assert retry.headers["Idempotent-Replayed"] == "true"
+        assert "Idempotent-Replayed" not in first.headers
+
+    def test_retry_replays_duplicate_error(self, client):
+        # Given
+        client.post("/users/", json=self.data)
+        headers = {"Idempotency-Key": "create-2"}
+        client.post("/users/", json=self.data, headers=headers)
+
+        # When
+        retry = client.post("/users/", json=self.data, headers=headers)
+
+        # Then
+        assert retry.status_code == 400
+        assert retry.json()["detail"] == "Username or email already exists"
+
+    def test_key_reused_with_another_body(self, client):
+        # Given
+        headers = {"Idempotency-Key": "create-3"}
+        client.post("/users/", json=self.data, headers=headers)
+
+        # When
+        response = client.post(
+            "/users/", json={**self.data, "username": "other"}, headers=headers
+        )
+
+        # Then
+        assert response.status_code == 422
+
+    def test_update_retry_is_replayed(self, client):
+        # Given
+        user_id = client.post("/users/", json=self.data).json()["id"]
+        headers = {"Idempotency-Key": "update-1"}
+        update = {**self.data, "first_name": "Jane"}
+        client.put(f"/users/{user_id}", json=update, headers=headers)
+
+        # When
+        retry = client.put(f"/users/{user_id}", json=update, headers=headers)
+
+        # Then
+        assert retry.status_code == 200
+        assert retry.json()["first_name"] == "Jane"
+        assert retry.headers["Idempotent-Replayed"] == "true"
+
+
 class TestUserListAPI:
     def test_list_users_endpoint(self, client):
         # Given and when
@@ -132,6 +200,94 @@ class TestUserListAPI:
         assert data["page"] == 1
         assert data["size"] == 10
 
+    def test_list_users_cache_is_invalidated_by_writes(self, client, user):
+        # Given
+        first = client.get("/users/?page=1&size=10").json()
+        cached = client.get("/users/?page=1&size=10").json()
+
+        # When
+        client.patch(f"/users/{user.id}", json={"first_name": "Changed"})
+        response = client.get("/users/?page=1&size=10")
+
+        # Then
+        assert cached == first
+        assert response.json()["items"][0]["first_name"] == "Changed"
+
+
+class TestUserAvailabilityAPI:
+    def test_check_availability(self, client, user):
+        # Given and when
+        response = client.get(
+            "/users/availability",
+            params={"username": "USERNAME", "email": "free@example.com"},
+        )
+
+        # Then
+        assert response.status_code == 200
+        assert response.json() == {"username": False, "email": True}
+
+    def test_check_availability_requires_a_value(self, client):
+        # Given and when
+        response = client.get("/users/availability")
+
+        # Then
+        assert response.status_code == 400
+
+
+class TestUserStatsAPI:
+    def test_retrieve_user_stats(self, client):
+        # Given
+        data = {
+            "username": "counted",
+            "email": "counted@example.com",
+            "first_name": "Counted",
+            "last_name": "User",
+            "role": "guest",
+            "active": True,
+        }
+        client.post("/users/", json=data)
+
+        # When
+        response = client.get("/users/stats?days=7")
+
+        # Then
+        assert response.status_code == 200
+        stats = response.json()
+        assert stats["total"] == 1
+        assert stats["by_role"] == {"guest": 1}
+        assert stats["by_status"] == {"active": 1}
+        assert len(stats["signups_per_day"]) == 1
+
+
+class TestUserChangesAPI:
+    def test_list_changes_invalid_cursor(self, client):
+        # Given and when
+        response = client.get("/users/changes?since=bogus")
+
+        # Then
+        assert response.status_code == 400
+
+    def test_list_changes_expired_cursor(self, client):
+        # Given
+        cursor = service_changes.encode_cursor(
+            datetime(2000, 1, 1), uuid.uuid4(), datetime(2000, 1, 1)
+        )
+
+        # When
+        response = client.get(f"/users/changes?since={cursor}")
+
+        # Then
+        assert response.status_code == 410
+
+    def test_list_changes_empty(self, client):
+        # Given and when
+        response = client.get("/users/changes")
+
+        # Then
+        assert response.status_code == 200
+        assert response.json()["items"] == []
+        assert response.json()["has_more"] is False
+
 
 class TestUserRetrieveAPI:
     def test_retrieve_existing_user(self, client, user):
@@ -144,6 +300,17 @@ class TestUserRetrieveAPI:
         assert data["username"] == user.username
         assert data["email"] == user.email
 
+    def test_retrieve_user_reports_coalescing_metrics(self, client, user):
+        # Given
+        client.get(f"/users/{user.id}")
+
+        # When
+        response = client.get("/metrics/")
+
+        # Then
+        assert response.status_code == 200
+        assert response.json()["user_reads"]["executions"] >= 1
+
     def test_retrieve_non_existing_user(self, client):
         # Given and When
         response = client.get(f"/users/{uuid.uuid4()}")
@@ -263,3 +430,12 @@ class TestUserDeleteAPI:
 
         # Then
         assert response.status_code == 404
+
+
+class TestUserRestoreAPI:
+    def test_restore_non_archived_user(self, client, user):
+        # Given and when
+        response = client.post(f"/users/{user.id}/restore")
+
+        # Then
+        assert response.status_code == 404
@@ -0,0 +1,46 @@
+from app.db.hooks import on_commit
+
+
+class TestOnCommit:
+    def test_on_commit_runs_after_root_commit_in_order(self, db):
+        # Given
+        calls = []
+        on_commit(db, lambda: calls.append("before"))
+        savepoint = db.begin_nested()
+        on_commit(db, lambda: calls.append("nested"))
+        savepoint.commit()
+        on_commit(db, lambda: calls.append("after"))
+
+        # When
+        released = list(calls)
+        db.commit()
+
+        # Then
+        assert released == []
+        assert calls == ["before", "nested", "after"]
+
+    def test_on_commit_drops_only_rolled_back_savepoint(self, db):
+        # Given
+        calls = []
+        on_commit(db, lambda: calls.append("kept"))
+        savepoint = db.begin_nested()
+        on_commit(db, lambda: calls.append("dropped"))
+        savepoint.rollback()
+
+        # When
+        db.commit()
+
+        # Then
+        assert calls == ["kept"]
+
+    def test_on_commit_drops_callbacks_on_rollback(self, db):
+        # Given
+        calls = []
+        on_commit(db, lambda: calls.append("dropped"))
+
+        # When
+        db.rollback()
+        db.commit()
+
+        # Then
+        assert calls == []
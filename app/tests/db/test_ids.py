@@ -0,0 +1,49 @@
+import time
+import uuid
+
+from app.db import ids
+
+
+class TestUuid7:
+    def test_uuid7_version_and_variant(self):
+        # Given and when
+        value = ids.uuid7()
+
+        # Then
+        assert isinstance(value, uuid.UUID)
+        assert value.version == 7
+        assert value.variant == uuid.RFC_4122
+
+    def test_uuid7_is_monotonic(self):
+        # Given and when
+        values = [ids.uuid7() for _ in range(5000)]
+
+        # Then
+        assert values == sorted(values)
+        assert len(set(values)) == len(values)
+
+    def test_uuid7_embeds_timestamp(self):
+        # Given
+        before = time.time_ns() // 1_000_000
+
+        # When
+        value = ids.uuid7()
+
+        # Then
+        assert value.int >> 80 >= before
+
+
+class TestNewUserId:
+    def test_new_user_id_defaults_to_v4(self, monkeypatch):
+        # Given
+        monkeypatch.setattr(ids, "USER_ID_VERSION", "4")
+
+        # When and then
+        assert ids.new_user_id().version == 4
+
+    def test_new_user_id_v7(self, monkeypatch):
+        # Given
+        monkeypatch.setattr(ids, "USER_ID_VERSION", "7")
+
+        # When and then
+        assert ids.new_user_id().version == 7
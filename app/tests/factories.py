@@ -1,11 +1,15 @@
 # tests/factories.py
 
 import factory
-import uuid
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from typing import List
+from uuid import UUID
+
+from sqlalchemy import insert
 
 from app.models import User
 from app.db import Base
+from app.db.ids import new_user_id
 
 
 class UserFactory(factory.alchemy.SQLAlchemyModelFactory):
@@ -14,7 +18,7 @@ class UserFactory(factory.alchemy.SQLAlchemyModelFactory):
         sqlalchemy_session_persistence = "commit"
         sqlalchemy_session = None
 
-    id = factory.LazyFunction(uuid.uuid4)
+    id = factory.LazyFunction(new_user_id)
     username = factory.Sequence(lambda n: f"user{n}")
     email = factory.LazyAttribute(lambda o: f"{o.username}@example.com")
     first_name = factory.Faker("first_name")
@@ -23,3 +27,45 @@ class UserFactory(factory.alchemy.SQLAlchemyModelFactory):
     created_at = factory.LazyFunction(lambda: datetime.now(timezone.utc))
     updated_at = factory.LazyFunction(lambda: datetime.now(timezone.utc))
     active = True
+
+
+def seed_users(db, count: int, batch_size: int = 5000, **fields) -> List[UUID]:
+    """
+    Inserts ``count`` users with multi-row inserts, much faster than
+    ``UserFactory`` for large datasets. Nothing is committed.
+
+    Users are created one second apart, ending a day ago, so they sort in
+    creation order and are older than the sync safety lag.
+
+    Args:
+        db: Session or Connection.
+        count (int): Number of users.
+        batch_size (int): Users per INSERT statement.
+        **fields: Values overriding the defaults of every user.
+
+    Returns:
+        List[UUID]: Ids of the users, in creation order.
+    """
+    start = datetime.now(timezone.utc) - timedelta(days=1, seconds=count)
+    ids = []
+    for offset in range(0, count, batch_size):
+        rows = []
+        for n in range(offset, min(offset + batch_size, count)):
+            created_at = start + timedelta(seconds=n)
+            rows.append(
+                {
+                    "id": new_user_id(),
+                    "username": f"seeded{n}",
+                    "email": f"seeded{n}@example.com",
+                    "first_name": "Seeded",
+                    "last_name": f"User {n}",
+                    "role": "user",
+                    "created_at": created_at,
+                    "updated_at": created_at,
+                    "active": True,
+                    **fields,
+                }
+            )
+        db.execute(insert(User), rows)
+        ids.extend(row["id"] for row in rows)
+    return ids
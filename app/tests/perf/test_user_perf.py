@@ -0,0 +1,103 @@
+from fastapi_pagination import Params
+from sqlalchemy import func, select
+
+from app.models import User
+from app.schemas.user import UserCreate
+from app.services import changes as service_changes
+from app.services import stats as service_stats
+from app.services import user as service_user
+
+
+def _count_users(db):
+    return db.scalar(select(func.count()).select_from(User))
+
+
+def _user_rows(count):
+    return [
+        UserCreate(
+            username=f"imported{n}",
+            email=f"imported{n}@example.com",
+            first_name="Imported",
+            last_name="User",
+            role="user",
+        ).model_dump()
+        for n in range(count)
+    ]
+
+
+class TestUserReadPerformance:
+    def test_list_page_is_two_queries(self, large_db, query_counter, time_budget):
+        # Given
+        total = _count_users(large_db)
+
+        # When
+        with time_budget(0.5), query_counter(large_db) as queries:
+            page = service_user.get_users(large_db, Params(page=50, size=100))
+
+        # Then
+        assert queries.count == 2
+        assert page.total == total
+        assert len(page.items) == 100
+
+    def test_retrieve_is_one_query(self, large_db, query_counter, time_budget):
+        # Given
+        user_id = large_db.scalar(select(User.id).limit(1).offset(1000))
+
+        # When
+        with time_budget(0.1), query_counter(large_db) as queries:
+            user = service_user.get_user_out(large_db, user_id)
+
+        # Then
+        assert queries.count == 1
+        assert user.id == user_id
+
+    def test_changes_page_reads_only_the_page(
+        self, large_db, query_counter, time_budget
+    ):
+        # When
+        with time_budget(0.5), query_counter(large_db) as queries:
+            changes = service_changes.get_user_changes(large_db, None, 500)
+
+        # Then
+        assert queries.count <= 2
+        assert len(changes.items) == 500
+        assert changes.has_more
+
+    def test_export_reads_in_keyset_chunks(self, large_db, query_counter, time_budget):
+        # Given
+        total = _count_users(large_db)
+
+        # When
+        with time_budget(5), query_counter(large_db) as queries:
+            exported = sum(
+                len(chunk) for chunk in service_user.iter_users_out(large_db, 5000)
+            )
+
+        # Then
+        assert exported == total
+        assert queries.count == -(-total // 5000) + 1
+
+    def test_stats_do_not_scan_users(self, large_db, query_counter, time_budget):
+        # When
+        with time_budget(0.1), query_counter(large_db) as queries:
+            service_stats.get_user_stats(large_db, days=30)
+
+        # Then
+        assert queries.count == 1
+
+
+class TestUserWritePerformance:
+    def test_bulk_import_is_batched(self, large_db, query_counter, time_budget):
+        # Given
+        total = _count_users(large_db)
+        rows = _user_rows(1000)
+
+        # When
+        with time_budget(2), query_counter(large_db) as queries:
+            duplicates = service_user.bulk_create_users(large_db, rows)
+            large_db.commit()
+
+        # Then
+        assert duplicates == []
+        assert queries.count < 20
+        assert _count_users(large_db) == total + 1000
@@ -0,0 +1,112 @@
+import pytest
+import uuid
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.exc import NoResultFound
+
+from app.models import User, UserArchive
+from app.schemas.user import UserPartialUpdate
+from app.services import archive as service_archive
+from app.services import user as service_user
+from app.services.exceptions import DuplicateUserError
+from tests.factories import UserFactory
+
+
+@pytest.fixture
+def stale_user(db):
+    UserFactory._meta.sqlalchemy_session = db
+    long_ago = datetime.now(timezone.utc) - timedelta(days=400)
+    user = UserFactory(
+        username="stale", active=False, created_at=long_ago, updated_at=long_ago
+    )
+    # Archiving commits and expires instances, so tests work with the id.
+    return user.id
+
+
+class TestArchiveService:
+    def test_archive_moves_only_stale_inactive_users(self, db, stale_user, user):
+        # Given
+        user_id = user.id
+
+        # When
+        archived = service_archive.archive_inactive_users(db, timedelta(days=365))
+
+        # Then
+        assert archived == 1
+        assert db.get(User, stale_user) is None
+        assert db.get(UserArchive, stale_user) is not None
+        assert db.get(User, user_id) is not None
+
+    def test_archive_in_batches(self, db):
+        # Given
+        UserFactory._meta.sqlalchemy_session = db
+        long_ago = datetime.now(timezone.utc) - timedelta(days=400)
+        UserFactory.create_batch(5, active=False, updated_at=long_ago)
+
+        # When
+        archived = service_archive.archive_inactive_users(
+            db, timedelta(days=365), batch_size=2
+        )
+
+        # Then
+        assert archived == 5
+        assert db.query(UserArchive).count() == 5
+
+    def test_get_user_by_id_falls_back_to_archive(self, db, stale_user):
+        # Given
+        service_archive.archive_inactive_users(db, timedelta(days=365))
+
+        # When
+        fetched = service_user.get_user_by_id(db, stale_user)
+
+        # Then
+        assert fetched.username == "stale"
+
+    def test_get_user_out_falls_back_to_archive(self, db, stale_user):
+        # Given
+        service_archive.archive_inactive_users(db, timedelta(days=365))
+
+        # When
+        fetched = service_user.get_user_out(db, stale_user)
+
+        # Then
+        assert fetched.id == stale_user
+        assert fetched.username == "stale"
+
+    def test_update_restores_archived_user(self, db, stale_user):
+        # Given
+        service_archive.archive_inactive_users(db, timedelta(days=365))
+
+        # When
+        updated = service_user.update_user(
+            db, stale_user, UserPartialUpdate(active=True)
+        )
+
+        # Then
+        assert isinstance(updated, User)
+        assert updated.active is True
+        assert db.get(UserArchive, stale_user) is None
+
+    def test_restore_user(self, db, stale_user):
+        # Given
+        service_archive.archive_inactive_users(db, timedelta(days=365))
+
+        # When
+        restored = service_archive.restore_user(db, stale_user)
+
+        # Then
+        assert restored.id == stale_user
+        assert db.get(UserArchive, stale_user) is None
+
+    def test_restore_user_duplicate(self, db, stale_user):
+        # Given
+        service_archive.archive_inactive_users(db, timedelta(days=365))
+        UserFactory(username="STALE")
+
+        # When and then
+        with pytest.raises(DuplicateUserError):
+            service_archive.restore_user(db, stale_user)
+
+    def test_restore_user_not_archived(self, db):
+        # Given when and then
+        with pytest.raises(NoResultFound):
+            service_archive.restore_user(db, uuid.uuid4())
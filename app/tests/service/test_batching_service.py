@@ -0,0 +1,175 @@
+import pytest
+import threading
+import time
+import uuid
+from sqlalchemy import event
+from sqlalchemy.exc import NoResultFound
+
+from app.models import User
+from app.schemas.user import UserCreate, UserPartialUpdate
+from app.services.batching import (
+    WriteBatcher,
+    WriteBatcherUnavailableError,
+    _Write,
+)
+from app.services.exceptions import DuplicateUserError
+from app.services import user as user_service
+from app.services.page_cache import user_pages
+
+
+def _user_create(username):
+    return UserCreate(
+        username=username,
+        email=f"{username}@example.com",
+        first_name="Batch",
+        last_name="User",
+        role="user",
+    )
+
+
+def batcher_create(db, username):
+    return user_service._insert_user(db, _user_create(username))
+
+
+@pytest.fixture
+def batcher(session_factory):
+    batcher = WriteBatcher(session_factory, max_items=50, max_wait_ms=50)
+    batcher.start()
+    yield batcher
+    batcher.stop()
+
+
+class TestWriteBatcher:
+    def test_concurrent_creates_share_a_transaction(self, db, batcher):
+        # Given
+        usernames = [f"batched{n}" for n in range(8)] + ["batched0"]
+        results, errors = [], []
+
+        def create(username):
+            try:
+                results.append(batcher.create_user(_user_create(username)))
+            except DuplicateUserError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=create, args=(u,)) for u in usernames]
+
+        # When
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Then
+        assert len(results) == 8
+        assert len(errors) == 1
+        assert db.query(User).count() == 8
+        assert batcher.stats()["batches"] < len(usernames)
+
+    def test_update_user(self, db, batcher, user):
+        # Given
+        user_id = user.id
+
+        # When
+        updated = batcher.update_user(user_id, UserPartialUpdate(first_name="Grouped"))
+
+        # Then
+        assert updated.first_name == "Grouped"
+
+    def test_update_user_not_found(self, batcher):
+        # Given when and then
+        with pytest.raises(NoResultFound):
+            batcher.update_user(uuid.uuid4(), UserPartialUpdate(first_name="X"))
+
+    def test_side_effects_run_after_the_batch_commits(
+        self, session_factory, monkeypatch
+    ):
+        # Given
+        order = []
+        monkeypatch.setattr(user_pages, "bump", lambda: order.append("bump"))
+
+        def make_session():
+            db = session_factory()
+
+            @event.listens_for(db, "before_commit")
+            def _commit(session):
+                if session.get_nested_transaction() is None:
+                    order.append("commit")
+
+            return db
+
+        batcher = WriteBatcher(make_session)
+        writes = [
+            _Write(lambda db, u=u: batcher_create(db, u)) for u in ("first", "second")
+        ]
+
+        # When
+        batcher.apply_batch(writes)
+
+        # Then
+        assert [write.future.result().username for write in writes] == [
+            "first",
+            "second",
+        ]
+        assert order == ["commit", "bump", "bump"]
+
+    def test_side_effects_skipped_when_the_batch_fails(
+        self, session_factory, monkeypatch
+    ):
+        # Given
+        bumps = []
+        monkeypatch.setattr(user_pages, "bump", lambda: bumps.append(1))
+
+        def make_session():
+            db = session_factory()
+
+            @event.listens_for(db, "before_commit")
+            def _fail(session):
+                if session.get_nested_transaction() is None:
+                    raise RuntimeError("commit failed")
+
+            return db
+
+        batcher = WriteBatcher(make_session)
+        write = _Write(lambda db: batcher_create(db, "failed"))
+
+        # When
+        batcher.apply_batch([write])
+
+        # Then
+        with pytest.raises(RuntimeError):
+            write.future.result()
+        assert bumps == []
+
+    def test_submit_times_out(self, session_factory):
+        # Given
+        batcher = WriteBatcher(session_factory, timeout=0.05)
+
+        # When and then
+        with pytest.raises(WriteBatcherUnavailableError):
+            batcher.create_user(_user_create("late"))
+        assert batcher._queue.get_nowait().future.cancelled()
+
+    def test_stop_fails_queued_writes(self, session_factory):
+        # Given
+        batcher = WriteBatcher(session_factory, timeout=5)
+        errors = []
+
+        def create():
+            try:
+                batcher.create_user(_user_create("queued"))
+            except WriteBatcherUnavailableError as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=create)
+        thread.start()
+        while batcher.stats()["queued"] == 0:
+            time.sleep(0.001)
+
+        # When
+        batcher.stop()
+        thread.join()
+
+        # Then
+        assert len(errors) == 1
+        with pytest.raises(WriteBatcherUnavailableError):
+            batcher.create_user(_user_create("after"))
@@ -0,0 +1,127 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from sqlalchemy import update
+
+from app.models import User, UserTombstone
+from app.schemas.user import UserPartialUpdate
+from app.services import changes as service_changes
+from app.services import user as service_user
+
+
+def _now():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+@pytest.fixture(autouse=True)
+def no_safety_lag(monkeypatch):
+    monkeypatch.setattr(service_changes, "USER_SYNC_SAFETY_LAG_SECONDS", -60)
+
+
+class TestUserChangesService:
+    def test_full_sync_pages_through_all_users(self, db, multiple_users):
+        # Given
+        seen, since, has_more = [], None, True
+
+        # When
+        while has_more:
+            page = service_changes.get_user_changes(db, since, limit=2)
+            seen += [user.id for user in page.items]
+            since, has_more = page.next_cursor, page.has_more
+
+        # Then
+        assert sorted(seen) == sorted(user.id for user in multiple_users)
+
+    def test_changes_since_cursor(self, db, multiple_users):
+        # Given
+        cursor = service_changes.get_user_changes(db, None, limit=100).next_cursor
+        updated_id = multiple_users[2].id
+        deleted_id = multiple_users[3].id
+        service_user.update_user(db, updated_id, UserPartialUpdate(first_name="New"))
+        service_user.delete_user(db, deleted_id)
+
+        # When
+        page = service_changes.get_user_changes(db, cursor, limit=100)
+
+        # Then
+        assert [user.id for user in page.items] == [updated_id]
+        assert [tombstone.id for tombstone in page.deleted] == [deleted_id]
+        assert page.has_more is False
+
+    def test_no_changes_keeps_cursor_position(self, db, multiple_users):
+        # Given
+        cursor = service_changes.get_user_changes(db, None, limit=100).next_cursor
+
+        # When
+        page = service_changes.get_user_changes(db, cursor, limit=100)
+
+        # Then
+        assert page.items == []
+        position = service_changes.decode_cursor(page.next_cursor)[:2]
+        assert position == service_changes.decode_cursor(cursor)[:2]
+
+    def test_no_changes_renews_cursor(self, db, multiple_users):
+        # Given
+        changed_at, user_id, _ = service_changes.decode_cursor(
+            service_changes.get_user_changes(db, None, limit=100).next_cursor
+        )
+        cursor = service_changes.encode_cursor(
+            changed_at, user_id, _now() - timedelta(days=29)
+        )
+
+        # When
+        page = service_changes.get_user_changes(db, cursor, limit=100)
+
+        # Then
+        issued_at = service_changes.decode_cursor(page.next_cursor)[2]
+        assert issued_at > _now() - timedelta(minutes=1)
+
+    def test_full_sync_of_users_older_than_retention(self, db, multiple_users):
+        # Given
+        db.execute(update(User).values(updated_at=_now() - timedelta(days=400)))
+        db.commit()
+        seen, since, has_more = [], None, True
+
+        # When
+        while has_more:
+            page = service_changes.get_user_changes(db, since, limit=2)
+            seen += [user.id for user in page.items]
+            since, has_more = page.next_cursor, page.has_more
+
+        # Then
+        assert sorted(seen) == sorted(user.id for user in multiple_users)
+
+    def test_invalid_cursor(self, db):
+        # Given when and then
+        with pytest.raises(service_changes.InvalidCursorError):
+            service_changes.get_user_changes(db, "not-a-cursor", limit=10)
+
+    def test_cursor_older_than_retention(self, db):
+        # Given
+        cursor = service_changes.encode_cursor(
+            _now(), uuid.uuid4(), _now() - timedelta(days=31)
+        )
+
+        # When and then
+        with pytest.raises(service_changes.ExpiredCursorError):
+            service_changes.get_user_changes(db, cursor, limit=10)
+
+
+class TestTombstonePurge:
+    def test_purges_tombstones_older_than_retention(self, db):
+        # Given
+        kept = UserTombstone(user_id=uuid.uuid4(), deleted_at=_now())
+        expired = UserTombstone(
+            user_id=uuid.uuid4(), deleted_at=_now() - timedelta(days=31)
+        )
+        db.add_all([kept, expired])
+        db.commit()
+
+        # When
+        purged = service_changes.purge_tombstones(db)
+
+        # Then
+        assert purged == 1
+        assert db.query(UserTombstone.user_id).all() == [(kept.user_id,)]
@@ -0,0 +1,116 @@
+import asyncio
+import json
+
+from app.schemas.user import UserCreate, UserPartialUpdate
+from app.services import events as service_events
+from app.services import user as service_user
+
+
+def _user_create(username):
+    return UserCreate(
+        username=username,
+        email=f"{username}@example.com",
+        first_name="Event",
+        last_name="User",
+        role="user",
+    )
+
+
+def _collect(action, timeout=0.2):
+    """Runs ``action`` while subscribed to the bus and returns the events."""
+
+    async def main():
+        subscriber = service_events.bus.subscribe()
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, action)
+            frames = await subscriber.get(timeout)
+        finally:
+            service_events.bus.unsubscribe(subscriber)
+        return [json.loads(frame.split("data: ", 1)[1]) for frame in frames], subscriber
+
+    return asyncio.run(main())
+
+
+class TestEventBus:
+    def test_subscriber_drops_oldest_when_full(self):
+        # Given
+        async def main():
+            bus = service_events.EventBus(buffer_size=2)
+            subscriber = bus.subscribe()
+            for n in range(5):
+                bus.publish(service_events.encode_event("test", {"n": n}))
+            return await subscriber.get(0.1), subscriber
+
+        # When
+        frames, subscriber = asyncio.run(main())
+
+        # Then
+        assert [json.loads(f.split("data: ", 1)[1])["data"]["n"] for f in frames] == [
+            3,
+            4,
+        ]
+        assert subscriber.dropped == 3
+
+    def test_get_times_out_without_events(self):
+        # Given
+        async def main():
+            return await service_events.EventBus().subscribe().get(0.01)
+
+        # When and then
+        assert asyncio.run(main()) == []
+
+
+class TestUserEvents:
+    def test_create_update_delete_publish_events(self, db):
+        # Given
+        def action():
+            user = service_user.create_user(db, _user_create("evented"))
+            service_user.update_user(db, user.id, UserPartialUpdate(first_name="X"))
+            service_user.delete_user(db, user.id)
+
+        # When
+        received, _ = _collect(action)
+
+        # Then
+        assert [event["type"] for event in received] == [
+            service_events.USER_CREATED,
+            service_events.USER_UPDATED,
+            service_events.USER_DELETED,
+        ]
+        assert received[0]["data"]["username"] == "evented"
+        assert received[1]["data"]["first_name"] == "X"
+
+    def test_failed_write_publishes_nothing(self, db):
+        # Given
+        service_user.create_user(db, _user_create("taken"))
+
+        def action():
+            try:
+                service_user.create_user(db, _user_create("taken"))
+            except Exception:
+                pass
+
+        # When
+        received, _ = _collect(action, timeout=0.05)
+
+        # Then
+        assert received == []
+
+    def test_bulk_create_publishes_one_event_per_user_on_commit(self, db):
+        # Given
+        rows = [_user_create(f"bulk{n}").model_dump() for n in range(3)]
+
+        def action():
+            service_user.bulk_create_users(db, rows)
+            db.commit()
+
+        # When
+        received, _ = _collect(action)
+
+        # Then
+        assert [event["data"]["username"] for event in received] == [
+            "bulk0",
+            "bulk1",
+            "bulk2",
+        ]
+        assert {event["type"] for event in received} == {service_events.USER_CREATED}
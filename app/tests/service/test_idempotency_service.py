@@ -0,0 +1,238 @@
+import threading
+import time
+
+import pytest
+
+from app.services.idempotency import (
+    DatabaseIdempotencyStore,
+    IdempotencyKeyInProgressError,
+    IdempotencyKeyReusedError,
+    MemoryIdempotencyStore,
+)
+
+
+@pytest.fixture(params=["memory", "database"])
+def store(request):
+    if request.param == "memory":
+        return MemoryIdempotencyStore(max_keys=100, ttl=60, wait=1)
+    # Requests run concurrently in these tests, each in its own transaction.
+    return DatabaseIdempotencyStore(
+        request.getfixturevalue("committed_session_factory"),
+        ttl=60,
+        wait=1,
+        claim_timeout=60,
+    )
+
+
+def _counting_write(calls, status_code=201):
+    def write():
+        calls.append(1)
+        return status_code, b'{"n":%d}' % len(calls)
+
+    return write
+
+
+class TestIdempotencyStore:
+    def test_replays_first_response(self, store):
+        # Given
+        calls = []
+        store.run("key", "fp", _counting_write(calls))
+
+        # When
+        result = store.run("key", "fp", _counting_write(calls))
+
+        # Then
+        assert result == (201, b'{"n":1}', True)
+        assert len(calls) == 1
+
+    def test_client_errors_are_replayed(self, store):
+        # Given
+        calls = []
+        store.run("key", "fp", _counting_write(calls, status_code=400))
+
+        # When
+        status_code, _, replayed = store.run("key", "fp", _counting_write(calls))
+
+        # Then
+        assert (status_code, replayed) == (400, True)
+        assert len(calls) == 1
+
+    def test_server_errors_release_the_key(self, store):
+        # Given
+        calls = []
+        store.run("key", "fp", _counting_write(calls, status_code=503))
+
+        # When
+        status_code, _, replayed = store.run("key", "fp", _counting_write(calls))
+
+        # Then
+        assert (status_code, replayed) == (201, False)
+        assert len(calls) == 2
+
+    def test_exceptions_release_the_key(self, store):
+        # Given
+        def fail():
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            store.run("key", "fp", fail)
+
+        # When
+        result = store.run("key", "fp", _counting_write([]))
+
+        # Then
+        assert result == (201, b'{"n":1}', False)
+
+    def test_key_reused_with_another_request(self, store):
+        # Given
+        store.run("key", "fp", _counting_write([]))
+
+        # When and then
+        with pytest.raises(IdempotencyKeyReusedError):
+            store.run("key", "other", _counting_write([]))
+
+    def test_concurrent_duplicate_waits_for_the_first(self, store):
+        # Given
+        calls = []
+        started = threading.Event()
+
+        def slow_write():
+            started.set()
+            time.sleep(0.2)
+            return _counting_write(calls)()
+
+        first = threading.Thread(target=store.run, args=("key", "fp", slow_write))
+        first.start()
+        started.wait()
+
+        # When
+        result = store.run("key", "fp", _counting_write(calls))
+        first.join()
+
+        # Then
+        assert result == (201, b'{"n":1}', True)
+        assert len(calls) == 1
+        assert store.stats()["waits"] == 1
+
+    def test_gives_up_waiting(self, store):
+        # Given
+        store.wait = 0.1
+        release = threading.Event()
+
+        def blocked_write():
+            release.wait()
+            return 201, b"{}"
+
+        first = threading.Thread(target=store.run, args=("key", "fp", blocked_write))
+        first.start()
+        time.sleep(0.05)
+
+        # When and then
+        try:
+            with pytest.raises(IdempotencyKeyInProgressError):
+                store.run("key", "fp", _counting_write([]))
+        finally:
+            release.set()
+            first.join()
+
+
+class TestMemoryIdempotencyStore:
+    def test_evicts_least_recently_used_keys(self):
+        # Given
+        store = MemoryIdempotencyStore(max_keys=2, ttl=60, wait=1)
+        for key in ("a", "b", "c"):
+            store.run(key, "fp", _counting_write([]))
+
+        # When
+        _, _, replayed = store.run("a", "fp", _counting_write([]))
+
+        # Then
+        assert not replayed
+
+    def test_running_keys_are_not_evicted(self):
+        # Given
+        store = MemoryIdempotencyStore(max_keys=1, ttl=60, wait=5)
+        calls = []
+        started, finish = threading.Event(), threading.Event()
+
+        def slow_write():
+            calls.append(1)
+            started.set()
+            finish.wait()
+            return 201, b"{}"
+
+        first = threading.Thread(target=store.run, args=("a", "fp", slow_write))
+        first.start()
+        started.wait()
+        store.run("b", "fp", _counting_write([]))
+
+        # When
+        retry = threading.Thread(target=store.run, args=("a", "fp", slow_write))
+        retry.start()
+        while store.waits == 0 and len(calls) == 1:
+            time.sleep(0.001)
+        finish.set()
+        first.join()
+        retry.join()
+
+        # Then
+        assert calls == [1]
+
+    def test_expired_keys_run_again(self):
+        # Given
+        store = MemoryIdempotencyStore(max_keys=10, ttl=0, wait=1)
+        store.run("key", "fp", _counting_write([]))
+
+        # When
+        _, _, replayed = store.run("key", "fp", _counting_write([]))
+
+        # Then
+        assert not replayed
+
+
+class TestDatabaseIdempotencyStore:
+    def test_purge_drops_expired_keys(self, session_factory):
+        # Given
+        store = DatabaseIdempotencyStore(
+            session_factory, ttl=0, wait=1, claim_timeout=60
+        )
+        store.run("key", "fp", _counting_write([]))
+
+        # When
+        purged = store.purge()
+
+        # Then
+        assert purged == 1
+
+    def test_abandoned_claim_is_taken_over(self, session_factory):
+        # Given
+        store = DatabaseIdempotencyStore(
+            session_factory, ttl=60, wait=1, claim_timeout=0
+        )
+        store.claim("key", "fp")
+
+        # When
+        _, _, replayed = store.run("key", "fp", _counting_write([]))
+
+        # Then
+        assert not replayed
+
+    def test_waiters_poll_without_claiming(self, committed_session_factory):
+        # Given
+        store = DatabaseIdempotencyStore(
+            committed_session_factory, ttl=60, wait=5, claim_timeout=60
+        )
+        _, entry = store.claim("key", "fp")
+        claims = []
+        claim = store.claim
+        store.claim = lambda *args: claims.append(1) or claim(*args)
+        finisher = threading.Timer(0.3, store.save, ("key", entry, 201, b"{}"))
+
+        # When
+        finisher.start()
+        status_code, _, replayed = store.run("key", "fp", _counting_write([]))
+        finisher.join()
+
+        # Then
+        assert (status_code, replayed) == (201, True)
+        assert len(claims) == 2
@@ -0,0 +1,125 @@
+import json
+import pytest
+import uuid
+
+from app.models import User
+from app.models.job import JobStatus
+from app.services import jobs as service_jobs
+
+
+def _user_payload(n):
+    return {
+        "username": f"bulk{n}",
+        "email": f"bulk{n}@example.com",
+        "first_name": "Bulk",
+        "last_name": "User",
+        "role": "user",
+    }
+
+
+def _run(db, kind, payload, total=None):
+    service_jobs.enqueue_job(db, kind, payload, total)
+    job = service_jobs.claim_next_job(db)
+    return service_jobs.process_job(db, job)
+
+
+class TestJobQueueService:
+    def test_claim_next_job_marks_running(self, db):
+        # Given
+        queued = service_jobs.enqueue_job(db, service_jobs.EXPORT_USERS, {})
+
+        # When
+        job = service_jobs.claim_next_job(db)
+
+        # Then
+        assert job.id == queued.id
+        assert job.status == JobStatus.RUNNING
+        assert service_jobs.claim_next_job(db) is None
+
+    def test_requeue_stale_jobs(self, db):
+        # Given
+        service_jobs.enqueue_job(db, service_jobs.EXPORT_USERS, {})
+        service_jobs.claim_next_job(db)
+
+        # When
+        requeued = service_jobs.requeue_stale_jobs(db, stale_after=-1)
+
+        # Then
+        assert requeued == 1
+
+
+class TestImportJobService:
+    def test_import_users(self, db, monkeypatch):
+        # Given
+        monkeypatch.setattr(service_jobs, "JOB_CHUNK_SIZE", 2)
+        users = [_user_payload(n) for n in range(5)]
+        users.append(_user_payload(0))
+        users.append({"username": "x"})
+
+        # When
+        job = _run(db, service_jobs.IMPORT_USERS, {"users": users}, len(users))
+
+        # Then
+        assert job.status == JobStatus.SUCCEEDED
+        assert job.processed == 7
+        assert job.result["created"] == 5
+        assert job.result["failed"] == 2
+        assert [e["index"] for e in job.result["errors"]] == [5, 6]
+        assert db.query(User).count() == 5
+
+    def test_import_resumes_from_checkpoint(self, db, monkeypatch):
+        # Given
+        monkeypatch.setattr(service_jobs, "JOB_CHUNK_SIZE", 2)
+        users = [_user_payload(n) for n in range(4)]
+        job = service_jobs.enqueue_job(
+            db, service_jobs.IMPORT_USERS, {"users": users}, len(users)
+        )
+        job.checkpoint = {"offset": 2}
+        job.result = {"created": 2, "failed": 0, "errors": []}
+        db.commit()
+
+        # When
+        job = service_jobs.process_job(db, service_jobs.claim_next_job(db))
+
+        # Then
+        assert job.result["created"] == 4
+        assert db.query(User).count() == 2
+
+
+class TestDeactivateJobService:
+    def test_deactivate_users(self, db, multiple_users):
+        # Given
+        ids = [str(u.id) for u in multiple_users[:3]] + [str(uuid.uuid4())]
+
+        # When
+        job = _run(db, service_jobs.DEACTIVATE_USERS, {"ids": ids}, len(ids))
+
+        # Then
+        assert job.status == JobStatus.SUCCEEDED
+        assert job.result["deactivated"] == 3
+        assert db.query(User).filter(User.active.is_(False)).count() == 3
+
+
+class TestExportJobService:
+    def test_export_users(self, db, multiple_users, tmp_path, monkeypatch):
+        # Given
+        monkeypatch.setattr(service_jobs, "JOB_EXPORT_DIR", str(tmp_path))
+        monkeypatch.setattr(service_jobs, "JOB_CHUNK_SIZE", 2)
+
+        # When
+        job = _run(db, service_jobs.EXPORT_USERS, {"format": "jsonl"})
+
+        # Then
+        assert job.status == JobStatus.SUCCEEDED
+        assert job.total == 5
+        with open(job.result["path"]) as fh:
+            lines = [json.loads(line) for line in fh]
+        assert len(lines) == 5
+        assert lines == sorted(lines, key=lambda u: uuid.UUID(u["id"]))
+
+    def test_unknown_job_kind_fails(self, db):
+        # Given and when
+        job = _run(db, "unknown", {})
+
+        # Then
+        assert job.status == JobStatus.FAILED
@@ -0,0 +1,110 @@
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.schemas.user import UserCreate, UserPartialUpdate
+from app.services import membership
+from app.services import user as service_user
+from app.services.exceptions import DuplicateUserError
+from app.services.membership import BloomFilter, MembershipIndex
+
+
+@pytest.fixture
+def index(db, monkeypatch):
+    index = MembershipIndex(capacity=1000, error_rate=0.01)
+    monkeypatch.setattr(membership, "index", index)
+    return index
+
+
+def _rebuild(db, index):
+    index.rebuild(
+        sessionmaker(bind=db.get_bind(), join_transaction_mode="create_savepoint")
+    )
+
+
+def _user_create(username, email=None):
+    return UserCreate(
+        username=username,
+        email=email or f"{username}@example.com",
+        first_name="Member",
+        last_name="User",
+        role="user",
+    )
+
+
+class TestBloomFilter:
+    def test_no_false_negatives(self):
+        # Given
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        values = [f"user{n}" for n in range(1000)]
+
+        # When
+        for value in values:
+            bloom.add(value)
+
+        # Then
+        assert all(value in bloom for value in values)
+        false_positives = sum(f"other{n}" in bloom for n in range(1000))
+        assert false_positives < 50
+
+
+class TestMembershipService:
+    def test_not_ready_index_checks_the_database(self, db, user, index):
+        # Given and when
+        taken = membership.is_taken(db, membership.USERNAME, "USERNAME")
+
+        # Then
+        assert taken
+        assert index.stats()["skipped_lookups"] == 0
+
+    def test_free_names_skip_the_database(self, db, user, index):
+        # Given
+        _rebuild(db, index)
+
+        # When
+        availability = membership.check_availability(db, "free", "USERNAME@example.com")
+
+        # Then
+        assert availability.username is True
+        assert availability.email is False
+        assert index.stats()["skipped_lookups"] == 1
+        assert index.stats()["confirmed_lookups"] == 1
+
+    def test_duplicates_are_rejected_before_writing(self, db, user, index):
+        # Given
+        _rebuild(db, index)
+
+        # When and then
+        with pytest.raises(DuplicateUserError):
+            service_user.create_user(db, _user_create("Username", "new@example.com"))
+        assert index.stats()["confirmed_lookups"] == 1
+
+    def test_writes_are_recorded(self, db, index):
+        # Given
+        _rebuild(db, index)
+        user = service_user.create_user(db, _user_create("created"))
+
+        # When
+        service_user.update_user(db, user.id, UserPartialUpdate(username="renamed"))
+
+        # Then
+        assert index.might_exist(membership.USERNAME, "CREATED")
+        assert index.might_exist(membership.USERNAME, "renamed")
+        assert membership.is_taken(db, membership.USERNAME, "renamed")
+        assert not membership.is_taken(db, membership.USERNAME, "created")
+
+    def test_bulk_create_drops_known_duplicates(self, db, user, index):
+        # Given
+        _rebuild(db, index)
+        rows = [
+            _user_create("bulk1").model_dump(),
+            _user_create("username", "other@example.com").model_dump(),
+            _user_create("bulk2").model_dump(),
+        ]
+
+        # When
+        duplicates = service_user.bulk_create_users(db, rows)
+        db.commit()
+
+        # Then
+        assert duplicates == [1]
+        assert index.might_exist(membership.USERNAME, "bulk2")
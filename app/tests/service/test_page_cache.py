@@ -0,0 +1,70 @@
+from app.services.page_cache import PageCache
+
+
+class TestPageCache:
+    def test_hits_until_bumped(self):
+        # Given
+        cache = PageCache("test_pages", max_entries=2)
+        loads = []
+
+        def load():
+            loads.append(1)
+            return b"page"
+
+        # When
+        cache.get_or_load((1, 50), load)
+        cache.get_or_load((1, 50), load)
+        cache.bump()
+        cache.get_or_load((1, 50), load)
+
+        # Then
+        assert len(loads) == 2
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["invalidations"] == 1
+
+    def test_is_bounded(self):
+        # Given
+        cache = PageCache("test_pages", max_entries=2)
+
+        # When
+        for page in range(3):
+            cache.get_or_load((page, 50), lambda: b"page")
+
+        # Then
+        assert cache.stats()["size"] == 2
+
+    def test_page_loaded_during_a_write_is_not_cached(self):
+        # Given
+        cache = PageCache("test_pages", max_entries=2)
+
+        def load():
+            cache.bump()
+            return b"stale"
+
+        # When
+        cache.get_or_load((1, 50), load)
+
+        # Then
+        assert cache.get_or_load((1, 50), lambda: b"fresh") == b"fresh"
+
+    def test_max_staleness(self):
+        # Given
+        cache = PageCache("test_pages", max_entries=2, max_staleness=0)
+        cache.get_or_load((1, 50), lambda: b"old")
+
+        # When
+        page = cache.get_or_load((1, 50), lambda: b"new")
+
+        # Then
+        assert page == b"new"
+
+    def test_disabled(self):
+        # Given
+        cache = PageCache("test_pages", max_entries=0)
+        cache.get_or_load((1, 50), lambda: b"old")
+
+        # When
+        page = cache.get_or_load((1, 50), lambda: b"new")
+
+        # Then
+        assert page == b"new"
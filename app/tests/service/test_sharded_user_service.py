@@ -0,0 +1,175 @@
+import json
+
+import pytest
+from fastapi_pagination import Params
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from app.db import Base
+from app.db.sharding import create_sharded_sessionmaker, shard_for
+from app.models import User, UserIdentity
+from app.schemas.user import UserCreate, UserPartialUpdate
+from app.services import jobs as service_jobs
+from app.services import stats as service_stats
+from app.services import user as service_user
+from app.services.exceptions import DuplicateUserError
+
+SHARDS = 3
+
+
+@pytest.fixture
+def engines(tmp_path):
+    engines = {
+        str(n): create_engine(f"sqlite:///{tmp_path}/shard{n}.db")
+        for n in range(SHARDS)
+    }
+    for engine in engines.values():
+        Base.metadata.create_all(bind=engine)
+    yield engines
+    for engine in engines.values():
+        engine.dispose()
+
+
+@pytest.fixture
+def sharded_db(engines):
+    db = create_sharded_sessionmaker(engines)()
+    yield db
+    db.close()
+
+
+def _user_create(username, email=None):
+    return UserCreate(
+        username=username,
+        email=email or f"{username}@example.com",
+        first_name="Shard",
+        last_name="User",
+        role="user",
+    )
+
+
+def _count(engine):
+    with Session(bind=engine) as db:
+        return db.scalar(select(func.count()).select_from(User))
+
+
+class TestShardedUserService:
+    def test_users_are_stored_in_their_shard(self, sharded_db, engines):
+        # Given and when
+        users = [
+            service_user.create_user(sharded_db, _user_create(f"sharded{n}"))
+            for n in range(12)
+        ]
+
+        # Then
+        for user in users:
+            with Session(bind=engines[shard_for(user.id, SHARDS)]) as shard:
+                assert shard.get(User, user.id) is not None
+        assert sum(_count(engine) for engine in engines.values()) == 12
+
+    def test_point_reads_and_writes(self, sharded_db):
+        # Given
+        user_id = service_user.create_user(sharded_db, _user_create("point")).id
+
+        # When
+        service_user.update_user(
+            sharded_db, user_id, UserPartialUpdate(first_name="Routed")
+        )
+        fetched = service_user.get_user_by_id(sharded_db, user_id)
+
+        # Then
+        assert fetched.first_name == "Routed"
+
+    def test_uniqueness_is_global(self, sharded_db):
+        # Given
+        service_user.create_user(sharded_db, _user_create("unique"))
+
+        # When and then
+        with pytest.raises(DuplicateUserError):
+            service_user.create_user(
+                sharded_db, _user_create("UNIQUE", email="other@example.com")
+            )
+
+    def test_update_and_delete_release_identities(self, sharded_db):
+        # Given
+        first = service_user.create_user(sharded_db, _user_create("renamed")).id
+        second = service_user.create_user(sharded_db, _user_create("deleted")).id
+
+        # When
+        service_user.update_user(
+            sharded_db, first, UserPartialUpdate(username="renamed2")
+        )
+        service_user.delete_user(sharded_db, second)
+
+        # Then
+        service_user.create_user(
+            sharded_db, _user_create("renamed", email="renamed-new@example.com")
+        )
+        service_user.create_user(sharded_db, _user_create("deleted"))
+        assert sharded_db.query(UserIdentity).count() == 6
+
+    def test_list_users_merges_shards(self, sharded_db):
+        # Given
+        for n in range(7):
+            service_user.create_user(sharded_db, _user_create(f"listed{n}"))
+
+        # When
+        first = service_user.get_users(sharded_db, Params(page=1, size=4))
+        second = service_user.get_users(sharded_db, Params(page=2, size=4))
+
+        # Then
+        assert first.total == 7
+        items = first.items + second.items
+        assert [u.username for u in items] == [f"listed{n}" for n in range(7)]
+
+    def test_bulk_import_routes_rows(self, sharded_db, engines):
+        # Given
+        rows = [_user_create(f"bulk{n}").model_dump() for n in range(6)]
+        rows.append(_user_create("BULK0").model_dump())
+
+        # When
+        duplicates = service_user.bulk_create_users(sharded_db, rows)
+        sharded_db.commit()
+
+        # Then
+        assert duplicates == [6]
+        assert sum(_count(engine) for engine in engines.values()) == 6
+
+    def test_export_job_across_shards(self, sharded_db, tmp_path, monkeypatch):
+        # Given
+        monkeypatch.setattr(service_jobs, "JOB_EXPORT_DIR", str(tmp_path))
+        monkeypatch.setattr(service_jobs, "JOB_CHUNK_SIZE", 2)
+        for n in range(5):
+            service_user.create_user(sharded_db, _user_create(f"exported{n}"))
+        service_jobs.enqueue_job(sharded_db, service_jobs.EXPORT_USERS, {})
+
+        # When
+        job = service_jobs.process_job(
+            sharded_db, service_jobs.claim_next_job(sharded_db)
+        )
+
+        # Then
+        assert job.total == 5
+        assert job.processed == 5
+
+    def test_list_users_page_is_serialized(self, sharded_db):
+        # Given
+        service_user.create_user(sharded_db, _user_create("serialized"))
+
+        # When
+        page = json.loads(service_user.get_users_page(sharded_db, Params()))
+
+        # Then
+        assert page["total"] == 1
+        assert page["items"][0]["username"] == "serialized"
+
+    def test_stats_across_shards(self, sharded_db):
+        # Given
+        for n in range(5):
+            service_user.create_user(sharded_db, _user_create(f"counted{n}"))
+
+        # When
+        stats = service_stats.get_user_stats(sharded_db, days=1)
+
+        # Then
+        assert stats.total == 5
+        assert service_stats.reconcile_user_stats(sharded_db) == 0
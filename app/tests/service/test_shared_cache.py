@@ -0,0 +1,141 @@
+import os
+import subprocess
+import sys
+import uuid
+
+import pytest
+
+from app.schemas.user import UserPartialUpdate
+from app.services import shared_cache
+from app.services import user as service_user
+from app.services.shared_cache import SharedUserCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = SharedUserCache(str(tmp_path / "users.cache"), slots=64, slot_bytes=1024)
+    yield cache
+    cache.close()
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+# Runs in a fresh interpreter (-I) with only the repository root added to the
+# path: the test's own path has app/ on it, whose logging.py would shadow the
+# standard library module.
+_FILL_FROM_OTHER_PROCESS = """
+import sys, uuid
+sys.path.insert(0, sys.argv[1])
+from app.services.shared_cache import SharedUserCache
+cache = SharedUserCache(sys.argv[2], slots=64, slot_bytes=1024)
+user_id = uuid.UUID(sys.argv[3])
+_, epoch = cache.get(user_id)
+cache.fill(user_id, epoch, b"from another worker")
+cache.close()
+"""
+
+
+class TestSharedUserCache:
+    def test_fill_and_get(self, cache):
+        # Given
+        user_id = uuid.uuid4()
+        _, epoch = cache.get(user_id)
+
+        # When
+        stored = cache.fill(user_id, epoch, b"payload")
+
+        # Then
+        assert stored
+        assert cache.get(user_id)[0] == b"payload"
+        assert cache.get(uuid.uuid4())[0] is None
+
+    def test_read_before_invalidation_is_not_stored(self, cache):
+        # Given
+        user_id = uuid.uuid4()
+        _, epoch = cache.get(user_id)
+        cache.invalidate(user_id)
+
+        # When
+        stored = cache.fill(user_id, epoch, b"stale")
+
+        # Then
+        assert not stored
+        assert cache.get(user_id)[0] is None
+
+    def test_invalidate_drops_entry(self, cache):
+        # Given
+        user_id = uuid.uuid4()
+        cache.fill(user_id, cache.get(user_id)[1], b"payload")
+
+        # When
+        cache.invalidate(user_id)
+
+        # Then
+        assert cache.get(user_id)[0] is None
+
+    def test_oversized_payload_is_skipped(self, cache):
+        # Given
+        user_id = uuid.uuid4()
+
+        # When
+        stored = cache.fill(user_id, cache.get(user_id)[1], b"x" * 1024)
+
+        # Then
+        assert not stored
+
+    def test_shared_between_processes(self, cache):
+        # Given
+        user_id = uuid.uuid4()
+        command = [sys.executable, "-I", "-c", _FILL_FROM_OTHER_PROCESS]
+
+        # When
+        process = subprocess.run(
+            command + [ROOT, cache.path, str(user_id)],
+            capture_output=True,
+            timeout=30,
+        )
+
+        # Then
+        assert process.returncode == 0, process.stderr.decode()
+        assert cache.get(user_id)[0] == b"from another worker"
+
+    def test_expired_entries_are_misses(self, tmp_path):
+        # Given
+        cache = SharedUserCache(str(tmp_path / "ttl.cache"), 64, 1024, ttl=0)
+        user_id = uuid.uuid4()
+        cache.fill(user_id, cache.get(user_id)[1], b"payload")
+
+        # When
+        payload, epoch = cache.get(user_id)
+
+        # Then
+        assert payload is None
+        assert epoch is not None
+        cache.close()
+
+
+class TestSharedUserCacheService:
+    def test_reads_are_served_from_the_cache(self, db, user, cache, monkeypatch):
+        # Given
+        monkeypatch.setattr(shared_cache, "shared_users", cache)
+        loaded = service_user.get_user_out(db, user.id)
+
+        # When
+        fetched = service_user.get_user_out(db, user.id)
+
+        # Then
+        assert fetched.username == "username"
+        assert fetched.model_dump() == loaded.model_dump()
+        assert cache.stats()["hits"] == 1
+
+    def test_writes_invalidate_the_cache(self, db, user, cache, monkeypatch):
+        # Given
+        monkeypatch.setattr(shared_cache, "shared_users", cache)
+        service_user.get_user_out(db, user.id)
+
+        # When
+        service_user.update_user(db, user.id, UserPartialUpdate(first_name="New"))
+        fetched = service_user.get_user_out(db, user.id)
+
+        # Then
+        assert fetched.first_name == "New"
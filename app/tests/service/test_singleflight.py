@@ -0,0 +1,86 @@
+import asyncio
+import pytest
+import threading
+import time
+
+from app.services.singleflight import SingleFlight
+
+
+class TestSingleFlight:
+    def test_concurrent_calls_share_one_execution(self):
+        # Given
+        group = SingleFlight("test_sync")
+        release = threading.Event()
+        executions = []
+
+        def fetch():
+            executions.append(1)
+            release.wait(5)
+            return "result"
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(group.do("key", fetch)))
+            for _ in range(10)
+        ]
+
+        # When
+        for thread in threads:
+            thread.start()
+        while group.stats()["calls"] < 10:
+            time.sleep(0.001)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        # Then
+        assert results == ["result"] * 10
+        assert len(executions) == 1
+        assert group.stats()["coalesced"] == 9
+        assert group.stats()["in_flight"] == 0
+
+    def test_errors_are_shared(self):
+        # Given
+        group = SingleFlight("test_error")
+
+        def fail():
+            raise LookupError("missing")
+
+        # When and then
+        with pytest.raises(LookupError):
+            group.do("key", fail)
+        assert group.stats()["in_flight"] == 0
+
+    def test_async_callers_share_one_execution(self):
+        # Given
+        group = SingleFlight("test_async")
+        executions = []
+
+        def fetch():
+            executions.append(1)
+            time.sleep(0.05)
+            return 42
+
+        async def main():
+            return await asyncio.gather(
+                *[group.do_async("key", fetch) for _ in range(20)]
+            )
+
+        # When
+        results = asyncio.run(main())
+
+        # Then
+        assert results == [42] * 20
+        assert len(executions) == 1
+        assert group.stats()["coalesced"] == 19
+
+    def test_forget_starts_a_new_call(self):
+        # Given
+        group = SingleFlight("test_forget")
+        group.do("key", lambda: 1)
+
+        # When
+        group.forget("key")
+
+        # Then
+        assert group.do("key", lambda: 2) == 2
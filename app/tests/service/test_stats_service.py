@@ -0,0 +1,79 @@
+from datetime import datetime, timezone
+
+from fastapi_pagination import Params
+
+from app.models import UserStat
+from app.schemas.user import UserCreate, UserPartialUpdate
+from app.services import stats as service_stats
+from app.services import user as service_user
+
+
+def _user_create(username, role="user", active=True):
+    return UserCreate(
+        username=username,
+        email=f"{username}@example.com",
+        first_name="Stats",
+        last_name="User",
+        role=role,
+        active=active,
+    )
+
+
+def _today():
+    return datetime.now(timezone.utc).date().isoformat()
+
+
+class TestUserStatsService:
+    def test_counters_follow_writes(self, db):
+        # Given
+        admin = service_user.create_user(db, _user_create("admin1", role="admin"))
+        service_user.create_user(db, _user_create("user1"))
+        guest = service_user.create_user(db, _user_create("guest1", role="guest"))
+
+        # When
+        service_user.update_user(
+            db, admin.id, UserPartialUpdate(role="user", active=False)
+        )
+        service_user.delete_user(db, guest.id)
+        stats = service_stats.get_user_stats(db, days=7)
+
+        # Then
+        assert stats.total == 2
+        assert stats.by_role == {"user": 2}
+        assert stats.by_status == {"active": 1, "inactive": 1}
+        assert [(s.day, s.count) for s in stats.signups_per_day] == [(_today(), 2)]
+
+    def test_counters_follow_bulk_writes(self, db):
+        # Given
+        rows = [_user_create(f"bulk{n}").model_dump() for n in range(4)]
+        service_user.bulk_create_users(db, rows)
+        db.commit()
+        ids = [
+            user.id
+            for user in service_user.get_users(db, Params(page=1, size=10)).items
+        ]
+
+        # When
+        service_user.bulk_deactivate_users(db, ids[:2] + ids[:1])
+        db.commit()
+        stats = service_stats.get_user_stats(db, days=1)
+
+        # Then
+        assert stats.total == 4
+        assert stats.by_status == {"active": 2, "inactive": 2}
+
+    def test_reconcile_fixes_drift(self, db, multiple_users):
+        # Given
+        service_user.create_user(db, _user_create("counted", role="guest"))
+        db.add(UserStat(dimension="role", key="ghost", slot=3, count=7))
+        db.commit()
+
+        # When
+        drifted = service_stats.reconcile_user_stats(db)
+        stats = service_stats.get_user_stats(db, days=1)
+
+        # Then
+        assert drifted == 4
+        assert stats.total == 6
+        assert stats.by_role == {"admin": 5, "guest": 1}
+        assert service_stats.reconcile_user_stats(db) == 0
@@ -77,6 +77,32 @@ class TestUserCreateService:
         with pytest.raises(DuplicateUserError) as exc_info:
             service_user.create_user(db, user_data2)
 
+    def test_create_user_duplicate_is_case_insensitive(self, db):
+        # Given
+        service_user.create_user(
+            db,
+            UserCreate(
+                username="CaseUser",
+                email="Case@Example.com",
+                first_name="A",
+                last_name="B",
+                role="user",
+            ),
+        )
+
+        # When
+        user_data = UserCreate(
+            username="caseuser",
+            email="other@example.com",
+            first_name="C",
+            last_name="D",
+            role="user",
+        )
+
+        # Then
+        with pytest.raises(DuplicateUserError):
+            service_user.create_user(db, user_data)
+
     def test_create_user_invalid_role(self, db):
         # Given when and then
         with pytest.raises(ValidationError) as exc_info:
@@ -114,6 +140,18 @@ class TestUserListService:
         assert users_page.total == 5
         assert len(users_page.items) == 5
 
+    def test_list_users_skips_the_identity_map(self, db, multiple_users):
+        # Given
+        usernames = {u.username for u in multiple_users}
+        db.expunge_all()
+
+        # When
+        users_page = service_user.get_users(db, Params(page=1, size=10))
+
+        # Then
+        assert len(db.identity_map) == 0
+        assert {u.username for u in users_page.items} == usernames
+
 
 class TestUserRetrieveService:
     def test_get_user_by_id_success(self, db, user):
@@ -124,6 +162,31 @@ class TestUserRetrieveService:
         assert fetched.id == user.id
         assert fetched.username == "username"
 
+    def test_get_user_out(self, db, user):
+        # Given and when
+        fetched = service_user.get_user_out(db, user.id)
+
+        # Then
+        assert fetched.id == user.id
+        assert fetched.username == "username"
+
+    def test_get_user_out_skips_the_identity_map(self, db, user):
+        # Given
+        user_id = user.id
+        db.expunge_all()
+
+        # When
+        fetched = service_user.get_user_out(db, user_id)
+
+        # Then
+        assert fetched.id == user_id
+        assert len(db.identity_map) == 0
+
+    def test_get_user_out_not_found(self, db):
+        # Given when and then
+        with pytest.raises(NoResultFound):
+            service_user.get_user_out(db, uuid.uuid4())
+
     def test_get_user_by_id_not_found(self, db):
         # Given when and then
         with pytest.raises(NoResultFound):
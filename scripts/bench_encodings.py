@@ -0,0 +1,93 @@
+"""
+Response encoding benchmark comparing JSON and MessagePack, with and without compression.
+
+Builds pages of ``UserOut`` and encodes each one as the user endpoints do:
+``UserOut`` JSON (the current responses) and MessagePack, each sent as is,
+gzip-compressed and zstd-compressed at the middleware's levels. Reports the
+payload size and the encode plus compress CPU time per page.
+
+Usage:
+    python scripts/bench_encodings.py
+    python scripts/bench_encodings.py --sizes 10,100,1000 --repeat 200
+"""
+import argparse
+import gzip
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import zstandard
+from fastapi_pagination import Page, Params
+
+from app.encoding import (
+    JSON,
+    MSGPACK,
+    RESPONSE_COMPRESSION_GZIP_LEVEL,
+    RESPONSE_COMPRESSION_ZSTD_LEVEL,
+    encode,
+)
+from app.schemas.user import UserOut
+
+ZSTD = zstandard.ZstdCompressor(level=RESPONSE_COMPRESSION_ZSTD_LEVEL)
+
+COMPRESSIONS = {
+    "identity": lambda data: data,
+    "gzip": lambda data: gzip.compress(data, RESPONSE_COMPRESSION_GZIP_LEVEL),
+    "zstd": ZSTD.compress,
+}
+
+
+def build_page(size: int) -> Page[UserOut]:
+    now = datetime.now(timezone.utc)
+    items = [
+        UserOut(
+            id=uuid.uuid4(),
+            username=f"user{n}",
+            email=f"user{n}@example.com",
+            first_name="Bench",
+            last_name=f"User {n}",
+            role="user",
+            created_at=now,
+            updated_at=now,
+            active=n % 10 != 0,
+        )
+        for n in range(size)
+    ]
+    return Page.create(items, Params(page=1, size=min(size, 100)), total=size)
+
+
+def measure(page: Page[UserOut], media_type: str, compress, repeat: int):
+    """Returns (payload bytes, CPU seconds per page)."""
+    started = time.process_time()
+    for _ in range(repeat):
+        payload = compress(encode(page, media_type))
+    return len(payload), (time.process_time() - started) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="10,100,1000")
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+
+    print(
+        f"{'users':>6} {'format':>8} {'encoding':>9} {'bytes':>9} {'vs json':>8} {'us/page':>9}"
+    )
+    for size in (int(size) for size in args.sizes.split(",")):
+        page = build_page(size)
+        baseline, _ = measure(page, JSON, COMPRESSIONS["identity"], 1)
+        for label, media_type in (("json", JSON), ("msgpack", MSGPACK)):
+            for name, compress in COMPRESSIONS.items():
+                length, cpu = measure(page, media_type, compress, args.repeat)
+                print(
+                    f"{size:>6} {label:>8} {name:>9} {length:>9} "
+                    f"{length / baseline:>7.0%} {cpu * 1e6:>9.0f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
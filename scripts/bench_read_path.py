@@ -0,0 +1,114 @@
+"""
+Read path benchmark comparing ORM instances and Core rows for user pages.
+
+Seeds a scratch SQLite database with users, then serializes pages of 100 to
+1000 users to ``UserOut`` JSON both from ``Session.query(User)`` (ORM
+instances, identity map, validation) and from ``select(*USER_COLUMNS)`` (Core
+rows built into ``UserOut`` without re-validation, as ``get_users`` does).
+Reports CPU time per row and peak memory per page.
+
+Usage:
+    python scripts/bench_read_path.py
+    python scripts/bench_read_path.py --users 20000 --sizes 100,500,1000 --repeat 50
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timezone
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from app.db.database import Base
+from app.models import User
+from app.models.user import USER_COLUMNS
+from app.schemas.user import UserOut
+
+USER_LIST = TypeAdapter(List[UserOut])
+
+
+def seed(engine, users: int) -> None:
+    now = datetime.now(timezone.utc)
+    rows = [
+        {
+            "id": uuid.uuid4(),
+            "username": f"user{n}",
+            "email": f"user{n}@example.com",
+            "first_name": "Bench",
+            "last_name": "User",
+            "role": "user",
+            "created_at": now,
+            "updated_at": now,
+            "active": True,
+        }
+        for n in range(users)
+    ]
+    with engine.begin() as conn:
+        conn.execute(insert(User), rows)
+
+
+def orm_page(db: Session, size: int) -> bytes:
+    """Previous path: ORM instances validated into ``UserOut``."""
+    users = db.query(User).limit(size).all()
+    return USER_LIST.dump_json(USER_LIST.validate_python(users, from_attributes=True))
+
+
+def core_page(db: Session, size: int) -> bytes:
+    """Current path: Core rows built into ``UserOut`` without re-validation."""
+    rows = db.execute(select(*USER_COLUMNS).limit(size)).all()
+    return USER_LIST.dump_json(
+        [UserOut.model_construct(**row._mapping) for row in rows]
+    )
+
+
+def measure(engine, read, size: int, repeat: int):
+    """Returns (CPU seconds per row, peak bytes per page)."""
+    started = time.process_time()
+    for _ in range(repeat):
+        with Session(engine) as db:
+            read(db, size)
+    cpu = (time.process_time() - started) / (repeat * size)
+
+    tracemalloc.start()
+    with Session(engine) as db:
+        read(db, size)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return cpu, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=5_000)
+    parser.add_argument("--sizes", default="100,250,500,1000")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    seed(engine, args.users)
+
+    print(f"{'rows':>6} {'path':>5} {'us/row':>8} {'peak KiB':>9}")
+    for size in (int(size) for size in args.sizes.split(",")):
+        results = {
+            "orm": measure(engine, orm_page, size, args.repeat),
+            "core": measure(engine, core_page, size, args.repeat),
+        }
+        for label, (cpu, peak) in results.items():
+            print(f"{size:>6} {label:>5} {cpu * 1e6:>8.1f} {peak / 1024:>9.0f}")
+        (orm_cpu, orm_peak), (core_cpu, core_peak) = results.values()
+        print(
+            f"{size:>6} saved {(orm_cpu - core_cpu) * 1e6:>7.1f}us/row, "
+            f"{(orm_peak - core_peak) / 1024:.0f} KiB/page"
+        )
+
+
+if __name__ == "__main__":
+    main()
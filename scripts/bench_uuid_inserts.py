@@ -0,0 +1,87 @@
+"""
+Insert benchmark comparing random UUIDv4 and time-ordered UUIDv7 primary keys.
+
+Creates two scratch tables shaped like ``users`` (UUID primary key plus a
+payload), inserts the same number of rows into each in fixed-size batches and
+reports insert throughput and, on PostgreSQL, the primary key index size.
+
+Usage:
+    python scripts/bench_uuid_inserts.py --rows 1000000 --batch 5000
+    python scripts/bench_uuid_inserts.py --url sqlite:///./bench.db --rows 200000
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import Column, MetaData, String, Table, create_engine, text
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.db.ids import uuid7
+
+
+def build_table(metadata: MetaData, name: str) -> Table:
+    return Table(
+        name,
+        metadata,
+        Column("id", UUID(as_uuid=True), primary_key=True),
+        Column("payload", String(100), nullable=False),
+    )
+
+
+def run(engine, table: Table, generator, rows: int, batch: int) -> float:
+    started = time.perf_counter()
+    for offset in range(0, rows, batch):
+        values = [
+            {"id": generator(), "payload": f"user{offset + i}@example.com"}
+            for i in range(min(batch, rows - offset))
+        ]
+        with engine.begin() as conn:
+            conn.execute(table.insert(), values)
+    return time.perf_counter() - started
+
+
+def index_size(engine, table: Table) -> str:
+    if engine.dialect.name != "postgresql":
+        return "n/a"
+    with engine.connect() as conn:
+        return conn.execute(
+            text("SELECT pg_size_pretty(pg_indexes_size(:name))"),
+            {"name": table.name},
+        ).scalar_one()
+
+
+def main() -> None:
+    from app.db.database import DATABASE_URL
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default=DATABASE_URL)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--batch", type=int, default=5_000)
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    metadata = MetaData()
+    tables = {
+        "uuid4": (build_table(metadata, "bench_ids_v4"), uuid.uuid4),
+        "uuid7": (build_table(metadata, "bench_ids_v7"), uuid7),
+    }
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    try:
+        for label, (table, generator) in tables.items():
+            elapsed = run(engine, table, generator, args.rows, args.batch)
+            print(
+                f"{label}: {args.rows} rows in {elapsed:.2f}s "
+                f"({args.rows / elapsed:,.0f} rows/s), "
+                f"index size {index_size(engine, table)}"
+            )
+    finally:
+        metadata.drop_all(engine)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Reports index usage and write amplification for the ``users`` table.
+
+Reads PostgreSQL's cumulative statistics views, so run it against a database
+that has served representative traffic. Save a snapshot before applying a
+migration and compare after it:
+
+    python scripts/index_report.py --save before.json
+    alembic upgrade head
+    # ... replay traffic ...
+    python scripts/index_report.py --compare before.json
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+
+INDEX_STATS = text(
+    """
+    SELECT s.indexrelname AS name,
+           s.idx_scan AS scans,
+           s.idx_tup_read AS tuples_read,
+           pg_relation_size(s.indexrelid) AS size_bytes,
+           io.idx_blks_read AS blocks_read,
+           io.idx_blks_hit AS blocks_hit
+    FROM pg_stat_user_indexes s
+    JOIN pg_statio_user_indexes io USING (indexrelid)
+    WHERE s.relname = :table
+    ORDER BY s.indexrelname
+    """
+)
+TABLE_STATS = text(
+    """
+    SELECT n_tup_ins AS inserts,
+           n_tup_upd AS updates,
+           n_tup_hot_upd AS hot_updates,
+           n_tup_del AS deletes,
+           pg_relation_size(relid) AS heap_bytes
+    FROM pg_stat_user_tables
+    WHERE relname = :table
+    """
+)
+
+
+def snapshot(url: str, table: str) -> dict:
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        indexes = [
+            dict(row._mapping) for row in conn.execute(INDEX_STATS, {"table": table})
+        ]
+        stats = conn.execute(TABLE_STATS, {"table": table}).mappings().one()
+    stats = dict(stats)
+
+    # Every insert and every non-HOT update writes one entry into each index;
+    # HOT updates and deletes touch none (dead entries are reclaimed by vacuum).
+    row_writes = stats["inserts"] + stats["updates"]
+    index_writes = len(indexes) * (
+        stats["inserts"] + stats["updates"] - stats["hot_updates"]
+    )
+    stats["index_count"] = len(indexes)
+    stats["index_bytes"] = sum(index["size_bytes"] for index in indexes)
+    stats["index_writes_per_row_write"] = (
+        round(index_writes / row_writes, 2) if row_writes else float(len(indexes))
+    )
+    return {"table": stats, "indexes": indexes}
+
+
+def print_report(report: dict, title: str) -> None:
+    table = report["table"]
+    print(f"== {title}")
+    print(
+        f"{table['index_count']} indexes, {table['index_bytes'] / 1024:.0f} KiB; "
+        f"inserts={table['inserts']} updates={table['updates']} "
+        f"(hot={table['hot_updates']}) deletes={table['deletes']}; "
+        f"index writes per row write={table['index_writes_per_row_write']}"
+    )
+    for index in report["indexes"]:
+        hits = index["blocks_hit"] + index["blocks_read"]
+        hit_ratio = f"{index['blocks_hit'] / hits:.1%}" if hits else "n/a"
+        unused = "  <- never scanned" if index["scans"] == 0 else ""
+        print(
+            f"  {index['name']:<28} scans={index['scans']:<10} "
+            f"tuples_read={index['tuples_read']:<10} "
+            f"size={index['size_bytes'] / 1024:.0f} KiB cache_hit={hit_ratio}{unused}"
+        )
+
+
+def main() -> None:
+    from app.db.database import DATABASE_URL
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default=DATABASE_URL)
+    parser.add_argument("--table", default="users")
+    parser.add_argument("--save", help="Write the snapshot to this JSON file")
+    parser.add_argument("--compare", help="Previous snapshot to print side by side")
+    args = parser.parse_args()
+
+    report = snapshot(args.url, args.table)
+    if args.compare:
+        with open(args.compare) as fh:
+            print_report(json.load(fh), f"before ({args.compare})")
+    print_report(report, "current")
+    if args.save:
+        with open(args.save, "w") as fh:
+            json.dump(report, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()